@@ -0,0 +1,72 @@
+"""
+Benchmark the analytics queries over a year of synthetic 15-minute pings.
+
+Run from the repo root:
+    python -m benchmarks.bench_analytics
+"""
+
+import time
+from collections import defaultdict
+
+from services import analytics
+from services.sessions import build_sessions
+from benchmarks.synthetic import make_logs
+
+
+def _timeit(fn, repeat: int = 20) -> float:
+    """Best-of-`repeat` wall time in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def _hourly_python(logs: list) -> list:
+    """The per-document loop we'd otherwise write, as a baseline."""
+    minutes = [0] * 24
+    for log in logs:
+        if log["category"] == "deep_work":
+            minutes[log["timestamp"].hour] += 15
+    return minutes
+
+
+def _sessions_python(logs: list) -> dict:
+    """Session lengths per category from build_sessions, one UTC day at a
+    time, as the daily summary stores them."""
+    by_day = defaultdict(list)
+    for log in logs:
+        by_day[log["timestamp"].date()].append(log)
+    lengths = defaultdict(list)
+    for day_logs in by_day.values():
+        for session in build_sessions(day_logs):
+            lengths[session.category].append(session.minutes)
+    return {cat: (len(v), max(v)) for cat, v in lengths.items()}
+
+
+def main():
+    logs = make_logs(days=365)
+    print(f"{len(logs)} pings")
+
+    load_ms = _timeit(lambda: analytics.build_columns(logs), repeat=3)
+    cols = analytics.build_columns(logs)
+    print(f"build_columns      {load_ms:8.2f} ms")
+
+    assert analytics.minutes_by_hour(cols) == _hourly_python(logs)
+    sessions = analytics.session_lengths(cols)
+    assert {cat: (s["count"], s["longestMinutes"]) for cat, s in sessions.items()} == _sessions_python(logs)
+
+    cases = {
+        "hourly (python)": lambda: _hourly_python(logs),
+        "hourly (numpy)": lambda: analytics.minutes_by_hour(cols),
+        "streaks": lambda: analytics.streaks(cols),
+        "transitions": lambda: analytics.transition_matrix(cols),
+        "sessions": lambda: analytics.session_lengths(cols),
+    }
+    for name, fn in cases.items():
+        print(f"{name:<18} {_timeit(fn):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
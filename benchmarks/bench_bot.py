@@ -0,0 +1,139 @@
+"""
+Per-command bot latency: remote (HTTP to the API) vs embedded (direct
+service-layer calls).
+
+Replays the recorded updates in benchmarks/telegram_updates.json through
+bot.py's real handlers via Application.process_update. Replies go to a local
+FakeServer with no delay, so the numbers are the bot's own cost: for remote
+mode that includes the HTTP round trip to an API process started on a local
+port, for embedded mode only the Mongo calls.
+
+    python -m benchmarks.bench_bot
+    python -m benchmarks.bench_bot --iterations 500
+
+Uses mongomock unless BENCH_MONGODB_URI is set (in which case both modes share
+the real database).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fakes import FakeServer, _free_port
+from benchmarks.load import RESULTS_DIR, _git_sha, _setup_environment, _use_in_memory_db, seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPDATES = os.path.join(os.path.dirname(__file__), "telegram_updates.json")
+COMMANDS = ["agenda", "note", "ping_reply", "pause", "resume"]
+
+
+def start_api(port: int, days: int, ready_dir: str) -> subprocess.Popen:
+    env = {**os.environ, "BENCH_DAYS": str(days), "BENCH_READY_DIR": ready_dir}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "benchmarks.serve_app:app",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + 60
+    while not os.listdir(ready_dir):
+        if proc.poll() is not None or time.time() > deadline:
+            proc.kill()
+            raise RuntimeError("API did not start")
+        time.sleep(0.1)
+    return proc
+
+
+async def measure(application, updates: dict, iterations: int) -> dict:
+    from telegram import Update
+
+    results = {}
+    for name in COMMANDS:
+        payload = updates[name]
+        await application.process_update(Update.de_json(payload, application.bot))
+        latencies = []
+        for _ in range(iterations):
+            update = Update.de_json(payload, application.bot)
+            started = time.perf_counter()
+            await application.process_update(update)
+            latencies.append((time.perf_counter() - started) * 1000)
+        latencies.sort()
+        results[name] = {
+            "meanMs": round(statistics.fmean(latencies), 3),
+            "p50Ms": round(latencies[len(latencies) // 2], 3),
+            "p95Ms": round(latencies[int(len(latencies) * 0.95)], 3),
+        }
+    return results
+
+
+async def main_async(args) -> dict:
+    fake = FakeServer(delay_ms=0).start()
+    _setup_environment(fake.url)
+    if not os.getenv("BENCH_MONGODB_URI"):
+        _use_in_memory_db()
+
+    import bot
+    from services.db import get_db
+
+    await seed(get_db(), args.days)
+    with open(UPDATES) as f:
+        updates = json.load(f)
+
+    application = bot.build_application(updater=False)
+    await application.initialize()
+
+    bot.use_backend(bot.EmbeddedBackend())
+    embedded = await measure(application, updates, args.iterations)
+
+    with tempfile.TemporaryDirectory() as ready_dir:
+        port = _free_port()
+        api = start_api(port, args.days, ready_dir)
+        try:
+            bot.APP_URL = f"http://127.0.0.1:{port}"
+            bot.use_backend(bot.RemoteBackend())
+            remote = await measure(application, updates, args.iterations)
+        finally:
+            api.terminate()
+            api.wait(timeout=30)
+
+    await application.shutdown()
+    fake.stop()
+    return {"embedded": embedded, "remote": remote}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--output", help="results file (default benchmarks/results/bot-<sha>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    print(f"\n{'command':<12} {'remote p50':>11} {'embedded p50':>13} {'remote p95':>11} {'embedded p95':>13}")
+    for name in COMMANDS:
+        r, e = results["remote"][name], results["embedded"][name]
+        print(f"{name:<12} {r['p50Ms']:>11} {e['p50Ms']:>13} {r['p95Ms']:>11} {e['p95Ms']:>13}")
+
+    report = {
+        "commit": _git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "backend": "mongod" if os.getenv("BENCH_MONGODB_URI") else "mongomock",
+        "iterations": args.iterations,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bot-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Ping trigger latency: the first ping of the day (morning kickoff) and a
+plain ping.
+
+Seeds 30 days of data plus yesterday's agenda (half of it still open), then
+for each iteration resets the settings so the trigger is eligible, for
+kickoff also clearing lastMorningMessage and today's carried items, and
+times POST /api/ping/trigger. Telegram is a local FakeServer answering
+after --telegram-delay-ms, so the gap between the two modes and that delay
+shows whether the send is on the request path. The per-step timings the
+trigger reports are averaged alongside.
+
+    python -m benchmarks.bench_kickoff
+    python -m benchmarks.bench_kickoff --iterations 200 --telegram-delay-ms 300
+
+Uses mongomock unless BENCH_MONGODB_URI is set.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.fakes import FakeServer
+from benchmarks.load import CRON_SECRET, RESULTS_DIR, _git_sha, _setup_environment, _use_in_memory_db, seed
+
+YESTERDAY_ITEMS = 20
+
+
+async def reset(db, today: str, kickoff: bool):
+    fields = {"nextEligibleAt": None, "blockedIntervals": [], "scheduleThrough": datetime(9999, 1, 1)}
+    if kickoff:
+        fields["lastMorningMessage"] = None
+        await db.agenda.delete_many({"date": today, "carriedFrom": {"$ne": None}})
+        # Carried items are indexed for search; keep the index from growing
+        await db.search_index.delete_many({"kind": "agenda", "date": today})
+    else:
+        fields["lastMorningMessage"] = today
+    await db.settings.update_one({"userId": "default"}, {"$set": fields})
+
+
+async def measure(client, db, today: str, kickoff: bool, iterations: int) -> dict:
+    headers = {"x-cron-secret": CRON_SECRET}
+    latencies, steps = [], defaultdict(list)
+    for i in range(iterations + 1):
+        await reset(db, today, kickoff)
+        started = time.perf_counter()
+        response = await client.post("/api/ping/trigger", headers=headers)
+        elapsed = (time.perf_counter() - started) * 1000
+        body = response.json()
+        if not body.get("fired"):
+            raise RuntimeError(f"trigger did not fire: {body}")
+        if i == 0:
+            continue  # warm-up
+        latencies.append(elapsed)
+        for step, ms in (body.get("timings") or {}).items():
+            steps[step].append(ms)
+    latencies.sort()
+    return {
+        "meanMs": round(statistics.fmean(latencies), 3),
+        "p50Ms": round(latencies[len(latencies) // 2], 3),
+        "p95Ms": round(latencies[int(len(latencies) * 0.95)], 3),
+        "stepsMeanMs": {step: round(statistics.fmean(v), 3) for step, v in steps.items()},
+    }
+
+
+async def main_async(args) -> dict:
+    fake = FakeServer(delay_ms=args.telegram_delay_ms).start()
+    _setup_environment(fake.url)
+    if not os.getenv("BENCH_MONGODB_URI"):
+        _use_in_memory_db()
+
+    import httpx
+    import main
+    from services import background, days
+    from services.db import get_db
+
+    db = get_db()
+    await seed(db, args.days)
+    today = (await days.today(db)).date
+    yesterday = days.shift(today, -1)
+    now = datetime.now(timezone.utc)
+    await db.agenda.insert_many([
+        {
+            "content": f"yesterday {i}", "date": yesterday, "completed": i % 2 == 0, "completedAt": None,
+            "createdAt": now, "position": i, "carriedFrom": None, "source": "bench",
+        }
+        for i in range(YESTERDAY_ITEMS)
+    ])
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name, kickoff in (("kickoff", True), ("ping", False)):
+            results[name] = await measure(client, db, today, kickoff, args.iterations)
+    await background.drain()
+    fake.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--telegram-delay-ms", type=float, default=200)
+    parser.add_argument("--output", help="results file (default benchmarks/results/kickoff-<sha>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    for name, r in results.items():
+        steps = "  ".join(f"{k} {v}" for k, v in r["stepsMeanMs"].items())
+        print(f"{name:<8} p50 {r['p50Ms']:>8} ms  p95 {r['p95Ms']:>8} ms  {steps}")
+
+    report = {
+        "commit": _git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "backend": "mongod" if os.getenv("BENCH_MONGODB_URI") else "mongomock",
+        "iterations": args.iterations,
+        "telegramDelayMs": args.telegram_delay_ms,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"kickoff-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Search latency over synthetic corpora.
+
+For each corpus size (in days), seeds a ping every 15 minutes, 4 notes and
+5 agenda items a day, indexes them, then runs a fixed set of queries
+through services.search.search:
+
+- a very common word and a rare one;
+- a bare prefix and two words;
+- the common word restricted by date or by kind.
+
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --days 30 365 --repeat 50
+    python -m benchmarks.bench_search --days 30 --rebuild   # also time search.rebuild
+
+Uses mongomock unless BENCH_MONGODB_URI is set. mongomock has no indexes, so
+every query is a full scan of the index collection in Python. Only numbers
+against a real mongod say anything about the production latency; mongomock
+runs are for comparing commits. For the same reason the index is normally
+built with insert_many: rebuild's per-entry upserts are each a scan under
+mongomock, so --rebuild is only worth it against mongod or a small corpus.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.load import RESULTS_DIR, _git_sha, _setup_environment, _use_in_memory_db
+from benchmarks.synthetic import make_agenda, make_logs, make_notes
+
+
+def queries() -> dict:
+    month_ago = (datetime.now(timezone.utc) - timedelta(days=30)).strftime("%Y-%m-%d")
+    return {
+        "common": {"q": "api"},
+        "rare": {"q": "dentist"},
+        "prefix": {"q": "meet"},
+        "two_words": {"q": "rag paper"},
+        "common_last_30d": {"q": "api", "since": month_ago},
+        "common_notes_only": {"q": "api", "kinds": ["note"]},
+    }
+
+
+async def seed(db, days: int) -> dict:
+    for name in ("logs", "logs_archive", "notes", "agenda", "search_index"):
+        await db[name].delete_many({})
+    corpus = {"logs_archive": make_logs(days=days), "notes": make_notes(days), "agenda": make_agenda(days)}
+    for name, docs in corpus.items():
+        for i in range(0, len(docs), 5000):
+            await db[name].insert_many(docs[i:i + 5000])
+    return {name: len(docs) for name, docs in corpus.items()}
+
+
+async def build_index(db) -> int:
+    from services import search
+
+    await search.ensure_indexes(db)
+    total = 0
+    for kind, collection in search.SOURCES:
+        docs = await db[collection].find({}).to_list(length=None)
+        entries = [e for e in (search.make_entry(kind, doc) for doc in docs) if e]
+        for i in range(0, len(entries), 5000):
+            await db.search_index.insert_many(entries[i:i + 5000])
+        total += len(entries)
+    return total
+
+
+async def run_corpus(db, days: int, repeat: int, rebuild: bool) -> dict:
+    from services import search
+
+    seeded = await seed(db, days)
+    started = time.perf_counter()
+    entries = sum(v for k, v in (await search.rebuild(db)).items() if k != "removed") if rebuild else await build_index(db)
+    build_s = time.perf_counter() - started
+    print(f"\n{days} days: {seeded}, {'rebuilt' if rebuild else 'indexed'} {entries} entries in {build_s:.1f}s")
+
+    results = {"seeded": seeded, "entries": entries, "queries": {}}
+    if rebuild:
+        results["rebuildSeconds"] = round(build_s, 2)
+    for name, params in queries().items():
+        found = await search.search(db, **params)
+        latencies = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            await search.search(db, **params)
+            latencies.append((time.perf_counter() - t) * 1000)
+        latencies.sort()
+        r = {
+            "candidates": found["candidates"],
+            "p50Ms": round(latencies[len(latencies) // 2], 2),
+            "p95Ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        }
+        results["queries"][name] = r
+        print(f"  {name:<18} candidates {r['candidates']:>4}  p50 {r['p50Ms']:>8} ms  p95 {r['p95Ms']:>8} ms")
+    return results
+
+
+async def main_async(args) -> dict:
+    _setup_environment("http://127.0.0.1:9")
+    if not os.getenv("BENCH_MONGODB_URI"):
+        _use_in_memory_db()
+    from services.db import get_db
+
+    db = get_db()
+    return {str(days): await run_corpus(db, days, args.repeat, args.rebuild) for days in args.days}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, nargs="+", default=[30, 365])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rebuild", action="store_true", help="index with search.rebuild and time it")
+    parser.add_argument("--output", help="results file (default benchmarks/results/search-<sha>.json)")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    report = {
+        "commit": _git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "backend": "mongod" if os.getenv("BENCH_MONGODB_URI") else "mongomock",
+        "repeat": args.repeat,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"search-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Compare the old and new JSON paths on a 500-log summary payload.
+
+Before: stringify ids / isoformat datetimes in a loop, then
+jsonable_encoder + json.dumps via JSONResponse.
+After: MongoJSONResponse, a single orjson pass over the raw documents.
+
+Run from the repo root:
+    python -m benchmarks.bench_serialization
+"""
+
+import copy
+import json
+import time
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic import make_logs
+from services.responses import MongoJSONResponse
+
+
+def make_summary(n_logs: int = 500) -> dict:
+    logs = make_logs(days=6)[-n_logs:]
+    for log in logs:
+        log["_id"] = ObjectId()
+    now = datetime.now(timezone.utc)
+    notes = [
+        {"_id": ObjectId(), "content": f"note {i}", "source": "telegram", "timestamp": now}
+        for i in range(50)
+    ]
+    agenda = [
+        {
+            "_id": ObjectId(), "content": f"task {i}", "date": now.strftime("%Y-%m-%d"),
+            "completed": i % 2 == 0, "completedAt": now if i % 2 == 0 else None,
+            "createdAt": now, "carriedFrom": None, "source": "dashboard",
+        }
+        for i in range(20)
+    ]
+    return {
+        "date": now.strftime("%Y-%m-%d"),
+        "logs": logs,
+        "notes": notes,
+        "agenda": agenda,
+        "stats": {"totalPings": len(logs), "categoryBreakdown": {"deep_work": 200}},
+    }
+
+
+def before(summary: dict) -> bytes:
+    for item in summary["logs"] + summary["notes"] + summary["agenda"]:
+        item["_id"] = str(item["_id"])
+        for field in ("timestamp", "completedAt", "createdAt"):
+            if field in item and isinstance(item[field], datetime):
+                item[field] = item[field].isoformat()
+    return JSONResponse(content=jsonable_encoder(summary)).body
+
+
+def after(summary: dict) -> bytes:
+    return MongoJSONResponse(summary).body
+
+
+def _bench(fn, payload: dict, repeat: int = 50) -> float:
+    # The old path mutates its input, so both sides get a fresh copy
+    copies = [copy.deepcopy(payload) for _ in range(repeat)]
+    best = float("inf")
+    for c in copies:
+        start = time.perf_counter()
+        fn(c)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    payload = make_summary()
+    assert json.loads(before(copy.deepcopy(payload))) == json.loads(after(copy.deepcopy(payload)))
+
+    old_ms = _bench(before, payload)
+    new_ms = _bench(after, payload)
+    print(f"before (loop + jsonable_encoder + json)  {old_ms:7.2f} ms")
+    print(f"after  (MongoJSONResponse / orjson)      {new_ms:7.2f} ms")
+    print(f"speedup                                  {old_ms / new_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Track cold-start import time of main.py.
+
+Runs `python -X importtime -c "import main"` in fresh interpreters, reports
+the median total and the slowest top-level packages, and saves the result
+as JSON next to the load-test results so startup regressions show up
+between commits.
+
+Run from the repo root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --compare benchmarks/results/startup-abc123.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from benchmarks.load import RESULTS_DIR, _git_sha
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_once() -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+    )
+    total_us = 0
+    by_package = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        name = parts[2].strip()
+        by_package[name.split(".")[0]] += self_us
+        if name == "main":
+            total_us = cumulative_us
+    return {"totalMs": total_us / 1000, "packages": by_package}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    totals = [r["totalMs"] for r in runs]
+    packages = defaultdict(list)
+    for r in runs:
+        for name, us in r["packages"].items():
+            packages[name].append(us / 1000)
+    top = sorted(
+        ((name, round(statistics.median(ms), 2)) for name, ms in packages.items()),
+        key=lambda x: -x[1],
+    )[:15]
+
+    report = {
+        "commit": _git_sha(),
+        "runs": args.runs,
+        "medianMs": round(statistics.median(totals), 2),
+        "minMs": round(min(totals), 2),
+        "topPackagesMs": dict(top),
+    }
+
+    print(f"import main: median {report['medianMs']} ms, min {report['minMs']} ms over {args.runs} runs")
+    for name, ms in top:
+        print(f"  {name:<28} {ms:8.2f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        delta = report["medianMs"] - old["medianMs"]
+        print(f"median vs {old['commit']}: {old['medianMs']} → {report['medianMs']} ms ({delta:+.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
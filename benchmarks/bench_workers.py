@@ -0,0 +1,167 @@
+"""
+Memory and latency per gunicorn worker count.
+
+For each worker count, starts the production config (gunicorn.conf.py with
+services.worker.PingMeWorker) on a local port serving benchmarks.serve_app,
+records idle and post-load RSS/USS of the master and every worker, and drives
+the read/write API scenarios from benchmarks.load over real TCP.
+
+    python -m benchmarks.bench_workers                  # 1, 2 and 4 workers
+    python -m benchmarks.bench_workers --workers 1 2 --concurrency 64
+
+Without BENCH_MONGODB_URI each worker has a private mongomock database, which
+is fine for latency and memory but means throughput is bounded by mongomock's
+pure-Python query engine rather than by mongod. The load generator runs on the
+same machine, so on small hosts it competes with the workers for CPU.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.fakes import _free_port
+from benchmarks.load import CRON_SECRET, RESULTS_DIR, SCENARIOS, _git_sha, run_scenario
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _memory(pid: int) -> dict:
+    import psutil
+
+    master = psutil.Process(pid)
+    procs = [master] + master.children()
+
+    def mb(n):
+        return round(n / 2**20, 1)
+
+    workers = [p.memory_full_info() for p in procs[1:]]
+    master_info = master.memory_full_info()
+    return {
+        "masterRssMb": mb(master_info.rss),
+        "workerRssMb": [mb(w.rss) for w in workers],
+        "workerUssMb": [mb(w.uss) for w in workers],
+        # USS is memory unique to a process; summing it avoids counting the
+        # pages workers share with each other more than once
+        "totalUssMb": mb(master_info.uss + sum(w.uss for w in workers)),
+    }
+
+
+def start_server(workers: int, port: int, days: int, ready_dir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(port),
+        "BENCH_DAYS": str(days),
+        "BENCH_READY_DIR": ready_dir,
+        "CRON_SECRET": CRON_SECRET,
+        "LOG_LEVEL": "warning",
+    }
+    if os.getenv("BENCH_MONGODB_URI"):
+        env["MONGODB_URI"] = os.environ["BENCH_MONGODB_URI"]
+        env["MONGODB_DB"] = "pingme_bench"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "benchmarks.serve_app:app"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + 120
+    while len(os.listdir(ready_dir)) < workers:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+        if time.time() > deadline:
+            proc.kill()
+            raise RuntimeError("workers did not become ready")
+        time.sleep(0.1)
+    return proc
+
+
+def stop_server(proc: subprocess.Popen) -> float:
+    """SIGTERM the master and return how long the graceful shutdown took."""
+    started = time.perf_counter()
+    proc.send_signal(signal.SIGTERM)
+    proc.wait(timeout=60)
+    return round(time.perf_counter() - started, 2)
+
+
+async def drive(port: int, concurrency: int, scale: float, only) -> dict:
+    import httpx
+
+    results = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        for name, method, path, body, total, needs_secret in SCENARIOS:
+            # summary_send talks to Telegram/Resend; that path is covered by benchmarks.load
+            if needs_secret or (only and name not in only):
+                continue
+            total = max(1, int(total * scale))
+            await client.request(method, path, json=body)
+            results[name] = await run_scenario(client, method, path, body, total, concurrency, {})
+    return results
+
+
+async def seed_shared(days: int):
+    os.environ["MONGODB_URI"] = os.environ["BENCH_MONGODB_URI"]
+    os.environ["MONGODB_DB"] = "pingme_bench"
+    from benchmarks.load import seed
+    from services.db import get_db
+    return await seed(get_db(), days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply request counts")
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--output", help="results file (default benchmarks/results/workers-<sha>.json)")
+    args = parser.parse_args()
+
+    if os.getenv("BENCH_MONGODB_URI"):
+        print(f"seeded {asyncio.run(seed_shared(args.days))}")
+
+    runs = {}
+    for count in args.workers:
+        with tempfile.TemporaryDirectory() as ready_dir:
+            port = _free_port()
+            proc = start_server(count, port, args.days, ready_dir)
+            try:
+                idle = _memory(proc.pid)
+                results = asyncio.run(drive(port, args.concurrency, args.scale, args.only))
+                loaded = _memory(proc.pid)
+            finally:
+                shutdown = stop_server(proc)
+
+        runs[str(count)] = {"idle": idle, "afterLoad": loaded, "shutdownSeconds": shutdown, "results": results}
+        print(f"\n{count} worker(s): idle USS {idle['totalUssMb']} MB, "
+              f"after load {loaded['totalUssMb']} MB, shutdown {shutdown}s")
+        for name, r in results.items():
+            print(f"  {name:<18} {r['throughputRps']:>8} rps  p50 {r['p50Ms']:>8} ms  "
+                  f"p95 {r['p95Ms']:>8} ms  p99 {r['p99Ms']:>8} ms  errors {r['errors']}")
+
+    report = {
+        "commit": _git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpus": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        "backend": "mongod" if os.getenv("BENCH_MONGODB_URI") else "mongomock",
+        "days": args.days,
+        "concurrency": args.concurrency,
+        "runs": runs,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"workers-{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
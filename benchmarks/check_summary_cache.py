@@ -0,0 +1,89 @@
+"""
+Check that GET /api/summary/ serves the same bytes from `summary_cache` as
+the uncached path builds.
+
+Seeds a few days of data, then compares the served body with
+`dumps(await get_summary(db))`:
+
+- on a cache miss;
+- on the following hit (and that it was a hit, and that If-None-Match gets
+  a 304);
+- after each invalidating write (a note, an agenda item, a toggle, a
+  settings update), that the body changed and is again byte-identical.
+
+Exits non-zero on the first mismatch.
+
+    python -m benchmarks.check_summary_cache
+
+Uses mongomock unless BENCH_MONGODB_URI is set.
+"""
+
+import asyncio
+import os
+
+from benchmarks.fakes import FakeServer
+from benchmarks.load import _setup_environment, _use_in_memory_db, seed
+
+
+async def main_async():
+    fake = FakeServer().start()
+    _setup_environment(fake.url)
+    if not os.getenv("BENCH_MONGODB_URI"):
+        _use_in_memory_db()
+
+    import httpx
+    import main
+    from routers.summary import get_summary
+    from services.cache import summary_cache
+    from services.db import get_db
+    from services.responses import dumps
+
+    db = get_db()
+    await seed(db, 3)
+    await summary_cache.invalidate("default")
+
+    async def check(client, label: str, previous: bytes = None) -> bytes:
+        served = await client.get("/api/summary/")
+        assert served.status_code == 200, f"{label}: status {served.status_code}"
+        expected = dumps(await get_summary(db))
+        assert served.content == expected, f"{label}: cached body differs from get_summary"
+        if previous is not None:
+            assert served.content != previous, f"{label}: body unchanged after an invalidating write"
+        print(f"ok  {label:<22} {len(served.content):>7} bytes")
+        return served.content
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", timeout=60) as client:
+        body = await check(client, "miss")
+
+        hits = summary_cache.stats()["hits"]
+        await check(client, "hit")
+        assert summary_cache.stats()["hits"] == hits + 1, "second read was not a cache hit"
+        etag = (await client.get("/api/summary/")).headers["etag"]
+        revalidated = await client.get("/api/summary/", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304, f"If-None-Match: status {revalidated.status_code}"
+
+        await client.post("/api/notes/", json={"content": "cache check note", "source": "check"})
+        body = await check(client, "after note", body)
+
+        created = await client.post("/api/agenda/", json={"content": "cache check item"})
+        body = await check(client, "after agenda create", body)
+
+        item_id = created.json()["id"]
+        await client.patch(f"/api/agenda/{item_id}", json={"completed": True})
+        body = await check(client, "after agenda toggle", body)
+
+        # Settings don't appear in the body, so only check it still matches
+        await client.post("/api/settings/", json={"intervalMinutes": 30})
+        await check(client, "after settings")
+
+    fake.stop()
+
+
+def main():
+    asyncio.run(main_async())
+    print("cached and uncached summaries are byte-identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Local stand-ins for the external services PingMe calls.
+
+`FakeServer` runs a tiny Starlette app on localhost that answers the Telegram
+Bot API methods PingMe uses (sendMessage, getMe, answerCallbackQuery,
+editMessageText) and Resend's /emails with a configurable delay; point
+TELEGRAM_API_URL / RESEND_API_URL at it. Sent Telegram texts are kept in
+`messages`. `FakeGeminiModel` replaces
+`genai.GenerativeModel` in-process.
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from urllib.parse import parse_qsl
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class FakeServer:
+    def __init__(self, delay_ms: float = 20):
+        self.delay = delay_ms / 1000
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.calls = {"telegram": 0, "resend": 0}
+        self.messages = []
+
+        app = Starlette(routes=[
+            Route("/bot{token}/{method}", self._telegram, methods=["POST"]),
+            Route("/emails", self._resend, methods=["POST"]),
+        ])
+        config = uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    async def _telegram(self, request: Request):
+        method = request.path_params["method"]
+        body = await request.body()
+        params = {}
+        if body:
+            if request.headers.get("content-type", "").startswith("application/json"):
+                params = await request.json()
+            else:
+                params = dict(parse_qsl(body.decode()))
+        await asyncio.sleep(self.delay)
+        self.calls["telegram"] += 1
+
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "PingMe", "username": "pingme_fake_bot"}
+        elif method in ("sendMessage", "editMessageText"):
+            self.messages.append(params.get("text"))
+            result = {
+                "message_id": self.calls["telegram"],
+                "date": int(time.time()),
+                "chat": {"id": int(params.get("chat_id") or 1), "type": "private"},
+                "text": params.get("text"),
+            }
+        else:
+            result = True
+        return JSONResponse({"ok": True, "result": result})
+
+    async def _resend(self, request: Request):
+        await request.body()
+        await asyncio.sleep(self.delay)
+        self.calls["resend"] += 1
+        return JSONResponse({"id": f"fake-{self.calls['resend']}"})
+
+    def start(self):
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError("fake server did not start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+
+class _FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Drop-in for genai.GenerativeModel with a fixed latency."""
+
+    delay = 0.2
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    async def generate_content_async(self, prompt: str):
+        await asyncio.sleep(self.delay)
+        return _FakeResponse(f"A focused day ({len(prompt)} prompt chars).")
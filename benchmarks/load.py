@@ -0,0 +1,256 @@
+"""
+End-to-end load test for the PingMe API.
+
+Boots main.py's `app` in-process against either a real mongod
+(BENCH_MONGODB_URI) or an in-memory mongomock stand-in, points Telegram and
+Resend at a local FakeServer and swaps Gemini for FakeGeminiModel, seeds a
+year of data (96 pings/day × 365 days by default), then drives each
+endpoint with an async load generator and records throughput and latency.
+
+Results are written as JSON so runs can be compared between commits:
+
+    python -m benchmarks.load                       # writes benchmarks/results/<sha>.json
+    python -m benchmarks.load --compare benchmarks/results/abc123.json
+
+Extra dependencies: see benchmarks/requirements.txt.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+CRON_SECRET = "bench-secret"
+
+# (name, method, path, body, requests, needs secret)
+SCENARIOS = [
+    ("ping_respond", "POST", "/api/ping/respond/", {"response": "coding the api", "source": "bench"}, 400, False),
+    ("ping_status", "GET", "/api/ping/status/", None, 400, False),
+    ("agenda", "GET", "/api/agenda/", None, 400, False),
+    ("summary", "GET", "/api/summary/", None, 400, False),
+    ("analytics_hourly", "GET", "/api/analytics/hourly", None, 40, False),
+    # force: every request is a full run, not "already sent today"
+    ("summary_send", "POST", "/api/summary/send?force=true", None, 5, True),
+]
+
+
+def _git_sha() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _setup_environment(fake_url: str):
+    """Must run before main.py (and the services it imports) is imported."""
+    os.environ["CRON_SECRET"] = CRON_SECRET
+    # Every simulated client shares one address; measure the app, not the limiter
+    os.environ.setdefault("ADMISSION_CONTROL", "false")
+    os.environ["TELEGRAM_API_URL"] = fake_url
+    os.environ["RESEND_API_URL"] = fake_url
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "bench")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if os.getenv("BENCH_MONGODB_URI"):
+        os.environ["MONGODB_URI"] = os.environ["BENCH_MONGODB_URI"]
+        os.environ["MONGODB_DB"] = "pingme_bench"
+
+
+def _use_in_memory_db():
+    try:
+        import mongomock_motor
+    except ImportError:
+        sys.exit("Set BENCH_MONGODB_URI or `pip install -r benchmarks/requirements.txt`")
+    _patch_mongomock_bulk()
+    from services.db import database
+    database.use_client(mongomock_motor.AsyncMongoMockClient())
+
+
+def _patch_mongomock_bulk():
+    """pymongo >= 4.11 passes sort= from UpdateOne/ReplaceOne into the bulk
+    builder, which mongomock's doesn't accept yet; drop it (it's always None
+    for the operations PingMe builds)."""
+    import inspect
+    from mongomock.collection import BulkOperationBuilder
+
+    for name in ("add_update", "add_replace"):
+        method = getattr(BulkOperationBuilder, name)
+        if "sort" in inspect.signature(method).parameters:
+            continue
+
+        def without_sort(self, *args, _method=method, sort=None, **kwargs):
+            return _method(self, *args, **kwargs)
+
+        setattr(BulkOperationBuilder, name, without_sort)
+
+
+async def seed(db, days: int):
+    from benchmarks.synthetic import make_logs
+    from services.days import DEFAULT_TIMEZONE, local_date
+
+    for name in ("logs", "logs_archive", "notes", "agenda", "settings", "daily_snapshots", "sessions", "jobs"):
+        await db[name].delete_many({})
+
+    now = datetime.now(timezone.utc)
+    date = local_date(DEFAULT_TIMEZONE, now)
+    logs = make_logs(days=days + 1)
+    history = [l for l in logs if l["localDate"] < date]
+    today = [l for l in logs if l["localDate"] >= date]
+    for i in range(0, len(history), 5000):
+        await db.logs_archive.insert_many(history[i:i + 5000])
+    if today:
+        await db.logs.insert_many(today)
+
+    await db.notes.insert_many([
+        {
+            "content": f"note {i}", "source": "bench", "timestamp": now - timedelta(minutes=i),
+            "localDate": local_date(DEFAULT_TIMEZONE, now - timedelta(minutes=i)),
+        }
+        for i in range(20)
+    ])
+    await db.agenda.insert_many([
+        {
+            "content": f"task {i}", "date": date, "completed": i % 3 == 0, "completedAt": None,
+            "createdAt": now, "carriedFrom": None, "source": "bench",
+        }
+        for i in range(15)
+    ])
+    from services.settings import DEFAULT_SETTINGS
+    await db.settings.insert_one({**DEFAULT_SETTINGS, "pendingPing": True, "pendingPingAt": now})
+    return {"archivedLogs": len(history), "todayLogs": len(today)}
+
+
+async def run_scenario(client, method, path, body, total, concurrency, headers):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            resp = await client.request(method, path, json=body, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if resp.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughputRps": round(total / elapsed, 1),
+        "meanMs": round(statistics.fmean(latencies), 3),
+        "p50Ms": pct(0.50),
+        "p95Ms": pct(0.95),
+        "p99Ms": pct(0.99),
+        "maxMs": round(latencies[-1], 3),
+    }
+
+
+async def main_async(args):
+    from benchmarks.fakes import FakeServer, FakeGeminiModel
+
+    fake = FakeServer(delay_ms=args.fake_delay_ms).start()
+    _setup_environment(fake.url)
+    if not os.getenv("BENCH_MONGODB_URI"):
+        _use_in_memory_db()
+
+    import httpx
+    import main
+    import services.ai as ai
+    from services.db import get_db
+
+    FakeGeminiModel.delay = args.fake_delay_ms * 10 / 1000
+    ai.get_genai().GenerativeModel = FakeGeminiModel
+
+    db = get_db()
+    seeded = await seed(db, args.days)
+    print(f"seeded {seeded}")
+
+    results = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        for name, method, path, body, total, needs_secret in SCENARIOS:
+            if args.only and name not in args.only:
+                continue
+            headers = {"x-cron-secret": CRON_SECRET} if needs_secret else {}
+            concurrency = 1 if needs_secret else args.concurrency
+            total = max(1, int(total * args.scale))
+            # Warm up caches and connection pools before measuring
+            await client.request(method, path, json=body, headers=headers)
+            results[name] = await run_scenario(client, method, path, body, total, concurrency, headers)
+            r = results[name]
+            print(f"{name:<18} {r['throughputRps']:>8} rps  p50 {r['p50Ms']:>8} ms  "
+                  f"p95 {r['p95Ms']:>8} ms  p99 {r['p99Ms']:>8} ms  errors {r['errors']}")
+
+    fake.stop()
+    return {
+        "commit": _git_sha(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "backend": "mongod" if os.getenv("BENCH_MONGODB_URI") else "mongomock",
+        "days": args.days,
+        "seeded": seeded,
+        "fakeDelayMs": args.fake_delay_ms,
+        "results": results,
+    }
+
+
+def compare(old: dict, new: dict):
+    print(f"\n{'scenario':<18} {'p50 old':>10} {'p50 new':>10} {'Δ%':>8} {'rps old':>10} {'rps new':>10}")
+    for name, r in new["results"].items():
+        o = old.get("results", {}).get(name)
+        if not o:
+            continue
+        delta = (r["p50Ms"] - o["p50Ms"]) / o["p50Ms"] * 100 if o["p50Ms"] else 0
+        print(f"{name:<18} {o['p50Ms']:>10} {r['p50Ms']:>10} {delta:>7.1f}% "
+              f"{o['throughputRps']:>10} {r['throughputRps']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply request counts")
+    parser.add_argument("--fake-delay-ms", type=float, default=20)
+    parser.add_argument("--only", nargs="*", help="scenario names to run")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<sha>.json)")
+    parser.add_argument("--compare", help="previous results file to diff against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+main.app wrapped for benchmarks.bench_workers.
+
+Without BENCH_MONGODB_URI every gunicorn worker gets its own mongomock
+database, seeded with BENCH_DAYS of data during startup; with it, workers share
+the real database that bench_workers seeded once up front. Each worker drops a
+file named after its pid into BENCH_READY_DIR once it can take traffic.
+"""
+
+import os
+from contextlib import asynccontextmanager
+
+from benchmarks.load import _use_in_memory_db, seed
+
+import main
+from services.db import get_db
+
+IN_MEMORY = not os.getenv("BENCH_MONGODB_URI")
+
+if IN_MEMORY:
+    _use_in_memory_db()
+
+_inner_lifespan = main.app.router.lifespan_context
+
+
+@asynccontextmanager
+async def _bench_lifespan(app):
+    async with _inner_lifespan(app):
+        if IN_MEMORY:
+            await seed(get_db(), int(os.getenv("BENCH_DAYS", "30")))
+        ready_dir = os.getenv("BENCH_READY_DIR")
+        if ready_dir:
+            open(os.path.join(ready_dir, str(os.getpid())), "w").close()
+        yield
+
+
+main.app.router.lifespan_context = _bench_lifespan
+app = main.app
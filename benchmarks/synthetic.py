@@ -0,0 +1,103 @@
+"""
+Synthetic PingMe data shared by the benchmark scripts.
+"""
+
+import random
+from datetime import datetime, timezone, timedelta
+
+from services.analytics import CATEGORIES
+from services.days import DEFAULT_TIMEZONE, local_date
+
+ACTIVITIES = {
+    "deep_work": ["coding the api", "reading a paper", "writing docs", "debugging tests"],
+    "break": ["coffee", "lunch", "walk outside"],
+    "meetings": ["standup call", "sync with team"],
+    "admin": ["email triage", "planning tomorrow"],
+    "distracted": ["youtube", "scrolling twitter"],
+    "untracked": [None],
+}
+
+
+def make_logs(days: int = 365, interval_minutes: int = 15, seed: int = 7) -> list:
+    """One ping every `interval_minutes` for `days` days, newest last."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+    weights = [40, 12, 10, 15, 13, 10]
+    logs = []
+    cat = "deep_work"
+    for i in range(days * 24 * 60 // interval_minutes):
+        # Sticky categories so sessions and streaks look realistic
+        if rng.random() < 0.35:
+            cat = rng.choices(CATEGORIES, weights)[0]
+        response = rng.choice(ACTIVITIES[cat])
+        timestamp = start + timedelta(minutes=i * interval_minutes, seconds=rng.randint(0, 90))
+        logs.append({
+            "timestamp": timestamp,
+            "localDate": local_date(DEFAULT_TIMEZONE, timestamp),
+            "response": response,
+            "source": "desktop",
+            "skipped": False,
+            "untracked": cat == "untracked",
+            "category": cat,
+            "categorySource": "keyword" if response else "system",
+        })
+    return logs
+
+
+# Topic words for notes and agenda items, drawn Zipf-style so a few are very
+# common (the worst case for search) and most are rare
+VOCABULARY = (
+    "api paper rag retrieval embeddings index mongo query latency cache deploy docker "
+    "gunicorn worker telegram bot webhook dashboard extension chrome popup agenda note "
+    "summary weekly insight gemini prompt budget token focus session streak heatmap "
+    "timezone schedule pause quiet window meeting standup review design refactor test "
+    "benchmark profile memory cpu bug fix release migration schema backup invoice tax "
+    "groceries gym run doctor dentist flight hotel birthday gift book podcast course "
+    "lecture exam thesis draft email reply call mom dad sister friend dinner lunch coffee"
+).split()
+TEMPLATES = ["{} {}", "look into {} {}", "{} idea: {} {}", "finish {} for {}", "{} {} {} notes", "remember {} before {}"]
+
+
+def _phrase(rng: random.Random) -> str:
+    template = rng.choice(TEMPLATES)
+    ranks = range(1, len(VOCABULARY) + 1)
+    weights = [1 / r for r in ranks]
+    words = rng.choices(VOCABULARY, weights, k=template.count("{}"))
+    return template.format(*words)
+
+
+def make_notes(days: int = 365, per_day: int = 4, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    notes = []
+    for d in range(days):
+        for _ in range(per_day):
+            timestamp = start + timedelta(days=d, minutes=rng.randint(0, 720))
+            notes.append({
+                "content": _phrase(rng),
+                "source": "desktop",
+                "timestamp": timestamp,
+                "localDate": local_date(DEFAULT_TIMEZONE, timestamp),
+            })
+    return notes
+
+
+def make_agenda(days: int = 365, per_day: int = 5, seed: int = 13) -> list:
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc).replace(hour=8, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    items = []
+    for d in range(days):
+        created = start + timedelta(days=d)
+        for i in range(per_day):
+            done = rng.random() < 0.7
+            items.append({
+                "content": _phrase(rng),
+                "date": created.strftime("%Y-%m-%d"),
+                "completed": done,
+                "completedAt": created + timedelta(hours=6) if done else None,
+                "createdAt": created,
+                "position": int(created.timestamp() * 1000) + i,
+                "carriedFrom": None,
+                "source": "desktop",
+            })
+    return items
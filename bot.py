@@ -1,9 +1,18 @@
 import os
+import sys
+import html
+import re
 import asyncio
 import httpx
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes, ConversationHandler
 from dotenv import load_dotenv
+from services import agenda as agenda_service, notes as notes_service
+from services import ping as ping_service, search as search_service, settings as settings_service
+from services.db import database, get_db
+from services.http import get_http_client, close_http_client
+from services.models import AgendaBulkCreateIn, AgendaBulkToggleIn, AgendaChange, NoteIn, PingResponseIn, SettingsUpdate
 
 load_dotenv()
 
@@ -11,24 +20,138 @@ TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 running_in_docker = os.getenv("RUNNING_IN_DOCKER", "false").lower() == "true"
 APP_URL = "http://api:8000" if running_in_docker else os.getenv("APP_URL", "http://localhost:8000")
 CRON_SECRET = os.getenv("CRON_SECRET")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+# Public base URL of the API; Telegram delivers updates to WEBHOOK_URL + WEBHOOK_PATH
+WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL")
+WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+WEBHOOK_PATH = "/api/telegram/webhook"
 
 # States for conversation handler
 ADD_ITEM = 1
 
 async def api_request(method, endpoint, **kwargs):
     """Universal wrapper for API calls with logging and error handling."""
-    async with httpx.AsyncClient(follow_redirects=True) as client:
+    # Shared pooled client: keeps the connection to the API open between commands
+    client = get_http_client()
+    try:
+        url = f"{APP_URL}{endpoint}"
+        response = await client.request(method, url, timeout=10.0, follow_redirects=True, **kwargs)
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        print(f"API Error ({e.response.status_code}): {e.response.text}")
+        return None
+    except Exception as e:
+        print(f"Connection Error: {e}")
+        return None
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+# Every handler goes through `backend`. Both return None on failure so the
+# handlers don't care which one is in use.
+
+class RemoteBackend:
+    """Calls the PingMe API over HTTP; used when the bot runs in its own process."""
+
+    async def agenda(self):
+        return await api_request("GET", "/api/agenda/")
+
+    # The batch endpoints answer with the day's fresh list; return just that
+    async def add_agenda_items(self, text):
+        result = await api_request("POST", "/api/agenda/bulk", json={"text": text, "source": "telegram"})
+        return result["items"] if result else None
+
+    async def set_agenda_items(self, changes):
+        items = [{"id": item_id, "completed": completed} for item_id, completed in changes]
+        result = await api_request("PATCH", "/api/agenda/bulk", json={"items": items})
+        return result["items"] if result else None
+
+    async def delete_agenda_items(self, ids):
+        result = await api_request("POST", "/api/agenda/bulk/delete", json={"ids": ids})
+        return result["items"] if result else None
+
+    async def update_settings(self, **fields):
+        return await api_request("POST", "/api/settings/", json=fields)
+
+    async def add_note(self, content):
+        return await api_request("POST", "/api/notes/", json={"content": content, "source": "telegram"})
+
+    async def send_summary(self):
+        return await api_request("POST", "/api/summary/send", headers={"x-cron-secret": CRON_SECRET})
+
+    async def ping_status(self):
+        return await api_request("GET", "/api/ping/status/")
+
+    async def respond_to_ping(self, text):
+        return await api_request("POST", "/api/ping/respond/", json={"response": text, "source": "telegram"})
+
+    async def search(self, q, limit):
+        return await api_request("GET", "/api/search/", params={"q": q, "limit": limit})
+
+
+class EmbeddedBackend:
+    """Calls the service layer directly on this process's Mongo pool: no HTTP
+    round trip and no JSON encode/decode. Used in webhook mode, and by the
+    polling bot when BOT_MODE=embedded."""
+
+    @staticmethod
+    async def _run(coro, result=True):
         try:
-            url = f"{APP_URL}{endpoint}"
-            response = await client.request(method, url, timeout=10.0, **kwargs)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            print(f"API Error ({e.response.status_code}): {e.response.text}")
-            return None
+            value = await coro
         except Exception as e:
-            print(f"Connection Error: {e}")
+            print(f"Service Error: {e!r}")
             return None
+        return value if result is None else result
+
+    async def agenda(self):
+        return await self._run(agenda_service.list_items(get_db()), result=None)
+
+    async def add_agenda_items(self, text):
+        data = AgendaBulkCreateIn(text=text, source="telegram")
+        result = await self._run(agenda_service.create_items(get_db(), data), result=None)
+        return result[1] if result else None
+
+    async def set_agenda_items(self, changes):
+        items = [AgendaChange(id=item_id, completed=completed) for item_id, completed in changes]
+        data = AgendaBulkToggleIn(items=items)
+        return await self._run(agenda_service.set_completed_many(get_db(), data), result=None)
+
+    async def delete_agenda_items(self, ids):
+        return await self._run(agenda_service.delete_items(get_db(), ids), result=None)
+
+    async def update_settings(self, **fields):
+        try:
+            data = SettingsUpdate(**fields)
+        except ValueError as e:
+            print(f"Validation Error: {e}")
+            return None
+        return await self._run(settings_service.update_settings(get_db(), data))
+
+    async def add_note(self, content):
+        data = NoteIn(content=content, source="telegram")
+        return await self._run(notes_service.create_note(get_db(), data))
+
+    async def send_summary(self):
+        # Summary building pulls in the AI/email stack; only load it when asked
+        from routers.summary import send_summary
+        return await self._run(send_summary(x_cron_secret=CRON_SECRET, db=get_db()), result=None)
+
+    async def ping_status(self):
+        return await self._run(ping_service.status(get_db()), result=None)
+
+    async def respond_to_ping(self, text):
+        data = PingResponseIn(response=text, source="telegram")
+        return await self._run(ping_service.respond(get_db(), data))
+
+    async def search(self, q, limit):
+        return await self._run(search_service.search(get_db(), q, limit=limit), result=None)
+
+
+BOT_MODE = os.getenv("BOT_MODE", "remote").lower()
+backend = EmbeddedBackend() if BOT_MODE == "embedded" else RemoteBackend()
+
+def use_backend(new_backend):
+    global backend
+    backend = new_backend
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(
@@ -39,54 +162,89 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/pause - Pause pings (e.g. /pause 2h)\n"
         "/resume - Resume pings\n"
         "/note - Save a quick thought\n"
+        "/search - Find past notes, answers and tasks\n"
         "/summary - See today's report"
     )
 
+def agenda_view(items):
+    """Message text and keyboard for the agenda: one tap-to-toggle button per
+    item, so several can be ticked off in a row without re-running /agenda."""
+    if not items:
+        return "Your agenda is empty.", InlineKeyboardMarkup([[InlineKeyboardButton("➕ Add items", callback_data="add")]])
+
+    text = "<b>📋 Today's Agenda</b>\n\n"
+    keyboard = []
+    for i in items:
+        status = "✅" if i["completed"] else "☐"
+        text += f"{status} {html.escape(i['content'])}\n"
+        # t1_ marks done, t0_ undoes; the target state rides in the callback
+        # so a tap needs no lookup
+        action = "t0" if i["completed"] else "t1"
+        keyboard.append([InlineKeyboardButton(f"{status} {i['content'][:30]}", callback_data=f"{action}_{i['_id']}")])
+
+    footer = [InlineKeyboardButton("➕ Add items", callback_data="add")]
+    if any(i["completed"] for i in items):
+        footer.append(InlineKeyboardButton("🧹 Clear done", callback_data="clear"))
+    keyboard.append(footer)
+    return text, InlineKeyboardMarkup(keyboard)
+
 async def agenda_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    items = await api_request("GET", "/api/agenda")
+    items = await backend.agenda()
     
     if items is None:
         await update.message.reply_text("❌ Could not reach the PingMe API.")
         return
 
-    if not items:
-        await update.message.reply_text("Your agenda is empty.", reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("➕ Add item", callback_data="add")]]))
-        return
+    text, markup = agenda_view(items)
+    await update.message.reply_html(text, reply_markup=markup)
 
-    keyboard = []
-    text = "<b>📋 Today's Agenda</b>\n\n"
-    for i in items:
-        status = "✅" if i["completed"] else "☐"
-        text += f"{status} {i['content']}\n"
-        if not i["completed"]:
-            keyboard.append([InlineKeyboardButton(f"✅ Done: {i['content'][:20]}...", callback_data=f"done_{i['_id']}")])
-            
-    keyboard.append([InlineKeyboardButton("➕ Add item", callback_data="add")])
-    await update.message.reply_html(text, reply_markup=InlineKeyboardMarkup(keyboard))
+async def _redraw(query, items):
+    text, markup = agenda_view(items)
+    try:
+        await query.edit_message_text(text, parse_mode="HTML", reply_markup=markup)
+    except BadRequest as e:
+        # A double tap leaves the list unchanged, which Telegram rejects
+        if "not modified" not in str(e):
+            raise
 
 async def handle_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     
-    if query.data.startswith("done_"):
-        item_id = query.data.split("_")[1]
-        success = await api_request("PATCH", f"/api/agenda/{item_id}", json={"completed": True})
-        if success:
-            await query.edit_message_text("Marked as done! Refresh /agenda to see changes.")
-        else:
+    action, _, item_id = query.data.partition("_")
+    if action in ("t1", "t0", "done"):
+        # "done_" comes from agenda messages sent before tap-to-toggle
+        items = await backend.set_agenda_items([(item_id, action != "t0")])
+        if items is None:
             await query.edit_message_text("❌ Failed to update item.")
-        
+            return
+        await _redraw(query, items)
+
+    elif query.data == "clear":
+        # The completed ids are already on the keyboard being tapped
+        done_ids = [
+            button.callback_data.partition("_")[2]
+            for row in query.message.reply_markup.inline_keyboard
+            for button in row
+            if button.callback_data and button.callback_data.startswith("t0_")
+        ]
+        items = await backend.delete_agenda_items(done_ids) if done_ids else await backend.agenda()
+        if items is None:
+            await query.edit_message_text("❌ Failed to clear items.")
+            return
+        await _redraw(query, items)
+
     elif query.data == "add":
-        await query.message.reply_text("What do you want to add to your agenda?")
+        await query.message.reply_text("What do you want to add to your agenda? One item per line.")
         return ADD_ITEM
 
 async def add_item_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    content = update.message.text
-    success = await api_request("POST", "/api/agenda", json={"content": content, "source": "telegram"})
-    if success:
-        await update.message.reply_text(f"Added: {content} ✅")
+    items = await backend.add_agenda_items(update.message.text)
+    if items is None:
+        await update.message.reply_text("❌ Failed to add items.")
     else:
-        await update.message.reply_text("❌ Failed to add item.")
+        text, markup = agenda_view(items)
+        await update.message.reply_html(text, reply_markup=markup)
     return ConversationHandler.END
 
 async def pause_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -104,8 +262,8 @@ async def pause_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Invalid duration. Use '2h' or '30m'.")
         return
 
-    # Post to settings - the server handles the pause logic/timestamp via pauseDurationMinutes
-    success = await api_request("POST", "/api/settings", json={"isPaused": True, "pauseDurationMinutes": minutes})
+    # The server handles the pause logic/timestamp via pauseDurationMinutes
+    success = await backend.update_settings(isPaused=True, pauseDurationMinutes=minutes)
     
     if success:
         await update.message.reply_text(f"🔕 Pings paused for {duration}.")
@@ -113,7 +271,7 @@ async def pause_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Failed to update settings.")
 
 async def resume_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    success = await api_request("POST", "/api/settings", json={"isPaused": False, "pauseUntil": None})
+    success = await backend.update_settings(isPaused=False, pauseUntil=None)
     if success:
         await update.message.reply_text("🔔 Pings resumed!")
     else:
@@ -125,28 +283,67 @@ async def note_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Usage: /note [your thought]")
         return
         
-    success = await api_request("POST", "/api/notes", json={"content": content, "source": "telegram"})
+    success = await backend.add_note(content)
     if success:
         await update.message.reply_text("Note saved 📝")
     else:
         await update.message.reply_text("❌ Failed to save note.")
 
+SEARCH_ICONS = {"note": "📝", "log": "⏱", "agenda": "📋"}
+
+def _highlight(text, words):
+    """Escape `text` for HTML and bold the matched words."""
+    text = text if len(text) <= 120 else text[:117] + "..."
+    if not words:
+        return html.escape(text)
+    pattern = re.compile(r"\b(" + "|".join(re.escape(w) for w in words) + r")\b", re.IGNORECASE)
+    # Match on the raw text and escape piece by piece, so a search for "amp"
+    # can't land inside an entity; odd pieces are the matches
+    pieces = pattern.split(text)
+    return "".join(
+        f"<b>{html.escape(piece)}</b>" if i % 2 else html.escape(piece)
+        for i, piece in enumerate(pieces)
+    )
+
+async def search_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    q = " ".join(context.args)
+    if not q:
+        await update.message.reply_text("Usage: /search [words], e.g. /search rag paper")
+        return
+
+    found = await backend.search(q, 8)
+    if found is None:
+        await update.message.reply_text("❌ Search failed.")
+        return
+    if not found["results"]:
+        await update.message.reply_text(f"No matches for “{q}”.")
+        return
+
+    text = f"<b>🔎 {html.escape(q)}</b>\n\n"
+    for r in found["results"]:
+        text += f"{SEARCH_ICONS.get(r['kind'], '•')} <i>{r['date']}</i> {_highlight(r['text'], r['matched'])}\n"
+    await update.message.reply_html(text)
+
 async def summary_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("Generating and sending your daily summary... 📊")
     
-    success = await api_request("POST", "/api/summary/send", headers={"x-cron-secret": CRON_SECRET})
+    result = await backend.send_summary()
     
-    if success:
+    if result and result.get("alreadySent"):
+        await update.message.reply_text("Today's summary has already been sent. ✅")
+    elif result and result.get("reason") == "in_progress":
+        await update.message.reply_text("A summary is already being generated; it'll arrive shortly. ⏳")
+    elif result and result.get("sent"):
         await update.message.reply_text("Summary sent to your email and Telegram! ✅")
     else:
         await update.message.reply_text("❌ Failed to send summary. Check server logs.")
 
 async def handle_ping_response(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text
-    status = await api_request("GET", "/api/ping/status")
+    status = await backend.ping_status()
     
     if status and status.get("pending"):
-        success = await api_request("POST", "/api/ping/respond", json={"response": text, "source": "telegram"})
+        success = await backend.respond_to_ping(text)
         if success:
             await update.message.reply_text("Got it! ✅")
         else:
@@ -154,13 +351,29 @@ async def handle_ping_response(update: Update, context: ContextTypes.DEFAULT_TYP
     else:
         await update.message.reply_text("No pending ping. Use /note if you want to save this as a note.")
 
-def main():
-    if not TOKEN:
-        print("Error: TELEGRAM_BOT_TOKEN not found in .env")
-        return
+async def _post_init(application):
+    if isinstance(backend, EmbeddedBackend):
+        await database.connect(warm=1)
+
+async def _post_shutdown(application):
+    await close_http_client()
+    await database.close()
+
+def build_application(updater=True):
+    """The bot with all handlers registered.
+
+    Polling mode uses the default updater; webhook mode passes updater=False
+    and feeds updates in through Application.process_update.
+    """
+    builder = Application.builder().token(TOKEN).base_url(f"{TELEGRAM_API_URL}/bot")
+    if not updater:
+        builder = builder.updater(None)
+    else:
+        # A standalone bot owns its HTTP client and Mongo pool; in webhook
+        # mode the API lifespan does
+        builder = builder.post_init(_post_init).post_shutdown(_post_shutdown)
+    application = builder.build()
 
-    application = Application.builder().token(TOKEN).build()
-    
     conv_handler = ConversationHandler(
         entry_points=[CallbackQueryHandler(handle_callback, pattern="^add$")],
         states={
@@ -174,12 +387,47 @@ def main():
     application.add_handler(CommandHandler("pause", pause_cmd))
     application.add_handler(CommandHandler("resume", resume_cmd))
     application.add_handler(CommandHandler("note", note_cmd))
+    application.add_handler(CommandHandler("search", search_cmd))
     application.add_handler(CommandHandler("summary", summary_cmd))
     application.add_handler(conv_handler)
     application.add_handler(CallbackQueryHandler(handle_callback))
     application.add_handler(MessageHandler(filters.TEXT & (~filters.COMMAND), handle_ping_response))
-    
-    print("Bot is starting...")
+    return application
+
+async def set_webhook():
+    application = build_application(updater=False)
+    async with application:
+        await application.bot.set_webhook(
+            url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES,
+        )
+    print(f"Webhook set to {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+
+async def delete_webhook():
+    application = build_application(updater=False)
+    async with application:
+        await application.bot.delete_webhook()
+    print("Webhook removed; polling mode can be used again")
+
+def main():
+    if not TOKEN:
+        print("Error: TELEGRAM_BOT_TOKEN not found in .env")
+        return
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "poll"
+    if command == "set-webhook":
+        if not WEBHOOK_URL or not WEBHOOK_SECRET:
+            print("Error: TELEGRAM_WEBHOOK_URL and TELEGRAM_WEBHOOK_SECRET must be set")
+            return
+        asyncio.run(set_webhook())
+        return
+    if command == "delete-webhook":
+        asyncio.run(delete_webhook())
+        return
+
+    application = build_application()
+    print(f"Bot is starting ({BOT_MODE} mode)...")
     application.run_polling()
 
 if __name__ == "__main__":
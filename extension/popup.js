@@ -126,14 +126,39 @@ function toggleAgenda() {
 
 async function fetchAgenda() {
     try {
-        const resp = await fetch(`${API_URL}/api/agenda/`);
-        const items = await resp.json();
-        renderAgenda(items);
+        await cachedGet('/api/agenda/', renderAgenda);
     } catch (e) {
-        agendaList.innerHTML = '<li>Error loading agenda</li>';
+        // Keep showing the cached list if there is one
+        if (!agendaList.children.length) agendaList.innerHTML = '<li>Error loading agenda</li>';
     }
 }
 
+// Response cache: the last body of each GET is kept in chrome.storage with its
+// ETag. It is drawn straight away, then revalidated with If-None-Match, so an
+// unchanged list costs the server a 304 and no list read.
+function cacheKey(path) {
+    return `cache:${API_URL}${path}`;
+}
+
+function storeCached(path, body, etag = null) {
+    // Without an ETag (a write's response) the next open fetches in full
+    return chrome.storage.local.set({ [cacheKey(path)]: { etag, body } });
+}
+
+async function cachedGet(path, render) {
+    const key = cacheKey(path);
+    const cached = (await chrome.storage.local.get(key))[key];
+    if (cached) render(cached.body);
+
+    const headers = cached && cached.etag ? { 'If-None-Match': cached.etag } : {};
+    const resp = await fetch(`${API_URL}${path}`, { headers, cache: 'no-store' });
+    if (resp.status === 304) return;
+    if (!resp.ok) throw new Error(`GET ${path}: ${resp.status}`);
+    const body = await resp.json();
+    await storeCached(path, body, resp.headers.get('ETag'));
+    render(body);
+}
+
 function renderAgenda(items) {
     agendaList.innerHTML = '';
     items.forEach(item => {
@@ -148,25 +173,33 @@ function renderAgenda(items) {
     });
 }
 
+// The batch endpoints answer with the fresh list, so render straight from
+// the response instead of fetching the agenda again
+function showAgenda(items) {
+    renderAgenda(items);
+    storeCached('/api/agenda/', items);
+}
+
 async function toggleAgendaItem(id, completed) {
-    await fetch(`${API_URL}/api/agenda/${id}`, {
+    const resp = await fetch(`${API_URL}/api/agenda/bulk`, {
         method: 'PATCH',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ completed })
+        body: JSON.stringify({ items: [{ id, completed }] })
     });
+    if (resp.ok) showAgenda((await resp.json()).items);
 }
 
 async function addAgendaItem() {
-    const content = newAgendaInput.value.trim();
-    if (!content) return;
-    const resp = await fetch(`${API_URL}/api/agenda/`, {
+    const text = newAgendaInput.value.trim();
+    if (!text) return;
+    const resp = await fetch(`${API_URL}/api/agenda/bulk`, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ content, source: 'extension' })
+        body: JSON.stringify({ text, source: 'extension' })
     });
     if (resp.ok) {
         newAgendaInput.value = '';
-        fetchAgenda();
+        showAgenda((await resp.json()).items);
     }
 }
 
@@ -0,0 +1,59 @@
+"""
+Production serving config: `gunicorn -c gunicorn.conf.py main:app`.
+
+Env:
+  PORT              listen port (default 8000)
+  WEB_CONCURRENCY   worker processes (default: one per CPU available to us;
+                    always 1 in Telegram webhook mode)
+  SUMMARY_CACHE     the summary cache is per-process and only the worker that
+                    handled a write invalidates it, so it is switched off when
+                    running more than one worker unless set explicitly
+"""
+
+import os
+
+from services.worker import REQUEST_DRAIN_SECONDS
+
+
+def _cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# Async workers each run their own event loop, so one per core is enough;
+# more just adds memory and Mongo connections without adding throughput
+workers = int(os.getenv("WEB_CONCURRENCY", _cpu_count()))
+# In webhook mode (routers/webhook.py) the bot's conversation state lives in
+# the worker that handled the update, and the next message may reach another
+_requested_workers = workers
+if os.getenv("TELEGRAM_WEBHOOK_SECRET"):
+    workers = 1
+worker_class = "services.worker.PingMeWorker"
+
+# In-flight requests get REQUEST_DRAIN_SECONDS, then the lifespan drains
+# background sends (services.background) with whatever is left
+graceful_timeout = REQUEST_DRAIN_SECONDS + 15
+timeout = 60
+keepalive = 5
+
+accesslog = None
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+if workers > 1:
+    os.environ.setdefault("SUMMARY_CACHE", "false")
+
+
+def on_starting(server):
+    if workers != _requested_workers:
+        server.log.warning(
+            "telegram webhook mode: running 1 worker instead of %d to keep bot conversation state",
+            _requested_workers,
+        )
+    server.log.info(
+        "starting %d worker(s), summary cache %s",
+        workers, os.getenv("SUMMARY_CACHE", "true"),
+    )
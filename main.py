@@ -1,14 +1,69 @@
 import os
-from fastapi import FastAPI, Request
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from routers import settings, ping, agenda, notes, summary, weekly
+from routers import settings, ping, agenda, notes, search, summary, weekly, analytics, admin, health, webhook
+from services.admission import AdmissionMiddleware
+from services.metrics import MetricsMiddleware, registry
+from services.profiler import ProfilerMiddleware
+from services.db import database, get_db
+from services.http import get_http_client, close_http_client
+from services.background import drain, spawn
+from services.diagnostics import ensure_indexes
+from services.log import get_logger
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI(title="PingMe API")
+# Pay the slow first-use costs (Gemini SDK and NumPy imports) during startup
+# instead of on the first request that needs them
+PREWARM = os.getenv("PREWARM", "false").lower() == "true"
+
+logger = get_logger(__name__)
+
+
+async def _init_http():
+    get_http_client()
+
+
+def _import_heavy_modules():
+    from services.ai import get_genai
+    from services import analytics  # noqa: F401  (pulls in NumPy)
+    get_genai()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup = [database.connect(), _init_http()]
+    if PREWARM:
+        startup.append(asyncio.to_thread(_import_heavy_modules))
+    await asyncio.gather(*startup)
+    # Missing indexes are built in the background: on a large collection that
+    # can take a while, and creating ones that exist is a no-op
+    spawn(ensure_indexes(get_db()), name="ensure-indexes")
+    # After the DB is up: bot handlers may run as soon as updates arrive
+    if webhook.webhook_enabled():
+        await webhook.start_bot()
+    yield
+    # The server has stopped accepting requests by now; let queued
+    # notifications and webhook updates finish before their clients go away
+    await drain()
+    await webhook.stop_bot()
+    await close_http_client()
+    await database.close()
+
+
+app = FastAPI(title="PingMe API", lifespan=lifespan)
+
+app.add_middleware(ProfilerMiddleware)
+# Inside the metrics and CORS layers, so 429s are counted and still carry
+# CORS headers the extension can read
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,6 +71,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Read by the extension to revalidate its cached lists
+    expose_headers=["ETag", "Last-Modified"],
 )
 
 # Mount static and templates
@@ -27,8 +84,17 @@ app.include_router(settings.router)
 app.include_router(ping.router)
 app.include_router(agenda.router)
 app.include_router(notes.router)
+app.include_router(search.router)
 app.include_router(summary.router)
 app.include_router(weekly.router)  
+app.include_router(analytics.router)
+app.include_router(admin.router)
+app.include_router(health.router)
+app.include_router(webhook.router)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.post("/test-post")
 async def test_post():
@@ -36,19 +102,25 @@ async def test_post():
 
 @app.get("/")
 async def root(request: Request):
-    from routers.summary import get_summary
-    from services.db import get_db
+    from routers.summary import get_cached_summary
+    from services.cache import etag_matches
     db = get_db()
-    summary_data = await get_summary(db)
-    return templates.TemplateResponse("dashboard.html", {"request": request, "summary": summary_data})
+    entry = await get_cached_summary(db)
+    # Template is static, so the page changes exactly when the summary does
+    etag = entry["etag"][:-1] + '-html"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return templates.TemplateResponse(
+        request, "dashboard.html", {"summary": entry["data"]}, headers=headers
+    )
 
 @app.get("/settings")
 async def settings_ui(request: Request):
-    from routers.settings import get_settings
-    from services.db import get_db
+    from services.settings import load_settings
     db = get_db()
-    settings_data = await get_settings(db)
-    return templates.TemplateResponse("settings.html", {"request": request, "settings": settings_data})
+    settings_data = await load_settings(db)
+    return templates.TemplateResponse(request, "settings.html", {"settings": settings_data})
 
 if __name__ == "__main__":
     import uvicorn
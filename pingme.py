@@ -0,0 +1,159 @@
+"""
+PingMe admin CLI: diagnostics and repair jobs against the configured database
+(MONGODB_URI / MONGODB_DB, same as the API).
+
+    python pingme.py yesterday                 # a day's counts (snapshot if stored)
+    python pingme.py yesterday --date 2026-02-24
+    python pingme.py check --days 30           # integrity checks; exits 1 on findings
+    python pingme.py indexes [--create]        # expected indexes; exits 1 if any missing
+    python pingme.py sizes                     # documents / bytes per collection
+    python pingme.py rollups [--days 30] [--force]   # recreate missing daily snapshots
+    python pingme.py search-rebuild            # re-index search from the source collections
+    python pingme.py heatmap-rebuild           # recompute the weekday × hour heatmap
+    python pingme.py insights --period month --count 3 [--dry-run]   # AI insights for past periods
+    python pingme.py backfill-local-dates      # give pre-localDate records their day
+
+`--json` (before the subcommand) prints the result as JSON for scripts:
+
+    python pingme.py --json check | jq '.checks.missingSnapshots'
+
+The checks only read; `indexes --create`, `rollups`, `search-rebuild`,
+`heatmap-rebuild`, `insights` and `backfill-local-dates` write, and are safe
+to rerun (`insights` skips periods that already have one unless --force). All of them are safe
+while the API is up.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from services import days, diagnostics, heatmap, insights
+from services.db import open_database
+from services.responses import dumps
+
+
+async def _yesterday(db, args):
+    return await diagnostics.day_report(db, args.date)
+
+
+async def _check(db, args):
+    return await diagnostics.integrity(db, args.days)
+
+
+async def _indexes(db, args):
+    return await diagnostics.index_status(db, create=args.create)
+
+
+async def _sizes(db, args):
+    return await diagnostics.collection_sizes(db)
+
+
+async def _rollups(db, args):
+    today = (await days.today(db)).date
+    since = args.since or days.shift(today, -args.days)
+    return await diagnostics.rebuild_snapshots(db, since, days.shift(today, -1), force=args.force)
+
+
+async def _search_rebuild(db, args):
+    return await diagnostics.rebuild_search(db)
+
+
+async def _heatmap_rebuild(db, args):
+    return await heatmap.rebuild(db)
+
+
+async def _insights(db, args):
+    today = (await days.today(db)).date
+    periods = insights.recent_periods(args.period, today, args.count)
+    return await insights.generate(
+        db, periods, concurrency=args.concurrency, force=args.force, dry_run=args.dry_run,
+    )
+
+
+async def _backfill_local_dates(db, args):
+    return await diagnostics.backfill_local_dates(db)
+
+
+def _print_text(value, indent: int = 0):
+    pad = "  " * indent
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, (dict, list)) and item:
+                print(f"{pad}{key}:")
+                _print_text(item, indent + 1)
+            else:
+                print(f"{pad}{key}: {item}")
+    elif isinstance(value, list):
+        for item in value:
+            if isinstance(item, dict):
+                print(f"{pad}- " + ", ".join(f"{k}={v}" for k, v in item.items()))
+            else:
+                print(f"{pad}- {item}")
+    else:
+        print(f"{pad}{value}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pingme", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("yesterday", help="counts for yesterday (or --date)")
+    p.add_argument("--date", help="local date, YYYY-MM-DD")
+    p.set_defaults(run=_yesterday)
+
+    p = commands.add_parser("check", help="data integrity checks")
+    p.add_argument("--days", type=int, default=30, help="how far back to look (default 30)")
+    p.set_defaults(run=_check)
+
+    p = commands.add_parser("indexes", help="expected indexes present/missing")
+    p.add_argument("--create", action="store_true", help="create the missing ones")
+    p.set_defaults(run=_indexes)
+
+    p = commands.add_parser("sizes", help="collection sizes")
+    p.set_defaults(run=_sizes)
+
+    p = commands.add_parser("rollups", help="recreate missing daily snapshots")
+    p.add_argument("--days", type=int, default=30, help="how far back to look (default 30)")
+    p.add_argument("--since", help="first local date, YYYY-MM-DD (overrides --days)")
+    p.add_argument("--force", action="store_true", help="replace existing daily snapshots too")
+    p.set_defaults(run=_rollups)
+
+    p = commands.add_parser("search-rebuild", help="rebuild the search index")
+    p.set_defaults(run=_search_rebuild)
+
+    p = commands.add_parser("heatmap-rebuild", help="recompute the heatmap from logs and sessions")
+    p.set_defaults(run=_heatmap_rebuild)
+
+    p = commands.add_parser("insights", help="AI insights for past weeks or months")
+    p.add_argument("--period", choices=insights.PERIOD_KINDS, default="week")
+    p.add_argument("--count", type=int, default=4, help="how many recent periods (default 4)")
+    p.add_argument("--concurrency", type=int, default=insights.CONCURRENCY, help="model calls at once")
+    p.add_argument("--force", action="store_true", help="regenerate periods that already have one")
+    p.add_argument("--dry-run", action="store_true", help="build the prompts and report their size only")
+    p.set_defaults(run=_insights)
+
+    p = commands.add_parser("backfill-local-dates", help="set localDate on older logs and notes")
+    p.set_defaults(run=_backfill_local_dates)
+    return parser
+
+
+async def run(args) -> dict:
+    async with open_database() as db:
+        return await args.run(db, args)
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    result = asyncio.run(run(args))
+    if args.json:
+        sys.stdout.write(dumps(result).decode() + "\n")
+    else:
+        _print_text(result)
+    return 0 if result.get("ok", True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
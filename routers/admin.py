@@ -0,0 +1,26 @@
+import os
+from fastapi import APIRouter, Header, HTTPException
+from services.profiler import mongo_profiler
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+CRON_SECRET = os.getenv("CRON_SECRET")
+
+
+def _check_secret(x_cron_secret: str):
+    if x_cron_secret != CRON_SECRET:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/mongo-profile")
+async def get_mongo_profile(x_cron_secret: str = Header(None)):
+    """Per-collection/op timings, slow-query samples and N+1 suspects."""
+    _check_secret(x_cron_secret)
+    return mongo_profiler.snapshot()
+
+
+@router.post("/mongo-profile/reset")
+async def reset_mongo_profile(x_cron_secret: str = Header(None)):
+    _check_secret(x_cron_secret)
+    mongo_profiler.reset()
+    return {"status": "success"}
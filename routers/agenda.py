@@ -1,81 +1,63 @@
-from fastapi import APIRouter, Depends, Body, HTTPException
+from fastapi import APIRouter, Depends, Request, Response
 from services.db import get_db
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any
-from bson import ObjectId
+from services import agenda as agenda_service, days, revisions
+from services.responses import MongoJSONResponse
+from services.models import (
+    AgendaBulkCreateIn, AgendaBulkDeleteIn, AgendaBulkToggleIn, AgendaItemIn, AgendaReorderIn, AgendaToggleIn,
+)
 
 router = APIRouter(prefix="/api/agenda", tags=["agenda"])
 
 @router.get("/")
-async def get_agenda(date: str = None, db = Depends(get_db)):
-    if not date:
-        date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    
-    cursor = db.agenda.find({"date": date}).sort("createdAt", 1)
-    items = await cursor.to_list(length=100)
-    
-    for item in items:
-        item["_id"] = str(item["_id"])
-    return items
+async def get_agenda(request: Request, date: str = None, db = Depends(get_db)):
+    # The revision is read before the list, so the list is never older than
+    # the ETag it goes out with
+    date = date or (await days.today(db)).date
+    revision = await revisions.current(db, "agenda", date)
+    if revision.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=revision.headers())
+    return MongoJSONResponse(await agenda_service.list_items(db, date), headers=revision.headers())
 
 @router.post("/")
-async def create_agenda_item(data: Dict[str, Any] = Body(...), db = Depends(get_db)):
-    date = data.get("date", datetime.now(timezone.utc).strftime("%Y-%m-%d"))
-    item = {
-        "content": data["content"],
-        "date": date,
-        "completed": False,
-        "completedAt": None,
-        "createdAt": datetime.now(timezone.utc),
-        "carriedFrom": data.get("carriedFrom"),
-        "source": data.get("source", "unknown")
-    }
-    result = await db.agenda.insert_one(item)
-    return {"status": "success", "id": str(result.inserted_id)}
+async def create_agenda_item(data: AgendaItemIn, db = Depends(get_db)):
+    item_id = await agenda_service.create_item(db, data)
+    return {"status": "success", "id": item_id}
+
+# ── Batch ─────────────────────────────────────────────────────────────────────
+# Declared before /{item_id} so "bulk" isn't taken for an id. Each answers with
+# the day's fresh list.
+
+@router.post("/bulk")
+async def create_agenda_items(data: AgendaBulkCreateIn, db = Depends(get_db)):
+    ids, items = await agenda_service.create_items(db, data)
+    return MongoJSONResponse({"status": "success", "ids": ids, "items": items})
+
+@router.patch("/bulk")
+async def toggle_agenda_items(data: AgendaBulkToggleIn, db = Depends(get_db)):
+    items = await agenda_service.set_completed_many(db, data)
+    return MongoJSONResponse({"status": "success", "items": items})
+
+@router.post("/bulk/delete")
+async def delete_agenda_items(data: AgendaBulkDeleteIn, db = Depends(get_db)):
+    items = await agenda_service.delete_items(db, data.ids, data.date)
+    return MongoJSONResponse({"status": "success", "items": items})
+
+@router.put("/order")
+async def reorder_agenda(data: AgendaReorderIn, db = Depends(get_db)):
+    items = await agenda_service.reorder(db, data)
+    return MongoJSONResponse({"status": "success", "items": items})
 
 @router.patch("/{item_id}")
-async def toggle_agenda_item(item_id: str, data: Dict[str, Any] = Body(...), db = Depends(get_db)):
-    completed = data.get("completed", False)
-    update = {
-        "completed": completed,
-        "completedAt": datetime.now(timezone.utc) if completed else None
-    }
-    await db.agenda.update_one({"_id": ObjectId(item_id)}, {"$set": update})
+async def toggle_agenda_item(item_id: str, data: AgendaToggleIn, db = Depends(get_db)):
+    await agenda_service.set_completed(db, item_id, data.completed)
     return {"status": "success"}
 
 @router.delete("/{item_id}")
 async def delete_agenda_item(item_id: str, db = Depends(get_db)):
-    await db.agenda.delete_one({"_id": ObjectId(item_id)})
+    await agenda_service.delete_item(db, item_id)
     return {"status": "success"}
 
 @router.post("/carryforward")
 async def carryforward_agenda(db = Depends(get_db)):
-    yesterday = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%d")
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    
-    # Find incomplete items from yesterday
-    cursor = db.agenda.find({"date": yesterday, "completed": False})
-    items = await cursor.to_list(length=100)
-    
-    carried_count = 0
-    for item in items:
-        # Check if already carried forward to avoid duplicates
-        existing = await db.agenda.find_one({
-            "content": item["content"],
-            "date": today,
-            "carriedFrom": yesterday
-        })
-        if not existing:
-            new_item = {
-                "content": item["content"],
-                "date": today,
-                "completed": False,
-                "completedAt": None,
-                "createdAt": datetime.now(timezone.utc),
-                "carriedFrom": yesterday,
-                "source": item.get("source", "system")
-            }
-            await db.agenda.insert_one(new_item)
-            carried_count += 1
-            
-    return {"status": "success", "carried": carried_count}
+    carried = await agenda_service.carryforward(db)
+    return {"status": "success", "carried": carried}
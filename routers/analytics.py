@@ -0,0 +1,109 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from services.db import get_db
+from services import days as days_service, heatmap
+from services.email_template import generate_heatmap_svg
+from typing import Optional
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+# The longest window any query loads, and the largest gap still treated as
+# consecutive pings
+MAX_DAYS = 366
+MAX_GAP_MINUTES = 24 * 60
+
+
+async def _user_context(db):
+    """Interval and timezone from settings, used by every analytics query."""
+    settings = await db.settings.find_one({"userId": "default"}) or {}
+    return settings.get("intervalMinutes", 15), settings.get("timezone") or days_service.DEFAULT_TIMEZONE
+
+
+def _engine():
+    # NumPy is only needed once someone asks for analytics; keep it off the
+    # cold-start import path
+    from services import analytics
+    return analytics
+
+
+def _check_category(category: str):
+    if category not in _engine().CATEGORY_CODES:
+        raise HTTPException(status_code=400, detail=f"Unknown category: {category}")
+
+
+@router.get("/hourly")
+async def get_hourly(category: str = "deep_work", days: int = Query(90, ge=1, le=MAX_DAYS), db=Depends(get_db)):
+    """Minutes in `category` per hour of day over the last `days` days."""
+    _check_category(category)
+    analytics = _engine()
+    interval, tz_name = await _user_context(db)
+    cols = await analytics.load_columns(db, days, tz_name)
+    return {
+        "category": category,
+        "days": days,
+        "minutesByHour": analytics.minutes_by_hour(cols, category, interval),
+    }
+
+
+@router.get("/streaks")
+async def get_streaks(category: str = "deep_work", days: int = Query(365, ge=1, le=MAX_DAYS), db=Depends(get_db)):
+    _check_category(category)
+    analytics = _engine()
+    _, tz_name = await _user_context(db)
+    cols = await analytics.load_columns(db, days, tz_name)
+    return {"category": category, **analytics.streaks(cols, category, tz_name)}
+
+
+@router.get("/transitions")
+async def get_transitions(
+    days: int = Query(90, ge=1, le=MAX_DAYS),
+    max_gap_minutes: int = Query(30, ge=1, le=MAX_GAP_MINUTES),
+    db=Depends(get_db),
+):
+    analytics = _engine()
+    cols = await analytics.load_columns(db, days)
+    return analytics.transition_matrix(cols, max_gap_minutes)
+
+
+@router.get("/sessions")
+async def get_session_lengths(
+    days: int = Query(90, ge=1, le=MAX_DAYS),
+    max_gap_minutes: Optional[int] = Query(None, ge=1, le=MAX_GAP_MINUTES),
+    db=Depends(get_db),
+):
+    """Session statistics, with sessions cut as the daily summary stores them
+    (max_gap_minutes defaults to two intervals, as there)."""
+    analytics = _engine()
+    interval, tz_name = await _user_context(db)
+    cols = await analytics.load_columns(db, days, tz_name)
+    return analytics.session_lengths(cols, interval, max_gap_minutes)
+
+
+# ── Heatmap ───────────────────────────────────────────────────────────────────
+# Read from the materialized `heatmap` document (services/heatmap.py): one
+# lookup, whatever the length of the history.
+
+@router.get("/heatmap")
+async def get_heatmap(category: str = None, db=Depends(get_db)):
+    """Pings per local weekday (rows, Monday first) and hour (columns), in
+    `category` or in all of them, with each cell's most-logged category."""
+    if category:
+        _check_category(category)
+    doc = await heatmap.load(db)
+    return {
+        "category": category,
+        "weekdays": heatmap.WEEKDAYS,
+        "pings": heatmap.grid(doc, category),
+        "dominant": None if category else heatmap.dominant(doc),
+        "total": doc.get("total", 0),
+        "updatedAt": doc.get("updatedAt"),
+        "rebuiltAt": doc.get("rebuiltAt"),
+    }
+
+
+@router.get("/heatmap.svg")
+async def get_heatmap_svg(category: str = None, db=Depends(get_db)):
+    if category:
+        _check_category(category)
+    doc = await heatmap.load(db)
+    svg = generate_heatmap_svg(heatmap.grid(doc, category), heatmap.dominant(doc), category)
+    return Response(svg, media_type="image/svg+xml", headers={"Cache-Control": "no-cache"})
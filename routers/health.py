@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from services.db import database
+
+router = APIRouter(tags=["health"])
+
+# Probes must answer well inside the orchestrator's own timeout
+PING_DEADLINE_SECONDS = 1.0
+
+
+async def _probe() -> dict:
+    try:
+        latency = await database.ping(timeout=PING_DEADLINE_SECONDS)
+        return {"ok": True, "latencyMs": round(latency, 2)}
+    except Exception as e:
+        return {"ok": False, "error": type(e).__name__}
+
+
+@router.get("/healthz")
+async def healthz():
+    """Liveness. Reports Mongo but stays 200 while it's down, so an outage
+    doesn't turn into a restart loop."""
+    return {"status": "ok", "mongo": await _probe()}
+
+
+@router.get("/readyz")
+async def readyz():
+    """Readiness: 503 until Mongo answers a ping within the deadline."""
+    result = await _probe()
+    if not result["ok"]:
+        return JSONResponse({"status": "not ready", "mongo": result}, status_code=503)
+    return {"status": "ready", "mongo": result}
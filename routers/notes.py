@@ -1,27 +1,20 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Request, Response
 from services.db import get_db
-from datetime import datetime, timezone
-from typing import List, Dict, Any
+from services import days, notes as notes_service, revisions
+from services.responses import MongoJSONResponse
+from services.models import NoteIn
 
 router = APIRouter(prefix="/api/notes", tags=["notes"])
 
 @router.get("/")
-async def get_notes(db = Depends(get_db)):
-    # Get notes from today (UTC)
-    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-    cursor = db.notes.find({"timestamp": {"$gte": today_start}}).sort("timestamp", -1)
-    notes = await cursor.to_list(length=100)
-    
-    for note in notes:
-        note["_id"] = str(note["_id"])
-    return notes
+async def get_notes(request: Request, db = Depends(get_db)):
+    date = (await days.today(db)).date
+    revision = await revisions.current(db, "notes", date)
+    if revision.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=revision.headers())
+    return MongoJSONResponse(await notes_service.list_today(db, date), headers=revision.headers())
 
 @router.post("/")
-async def create_note(data: Dict[str, Any] = Body(...), db = Depends(get_db)):
-    note = {
-        "content": data["content"],
-        "source": data.get("source", "unknown"),
-        "timestamp": datetime.now(timezone.utc)
-    }
-    result = await db.notes.insert_one(note)
-    return {"status": "success", "id": str(result.inserted_id)}
+async def create_note(data: NoteIn, db = Depends(get_db)):
+    note_id = await notes_service.create_note(db, data)
+    return {"status": "success", "id": note_id}
@@ -0,0 +1,25 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from services.db import get_db
+from services import search as search_service
+from services.models import YYYY_MM_DD
+from services.responses import MongoJSONResponse
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+@router.get("/")
+async def search(
+    q: str = Query(min_length=1, max_length=200),
+    kind: Optional[str] = Query(None, description="Comma-separated: note, log, agenda"),
+    since: Optional[str] = Query(None, pattern=YYYY_MM_DD),
+    until: Optional[str] = Query(None, pattern=YYYY_MM_DD),
+    limit: int = Query(20, ge=1, le=50),
+    db = Depends(get_db),
+):
+    """Ranked search over every day's notes, ping answers and agenda items.
+    Each word matches as a prefix; all words must match."""
+    kinds = [k.strip() for k in kind.split(",") if k.strip()] if kind else None
+    if kinds and not set(kinds) <= set(search_service.KINDS):
+        raise HTTPException(status_code=422, detail=f"kind must be among {', '.join(search_service.KINDS)}")
+    return MongoJSONResponse(await search_service.search(db, q, kinds, since, until, limit))
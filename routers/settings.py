@@ -1,42 +1,23 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Request, Response
 from services.db import get_db
-from datetime import datetime
-from typing import Dict, Any
+from services import revisions, settings as settings_service
+from services.responses import MongoJSONResponse
+from services.models import SettingsUpdate
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
-DEFAULT_SETTINGS = {
-    "userId": "default",
-    "sleepStart": "02:00",
-    "sleepEnd": "10:00",
-    "timezone": "Asia/Kolkata",
-    "intervalMinutes": 15,
-    "summaryTime": "21:00",
-    "email": "",
-    "telegramChatId": "",
-    "isPaused": False,
-    "pauseUntil": None,
-    "pendingPing": False,
-    "pendingPingAt": None,
-    "lastRespondedAt": None,
-    "lastMorningMessage": None,
-}
-
 @router.get("/")
-async def get_settings(db = Depends(get_db)):
-    settings = await db.settings.find_one({"userId": "default"})
-    if not settings:
-        await db.settings.insert_one(DEFAULT_SETTINGS.copy())
-        settings = await db.settings.find_one({"userId": "default"})
-    
-    # Convert ObjectId to str for JSON serialization
-    settings["_id"] = str(settings["_id"])
-    return settings
+async def get_settings(request: Request, db = Depends(get_db)):
+    revision = await revisions.settings_revision(db)
+    if revision and revision.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=revision.headers())
+    settings = await settings_service.load_settings(db)
+    # From the document itself, which may be newer than `revision`
+    return MongoJSONResponse(
+        settings_service.public_settings(settings), headers=revisions.of_settings(settings).headers(),
+    )
 
 @router.post("/")
-async def update_settings(updates: Dict[str, Any] = Body(...), db = Depends(get_db)):
-    await db.settings.update_one(
-        {"userId": "default"},
-        {"$set": {**updates, "updatedAt": datetime.utcnow()}}
-    )
+async def update_settings(data: SettingsUpdate, db = Depends(get_db)):
+    await settings_service.update_settings(db, data)
     return {"status": "success"}
@@ -1,16 +1,30 @@
 import os
 import httpx
-from fastapi import APIRouter, Depends, Header, HTTPException
+import pytz
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from pymongo.errors import BulkWriteError
+from services import ai, days, facts, jobs, prompts
 from services.db import get_db
 from services.telegram import send_message as send_telegram
 from services.email import send_email
 from services.ai import generate_ai_summary
+from services.email_template import generate_html_email
+from services.sessions import build_sessions, minutes_per_category, save_sessions
+from services.cache import summary_cache, etag_matches
+from services.responses import MongoJSONResponse, dumps
+from services.log import get_logger
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any
 
 router = APIRouter(prefix="/api/summary", tags=["summary"])
 
 CRON_SECRET = os.getenv("CRON_SECRET")
+# How long a second trigger waits for a run in another process to finish
+SUMMARY_WAIT_SECONDS = float(os.getenv("SUMMARY_WAIT_SECONDS", "60"))
+# MongoDB's duplicate key error code
+DUPLICATE_KEY = 11000
+
+logger = get_logger(__name__)
 
 
 def extract_top_activities(logs: list, top_n: int = 5) -> list:
@@ -25,37 +39,39 @@ def extract_top_activities(logs: list, top_n: int = 5) -> list:
     return [text for text, _ in most_common]
 
 
-def compute_hours_per_category(logs: list, interval_minutes: int = 15) -> dict:
-    """Convert ping counts per category into approximate hours."""
-    category_counts: Dict[str, int] = {}
-    for log in logs:
-        if not log.get("skipped") and not log.get("untracked"):
-            cat = log.get("category", "untracked")
-            category_counts[cat] = category_counts.get(cat, 0) + 1
+def compute_hours_per_category(sessions: list) -> dict:
+    """Convert tracked session minutes per category into hours."""
+    return {
+        cat: round(minutes / 60, 2)
+        for cat, minutes in minutes_per_category(sessions).items()
+    }
 
-    hours = {}
-    for cat, count in category_counts.items():
-        hours[cat] = round((count * interval_minutes) / 60, 2)
-    return hours
 
-
-@router.get("/")
-async def get_summary(db=Depends(get_db)):
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    today_start = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
+async def get_summary(db, day: days.DayWindow = None, archived: bool = False):
+    """Build a day's summary (default today, in the user's timezone) straight
+    from the database (uncached). `archived` also reads `logs_archive`, for
+    past days whose logs send_summary has already moved there."""
+    day = day or await days.today(db)
+    today = day.date
 
     # Fetch logs, notes, agenda
-    logs_cursor = db.logs.find({"timestamp": {"$gte": today_start}}).sort("timestamp", 1)
+    logs_cursor = db.logs.find({"localDate": today}).sort("timestamp", 1)
     logs = await logs_cursor.to_list(length=500)
+    if archived:
+        archive_cursor = db.logs_archive.find({"localDate": today}).sort("timestamp", 1)
+        logs = await archive_cursor.to_list(length=500) + logs
+        logs.sort(key=lambda l: l["timestamp"])
 
-    notes_cursor = db.notes.find({"timestamp": {"$gte": today_start}}).sort("timestamp", 1)
+    notes_cursor = db.notes.find({"localDate": today}).sort("timestamp", 1)
     notes = await notes_cursor.to_list(length=100)
 
     agenda_cursor = db.agenda.find({"date": today})
     agenda = await agenda_cursor.to_list(length=100)
 
+    settings = await db.settings.find_one({"userId": "default"}) or {}
+    interval = settings.get("intervalMinutes", 15)
+    sessions = list(build_sessions(logs, interval))
+
     # Stats
     total_pings = len(logs)
     tracked_count = sum(
@@ -72,32 +88,55 @@ async def get_summary(db=Depends(get_db)):
             cat = log.get("category", "untracked")
             category_breakdown[cat] = category_breakdown.get(cat, 0) + 1
 
-    # Serialize ObjectIds and datetimes
-    for item in logs + notes + agenda:
-        item["_id"] = str(item["_id"])
-        for field in ("timestamp", "completedAt", "createdAt"):
-            if field in item and isinstance(item[field], datetime):
-                item[field] = item[field].isoformat()
-
     return {
         "date": today,
+        "timezone": day.tz,
+        "intervalMinutes": interval,
         "logs": logs,
         "notes": notes,
         "agenda": agenda,
+        "sessions": sessions,
         "stats": {
             "totalPings": total_pings,
             "trackedCount": tracked_count,
             "untrackedCount": untracked_count,
             "untrackedPercent": untracked_percent,
             "categoryBreakdown": category_breakdown,
+            "minutesPerCategory": minutes_per_category(sessions),
         },
     }
 
 
-async def _save_daily_snapshot(db, summary: dict, email_html: str):
+async def get_cached_summary(db, user: str = "default") -> dict:
+    """
+    Today's summary as {data, body, etag}, served from `summary_cache` until
+    a ping, note, agenda or settings write invalidates it.
+    """
+    day = await days.today(db, user)
+    return await summary_cache.get_or_build(
+        user, day.date, lambda: get_summary(db, day), dumps
+    )
+
+
+@router.get("/")
+async def read_summary(request: Request, db=Depends(get_db)):
+    entry = await get_cached_summary(db)
+    headers = {"ETag": entry["etag"], "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type=MongoJSONResponse.media_type, headers=headers)
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return summary_cache.stats()
+
+
+async def _save_daily_snapshot(db, summary: dict, insight: str, rebuilt_at: datetime = None):
     """
     Persist a compact daily snapshot so we can roll it up into a weekly
     snapshot later — then we can safely discard the raw logs.
+    `pingme rollups` passes `rebuilt_at` for snapshots it recreates.
     """
     date_str = summary["date"]
     stats = summary["stats"]
@@ -105,7 +144,7 @@ async def _save_daily_snapshot(db, summary: dict, email_html: str):
     # Check if a snapshot for today already exists (idempotent re-runs)
     existing = await db.daily_snapshots.find_one({"date": date_str})
     if existing:
-        print(f"DEBUG: daily_snapshot for {date_str} already exists — skipping.", flush=True)
+        logger.debug("daily_snapshot already exists, skipping", extra={"date": date_str})
         return
 
     snapshot = {
@@ -117,59 +156,70 @@ async def _save_daily_snapshot(db, summary: dict, email_html: str):
             "untrackedCount": stats["untrackedCount"],
             "untrackedPercent": stats["untrackedPercent"],
             "categoryBreakdown": stats["categoryBreakdown"],
+            "minutesPerCategory": stats["minutesPerCategory"],
         },
-        "hoursPerCategory": compute_hours_per_category(summary["logs"]),
+        "hoursPerCategory": compute_hours_per_category(summary["sessions"]),
+        "sessionCount": len(summary["sessions"]),
         "topActivities": extract_top_activities(summary["logs"]),
         "agendaCompleted": sum(1 for i in summary["agenda"] if i.get("completed")),
         "agendaTotal": len(summary["agenda"]),
         "notesCount": len(summary["notes"]),
-        # Store AI-generated email text so weekly rollup can reference it
-        "summaryText": email_html,
+        # The day's insight (AI or local) as sent in the email
+        "summaryText": insight,
+        # The day boiled down for later AI prompts (services.prompts)
+        "digest": prompts.day_digest(
+            summary["logs"], summary["agenda"], summary["notes"], stats,
+            date=date_str, interval_minutes=summary["intervalMinutes"],
+        ),
     }
+    if rebuilt_at:
+        snapshot["rebuiltAt"] = rebuilt_at
 
     await db.daily_snapshots.insert_one(snapshot)
-    print(f"DEBUG: Saved daily_snapshot for {date_str}", flush=True)
+    await save_sessions(db, date_str, summary["sessions"])
+    logger.info("saved daily_snapshot", extra={"date": date_str})
 
 
 async def _delete_old_logs(db):
     """
-    Delete all logs strictly before today (UTC midnight).
-    Today's logs are kept so the dashboard still works until end of day.
+    Move all logs strictly before today (local midnight) into `logs_archive`.
+    Today's logs are kept so the dashboard still works until end of day;
+    the archive feeds the long-range analytics endpoints.
     """
-    today_start = datetime.now(timezone.utc).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
+    today_start = (await days.today(db)).start
+    old_logs = await db.logs.find({"timestamp": {"$lt": today_start}}).to_list(length=None)
+    if old_logs:
+        try:
+            await db.logs_archive.insert_many(old_logs, ordered=False)
+        except BulkWriteError as e:
+            # Duplicates were archived by an earlier run that died before the
+            # delete. Anything else means some logs weren't archived, so keep
+            # them all in `logs` rather than delete them below
+            if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])) \
+                    or e.details.get("writeConcernErrors"):
+                raise
     result = await db.logs.delete_many({"timestamp": {"$lt": today_start}})
-    print(
-        f"DEBUG: Deleted {result.deleted_count} old log entries (before {today_start.date()})",
-        flush=True,
+    logger.info(
+        "archived old logs",
+        extra={"deleted": result.deleted_count, "before": today_start.isoformat()},
     )
 
 
-@router.post("/send")
-@router.post("/send/")
-async def send_summary(x_cron_secret: str = Header(None), db=Depends(get_db)):
-    print(f"DEBUG: Starting send_summary. Received secret: {x_cron_secret}", flush=True)
-
-    if x_cron_secret != CRON_SECRET:
-        print(f"DEBUG: Forbidden. Expected: {CRON_SECRET}, Got: {x_cron_secret}", flush=True)
-        raise HTTPException(status_code=403, detail="Forbidden")
-
-    print("DEBUG: Secret verified. Fetching summary data...", flush=True)
-    summary = await get_summary(db)
-
-    date_str = summary["date"]
-    stats = summary["stats"]
-
-    # ── Telegram message ──────────────────────────────────────────────────────
+def _time_log(summary: dict) -> str:
+    tz = pytz.timezone(summary["timezone"])
     time_log = ""
     for log in summary["logs"]:
         ts = log["timestamp"]
-        time = datetime.fromisoformat(ts).strftime("%H:%M") if isinstance(ts, str) else ts.strftime("%H:%M")
+        ts = datetime.fromisoformat(ts) if isinstance(ts, str) else ts
+        time = (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).astimezone(tz).strftime("%H:%M")
         content = log.get("response") or ("[skipped]" if log.get("skipped") else "[untracked]")
         cat = f" [{log.get('category')}]" if log.get("category") else ""
         time_log += f"  {time} — {content}{cat}\n"
+    return time_log
+
 
+def _telegram_message(summary: dict, time_log: str) -> str:
+    stats = summary["stats"]
     agenda_text = "".join(
         f"  {'✅' if i['completed'] else '⏳'} {i['content']}\n"
         for i in summary["agenda"]
@@ -178,9 +228,8 @@ async def send_summary(x_cron_secret: str = Header(None), db=Depends(get_db)):
     priorities = "\n".join(
         f"  • {i['content']}" for i in summary["agenda"] if not i["completed"]
     )
-
-    tg_msg = (
-        f"<b>📊 Your Day — {date_str}</b>\n\n"
+    return (
+        f"<b>📊 Your Day — {summary['date']}</b>\n\n"
         f"<b>⏱️ Time Log</b>\n{time_log}\n"
         f"<b>📈 Stats</b>\n"
         f"  Tracked: {stats['trackedCount']}  |  Untracked: {stats['untrackedPercent']}%\n\n"
@@ -189,43 +238,143 @@ async def send_summary(x_cron_secret: str = Header(None), db=Depends(get_db)):
         f"<b>🔜 Tomorrow's Priorities</b>\n{priorities}"
     )
 
-    print("DEBUG: Sending Telegram message...", flush=True)
-    try:
-        await send_telegram(tg_msg)
-    except Exception as te:
-        print(f"DEBUG: Telegram send failed: {te}", flush=True)
 
-    # ── AI email ──────────────────────────────────────────────────────────────
-    print("DEBUG: Calling Gemini AI for summary...", flush=True)
-    email_html = ""
+async def _email_html(db, summary: dict) -> tuple:
+    """
+    (html, insight, fallback): the summary email around the AI insight, or
+    around the local one (services.facts) if the AI is off, slow or fails.
+    The local facts are worked out either way and lead the AI prompt.
+    """
+    day_facts = await facts.for_day(db, summary)
+    insight = ""
+    if ai.available():
+        try:
+            insight = await generate_ai_summary(
+                summary["logs"], summary["agenda"], summary["notes"], summary["stats"],
+                facts=[f.text for f in day_facts], interval_minutes=summary["intervalMinutes"],
+            )
+            if not insight:
+                logger.info("AI summary empty, using local insight")
+        except Exception as e:
+            logger.warning("AI summary failed", extra={"error": str(e)})
+    fallback = not insight
+    if fallback:
+        insight = facts.render(day_facts)
+    html = generate_html_email(
+        summary["logs"], summary["agenda"], summary["notes"], summary["stats"], summary["date"],
+        interval_minutes=summary["intervalMinutes"],
+        ai_insight=insight,
+        insight_title="&#128202; TODAY IN NUMBERS" if fallback else "&#129302; AI INSIGHT",
+    )
+    return html, insight, fallback
+
+
+async def _run_summary_job(db, day: days.DayWindow, force: bool) -> dict:
+    """
+    The summary pipeline as ledger stages (services.jobs):
+    telegram → ai → email → snapshot → archive.
+    A rerun resumes after the last recorded stage, so an email that went out
+    isn't sent again and Gemini isn't asked twice for the same day. A failed
+    Telegram send doesn't hold up the email: the run carries on, then ends
+    `failed` instead of `done`, so the next trigger retries just that stage.
+    """
+    job = await jobs.acquire(db, "summary", "default", day.date, reset=force)
+    if job is None:
+        key = jobs.job_id("summary", "default", day.date)
+        doc = await jobs.wait(db, key, SUMMARY_WAIT_SECONDS)
+        if doc and doc.get("status") == "done":
+            return {"sent": True, "date": day.date, "alreadySent": True}
+        if doc and doc.get("lease"):
+            return {"sent": False, "date": day.date, "reason": "in_progress"}
+        # The other run failed and let go; pick up where it stopped
+        job = await jobs.acquire(db, "summary", "default", day.date)
+        if job is None:
+            return {"sent": False, "date": day.date, "reason": "in_progress"}
+
+    ran, incomplete = [], []
     try:
-        email_html = await generate_ai_summary(
-            summary["logs"], summary["agenda"], summary["notes"],summary["stats"]
-        )
-        if email_html:
-            print("DEBUG: Gemini AI generated summary successfully", flush=True)
+        logger.debug("send_summary: fetching summary data")
+        # A rerun after the archive stage finds the day's logs in logs_archive
+        summary = await get_summary(db, day, archived=job.done("archive"))
+        date_str = summary["date"]
+        time_log = _time_log(summary)
+
+        # ── Telegram message ──────────────────────────────────────────────────
+        if not job.done("telegram"):
+            try:
+                await send_telegram(_telegram_message(summary, time_log))
+                await job.complete("telegram")
+                ran.append("telegram")
+            except jobs.LeaseLost:
+                raise
+            except Exception as te:
+                # Not recorded, and the job isn't finished below, so the next
+                # trigger retries it
+                logger.warning("telegram send failed", extra={"error": str(te)})
+                incomplete.append(f"telegram: {te}")
+
+        # ── AI email ──────────────────────────────────────────────────────────
+        if job.done("ai"):
+            email_html = job.result("ai")["html"]
+            insight = job.result("ai").get("insight", "")
         else:
-            print("DEBUG: Gemini AI returned empty summary (fallback will be used)", flush=True)
+            email_html, insight, fallback = await _email_html(db, summary)
+            await job.complete("ai", html=email_html, insight=insight, fallback=fallback)
+            ran.append("ai")
+
+        if not job.done("email"):
+            try:
+                await send_email(
+                    f"PingMe Summary — {date_str} ✨", email_html, idempotency_key=f"{job.run_id}:email",
+                )
+                logger.info("summary email sent", extra={"date": date_str})
+            except Exception as ee:
+                logger.error("summary email failed", extra={"error": str(ee)})
+                await job.fail(f"email: {ee}")
+                raise HTTPException(status_code=500, detail=str(ee))
+            await job.complete("email")
+            ran.append("email")
+
+        # ── Save snapshot → delete old logs ───────────────────────────────────
+        if not job.done("snapshot"):
+            await _save_daily_snapshot(db, summary, insight)
+            await job.complete("snapshot")
+            ran.append("snapshot")
+        if not job.done("archive"):
+            await _delete_old_logs(db)
+            await job.complete("archive")
+            ran.append("archive")
+        if incomplete:
+            await job.fail("; ".join(incomplete))
+        else:
+            await job.finish()
+    except jobs.LeaseLost:
+        logger.warning("summary job taken over by another run", extra={"job": job.id})
+        return {"sent": False, "date": day.date, "reason": "in_progress"}
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"DEBUG: Gemini AI Summary failed: {e}", flush=True)
-        email_html = f"<h1>Daily Summary - {date_str}</h1><pre>{time_log}</pre>"
-
-    if not email_html:
-        email_html = f"<h1>Daily Summary - {date_str}</h1><pre>{time_log}</pre>"
+        await job.fail(str(e))
+        raise
 
-    print("DEBUG: Sending email via Resend...", flush=True)
-    try:
-        await send_email(f"PingMe Summary — {date_str} ✨", email_html)
-        print("DEBUG: Email sent successfully", flush=True)
-    except Exception as ee:
-        print(f"DEBUG: Email sending failed: {ee}", flush=True)
-        raise HTTPException(status_code=500, detail=str(ee))
+    result = {"sent": True, "date": day.date, "resumed": job.resumed, "ran": ran}
+    if incomplete:
+        result["incomplete"] = incomplete
+    return result
 
-    # ── Save snapshot → delete old logs ───────────────────────────────────────
-    print("DEBUG: Saving daily snapshot...", flush=True)
-    await _save_daily_snapshot(db, summary, email_html)
 
-    print("DEBUG: Deleting old logs...", flush=True)
-    await _delete_old_logs(db)
+@router.post("/send")
+@router.post("/send/")
+async def send_summary(x_cron_secret: str = Header(None), force: bool = False, db=Depends(get_db)):
+    """
+    Send today's summary once. Cron and the bot's /summary can both call
+    this: concurrent calls share one run, a call after a finished run
+    reports alreadySent, and `force=true` starts a fresh run (a resend).
+    """
+    if x_cron_secret != CRON_SECRET:
+        logger.warning("send_summary rejected: bad cron secret")
+        raise HTTPException(status_code=403, detail="Forbidden")
 
-    return {"sent": True}
+    day = await days.today(db)
+    key = jobs.job_id("summary", "default", day.date)
+    return await jobs.coalesce(f"{key}:force" if force else key, lambda: _run_summary_job(db, day, force))
@@ -0,0 +1,82 @@
+"""
+Telegram webhook mode.
+
+When TELEGRAM_WEBHOOK_SECRET is set, the app lifespan builds the bot from
+bot.py (same handlers as polling mode) inside the API process and Telegram
+POSTs updates here instead of the bot long-polling from its own container.
+The bot uses the embedded backend, calling the service layer on this
+process's Mongo pool: no extra process and no HTTP round trip per message.
+
+Updates are acknowledged immediately and handled as background tasks, so a
+slow command (e.g. /summary) can't make Telegram time out and redeliver; the
+lifespan drains them on shutdown. Register the URL with
+`python bot.py set-webhook`.
+"""
+
+import hmac
+import os
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from services.background import spawn
+from services.log import get_logger
+
+router = APIRouter(prefix="/api/telegram", tags=["telegram"])
+
+WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET")
+
+logger = get_logger(__name__)
+
+_application = None
+
+
+def webhook_enabled() -> bool:
+    return bool(WEBHOOK_SECRET)
+
+
+async def start_bot():
+    """Build and initialize the in-process bot; called from the lifespan."""
+    global _application
+    import bot
+
+    bot.use_backend(bot.EmbeddedBackend())
+    application = bot.build_application(updater=False)
+    try:
+        await application.initialize()
+    except Exception as e:
+        logger.error("telegram bot failed to initialize", extra={"error": str(e)})
+        return
+    _application = application
+
+
+async def stop_bot():
+    global _application
+    if _application is not None:
+        await _application.shutdown()
+    _application = None
+
+
+@router.post("/webhook")
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: str = Header(None),
+):
+    # Compared as bytes: compare_digest rejects non-ASCII str, and a
+    # malformed header should get a 403, not a 500
+    if not WEBHOOK_SECRET or not hmac.compare_digest(
+        (x_telegram_bot_api_secret_token or "").encode(), WEBHOOK_SECRET.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if _application is None:
+        raise HTTPException(status_code=503, detail="Bot not running")
+
+    from telegram import Update
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        # Telegram redelivers anything that isn't a 2xx; a body that isn't
+        # JSON will never parse, so reject it as the client's error
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    update = Update.de_json(payload, _application.bot)
+    spawn(_application.process_update(update), name=f"telegram-update-{update.update_id}")
+    return {"ok": True}
@@ -2,26 +2,31 @@ import os
 from fastapi import APIRouter, Depends, Header, HTTPException
 from services.db import get_db
 from services.telegram import send_message as send_telegram
-from services.ai import generate_ai_summary
+from services import ai, facts, prompts
+from services.ai import generate_insight
+from services.responses import MongoJSONResponse
+from services.models import DailySnapshot
+from services.log import get_logger
 from datetime import datetime, timezone, timedelta
 from collections import Counter
-from typing import Dict, Any
+from typing import Dict, List
 
 router = APIRouter(prefix="/api/summary/weekly", tags=["weekly"])
 
 CRON_SECRET = os.getenv("CRON_SECRET")
 
+logger = get_logger(__name__)
 
-def _most_productive_day(daily_snapshots: list) -> str:
-    """Return the date string with the highest tracked deep_work pings."""
+
+def _most_productive_day(daily_snapshots: List[DailySnapshot]) -> str:
+    """Return the date string with the most deep_work hours."""
     best_date = None
     best_count = -1
     for snap in daily_snapshots:
-        breakdown = snap.get("stats", {}).get("categoryBreakdown", {})
-        deep = breakdown.get("deep_work", 0)
+        deep = snap.hoursPerCategory.get("deep_work", 0)
         if deep > best_count:
             best_count = deep
-            best_date = snap["date"]
+            best_date = snap.date
     if not best_date:
         return "N/A"
     # Return as weekday name e.g. "Monday"
@@ -31,15 +36,15 @@ def _most_productive_day(daily_snapshots: list) -> str:
         return best_date
 
 
-def _least_productive_day(daily_snapshots: list) -> str:
+def _least_productive_day(daily_snapshots: List[DailySnapshot]) -> str:
     """Return the date string with the highest untracked percent."""
     worst_date = None
     worst_pct = -1
     for snap in daily_snapshots:
-        pct = snap.get("stats", {}).get("untrackedPercent", 0)
+        pct = snap.untrackedPercent
         if pct > worst_pct:
             worst_pct = pct
-            worst_date = snap["date"]
+            worst_date = snap.date
     if not worst_date:
         return "N/A"
     try:
@@ -48,20 +53,20 @@ def _least_productive_day(daily_snapshots: list) -> str:
         return worst_date
 
 
-def _aggregate_category_hours(daily_snapshots: list) -> Dict[str, float]:
+def _aggregate_category_hours(daily_snapshots: List[DailySnapshot]) -> Dict[str, float]:
     """Sum up hoursPerCategory across all daily snapshots."""
     totals: Dict[str, float] = {}
     for snap in daily_snapshots:
-        for cat, hrs in snap.get("hoursPerCategory", {}).items():
+        for cat, hrs in snap.hoursPerCategory.items():
             totals[cat] = round(totals.get(cat, 0) + hrs, 2)
     return totals
 
 
-def _top_activities_across_week(daily_snapshots: list, top_n: int = 5) -> list:
+def _top_activities_across_week(daily_snapshots: List[DailySnapshot], top_n: int = 5) -> list:
     """Flatten all topActivities lists and return the most common ones."""
     all_activities = []
     for snap in daily_snapshots:
-        all_activities.extend(snap.get("topActivities", []))
+        all_activities.extend(snap.topActivities)
     most_common = Counter(all_activities).most_common(top_n)
     return [act for act, _ in most_common]
 
@@ -91,7 +96,8 @@ def _build_weekly_telegram_msg(week_start: str, week_end: str, stats: dict) -> s
     )
 
     if stats.get("aiInsight"):
-        msg += f"<b>🤖 Weekly Insight</b>\n{stats['aiInsight']}"
+        title = "📊 Week in Numbers" if stats.get("insightSource") == "local" else "🤖 Weekly Insight"
+        msg += f"<b>{title}</b>\n{stats['aiInsight']}"
 
     return msg
 
@@ -104,37 +110,39 @@ async def send_weekly_summary(x_cron_secret: str = Header(None), db=Depends(get_
 
     1. Pull the last 7 daily_snapshots.
     2. Aggregate them into a single weekly_snapshot.
-    3. Generate an AI insight from the aggregated data.
+    3. Generate an AI insight from the aggregated data (or the local one, services.facts).
     4. Send Telegram message + save to weekly_snapshots collection.
     5. Delete the 7 daily_snapshots that were rolled up.
     """
-    print(f"DEBUG: Starting weekly summary. Secret: {x_cron_secret}", flush=True)
-
     if x_cron_secret != CRON_SECRET:
+        logger.warning("weekly summary rejected: bad cron secret")
         raise HTTPException(status_code=403, detail="Forbidden")
 
     # ── Fetch last 7 daily snapshots ─────────────────────────────────────────
     cursor = db.daily_snapshots.find().sort("date", -1).limit(7)
-    snapshots = await cursor.to_list(length=7)
+    docs = await cursor.to_list(length=7)
 
-    if not snapshots:
-        print("DEBUG: No daily snapshots found — skipping weekly rollup.", flush=True)
+    if not docs:
+        logger.info("no daily snapshots, skipping weekly rollup")
         return {"sent": False, "reason": "no_daily_snapshots"}
 
     # Sort oldest → newest for readability
-    snapshots = sorted(snapshots, key=lambda s: s["date"])
+    snapshots = sorted((DailySnapshot.from_doc(d) for d in docs), key=lambda s: s.date)
 
-    week_start = snapshots[0]["date"]
-    week_end = snapshots[-1]["date"]
+    week_start = snapshots[0].date
+    week_end = snapshots[-1].date
 
-    print(f"DEBUG: Rolling up {len(snapshots)} snapshots: {week_start} → {week_end}", flush=True)
+    logger.info(
+        "rolling up daily snapshots",
+        extra={"count": len(snapshots), "weekStart": week_start, "weekEnd": week_end},
+    )
 
     # ── Aggregate stats ───────────────────────────────────────────────────────
     total_hours = _aggregate_category_hours(snapshots)
-    total_tracked = sum(s["stats"]["trackedCount"] for s in snapshots)
-    total_pings = sum(s["stats"]["totalPings"] for s in snapshots)
+    total_tracked = sum(s.trackedCount for s in snapshots)
+    total_pings = sum(s.totalPings for s in snapshots)
     avg_untracked = (
-        round(sum(s["stats"]["untrackedPercent"] for s in snapshots) / len(snapshots))
+        round(sum(s.untrackedPercent for s in snapshots) / len(snapshots))
         if snapshots
         else 0
     )
@@ -144,35 +152,35 @@ async def send_weekly_summary(x_cron_secret: str = Header(None), db=Depends(get_
 
     daily_breakdown = [
         {
-            "date": s["date"],
-            "deepWorkHours": s.get("hoursPerCategory", {}).get("deep_work", 0),
-            "untrackedPercent": s["stats"]["untrackedPercent"],
-            "trackedCount": s["stats"]["trackedCount"],
+            "date": s.date,
+            "deepWorkHours": s.hoursPerCategory.get("deep_work", 0),
+            "untrackedPercent": s.untrackedPercent,
+            "trackedCount": s.trackedCount,
         }
         for s in snapshots
     ]
 
     # ── AI Insight ────────────────────────────────────────────────────────────
+    # From the days' digests merged into one for the week, which is also
+    # stored so monthly insights can be built from weeks
+    week_digest = prompts.merge_digests([
+        prompts.snapshot_digest(d) for d in sorted(docs, key=lambda d: d["date"])
+    ])
+    # The local observations (services.facts) lead the prompt, and stand in
+    # for the insight if the AI is off, slow or fails
+    week_facts = facts.period_facts(week_digest)
     ai_insight = ""
-    try:
-        # Build a lightweight pseudo-log list that generate_ai_summary can work with
-        pseudo_logs = []
-        for snap in snapshots:
-            for cat, hrs in snap.get("hoursPerCategory", {}).items():
-                pseudo_logs.append({
-                    "response": f"{cat} ({hrs}h on {snap['date']})",
-                    "category": cat,
-                    "timestamp": snap["date"],
-                })
-
-        raw = await generate_ai_summary(pseudo_logs, [], [])
-
-        # generate_ai_summary returns the full email-style text — extract a
-        # short insight (first 400 chars) for Telegram
-        ai_insight = raw[:400].strip() if raw else ""
-        print("DEBUG: AI weekly insight generated.", flush=True)
-    except Exception as e:
-        print(f"DEBUG: AI weekly insight failed: {e}", flush=True)
+    if ai.available():
+        try:
+            raw = await generate_insight(week_digest, period="week", facts=[f.text for f in week_facts])
+            # Keep the Telegram message short
+            ai_insight = raw[:400].strip() if raw else ""
+            logger.debug("AI weekly insight generated")
+        except Exception as e:
+            logger.warning("AI weekly insight failed", extra={"error": str(e)})
+    insight_source = "ai" if ai_insight else "local"
+    if not ai_insight:
+        ai_insight = facts.render(week_facts, empty=None)
 
     weekly_stats = {
         "totalHoursPerCategory": total_hours,
@@ -184,6 +192,7 @@ async def send_weekly_summary(x_cron_secret: str = Header(None), db=Depends(get_
         "topActivities": top_activities,
         "dailyBreakdown": daily_breakdown,
         "aiInsight": ai_insight,
+        "insightSource": insight_source,
         "daysIncluded": len(snapshots),
     }
 
@@ -195,26 +204,24 @@ async def send_weekly_summary(x_cron_secret: str = Header(None), db=Depends(get_
             "weekEnd": week_end,
             "generatedAt": datetime.now(timezone.utc),
             "stats": weekly_stats,
+            "digest": week_digest,
         })
-        print(f"DEBUG: Saved weekly_snapshot for {week_start} → {week_end}", flush=True)
+        logger.info("saved weekly_snapshot", extra={"weekStart": week_start, "weekEnd": week_end})
     else:
-        print(f"DEBUG: weekly_snapshot for {week_start} already exists — skipping save.", flush=True)
+        logger.debug("weekly_snapshot already exists, skipping save", extra={"weekStart": week_start})
 
     # ── Send Telegram ─────────────────────────────────────────────────────────
     tg_msg = _build_weekly_telegram_msg(week_start, week_end, weekly_stats)
     try:
         await send_telegram(tg_msg)
-        print("DEBUG: Weekly Telegram message sent.", flush=True)
+        logger.debug("weekly telegram message sent")
     except Exception as te:
-        print(f"DEBUG: Telegram send failed: {te}", flush=True)
+        logger.warning("telegram send failed", extra={"error": str(te)})
 
     # ── Delete rolled-up daily snapshots ──────────────────────────────────────
-    snapshot_dates = [s["date"] for s in snapshots]
+    snapshot_dates = [s.date for s in snapshots]
     result = await db.daily_snapshots.delete_many({"date": {"$in": snapshot_dates}})
-    print(
-        f"DEBUG: Deleted {result.deleted_count} daily_snapshots after weekly rollup.",
-        flush=True,
-    )
+    logger.info("deleted rolled-up daily_snapshots", extra={"deleted": result.deleted_count})
 
     return {
         "sent": True,
@@ -229,8 +236,4 @@ async def get_weekly_history(db=Depends(get_db)):
     """Return all past weekly snapshots newest first — useful for dashboard."""
     cursor = db.weekly_snapshots.find().sort("weekStart", -1).limit(52)
     snapshots = await cursor.to_list(length=52)
-    for s in snapshots:
-        s["_id"] = str(s["_id"])
-        if isinstance(s.get("generatedAt"), datetime):
-            s["generatedAt"] = s["generatedAt"].isoformat()
-    return snapshots
+    return MongoJSONResponse(snapshots)
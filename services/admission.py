@@ -0,0 +1,192 @@
+"""
+Request admission control: per-client rate limits and concurrency caps for
+expensive routes.
+
+`AdmissionMiddleware` is pure ASGI and answers 429 with Retry-After before a
+request reaches a router, so a runaway client (an extension stuck in a retry
+loop) costs a dict lookup instead of a Mongo round trip.
+
+- Rate limits are token buckets per client and per class: "write" for
+  POST/PUT/PATCH/DELETE, "read" for everything else. Each bucket holds up to
+  `burst` tokens and refills at `per_minute`. A request takes one token, and
+  an empty bucket gets 429 with the time until the next token.
+- Concurrency caps bound how many requests to a route prefix (the summary
+  send, the weekly rollup, analytics) run at once in this process. Beyond the
+  cap the request is shed straight away, since queueing work that takes
+  seconds only piles up memory and Mongo connections.
+
+The client is the connection's peer address. Behind a proxy that is the
+proxy, unless uvicorn is told to trust X-Forwarded-For (FORWARDED_ALLOW_IPS).
+RATE_LIMIT_KEY_HEADER names a header to key on instead. Set it only when
+something in front verifies that header, since a client can put anything in
+it.
+
+Buckets live in this process by default. Anything implementing
+`RateLimitBackend.take` (e.g. a Redis script) can be passed in so several
+workers share one budget. Health checks, /metrics, CORS preflights and the
+Telegram webhook (Telegram retries on 429, and the secret already guards it)
+are never limited.
+
+Env: ADMISSION_CONTROL (true), RATE_LIMIT_WRITES_PER_MINUTE (120),
+RATE_LIMIT_WRITE_BURST (30), RATE_LIMIT_READS_PER_MINUTE (600),
+RATE_LIMIT_READ_BURST (120), RATE_LIMIT_KEY_HEADER, RATE_LIMIT_MAX_CLIENTS
+(10000), MAX_CONCURRENT_SUMMARY_SENDS (2), MAX_CONCURRENT_WEEKLY (1),
+MAX_CONCURRENT_ANALYTICS (4).
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+from services.metrics import registry
+
+ENABLED = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+KEY_HEADER = (os.getenv("RATE_LIMIT_KEY_HEADER") or "").lower().encode() or None
+MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+
+EXEMPT_PATHS = ("/healthz", "/readyz", "/metrics", "/api/telegram/webhook", "/static/")
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class Rate(NamedTuple):
+    per_minute: float
+    burst: int
+
+
+RATES: Dict[str, Rate] = {
+    "write": Rate(float(os.getenv("RATE_LIMIT_WRITES_PER_MINUTE", "120")), int(os.getenv("RATE_LIMIT_WRITE_BURST", "30"))),
+    "read": Rate(float(os.getenv("RATE_LIMIT_READS_PER_MINUTE", "600")), int(os.getenv("RATE_LIMIT_READ_BURST", "120"))),
+}
+
+
+class ConcurrencyLimit(NamedTuple):
+    name: str
+    method: str
+    prefix: str
+    limit: int
+    # Roughly how long one request takes, as the Retry-After for shed ones
+    retry_after: int
+
+
+CONCURRENCY_LIMITS: List[ConcurrencyLimit] = [
+    ConcurrencyLimit("summary_send", "POST", "/api/summary/send", int(os.getenv("MAX_CONCURRENT_SUMMARY_SENDS", "2")), 30),
+    ConcurrencyLimit("weekly", "POST", "/api/summary/weekly", int(os.getenv("MAX_CONCURRENT_WEEKLY", "1")), 30),
+    ConcurrencyLimit("analytics", "GET", "/api/analytics/", int(os.getenv("MAX_CONCURRENT_ANALYTICS", "4")), 2),
+]
+
+rejected = registry.counter(
+    "pingme_admission_rejected_total", "Requests answered 429 by admission control, by limit and reason."
+)
+# Requests currently running under each concurrency limit (this process)
+inflight: Dict[str, int] = {limit.name: 0 for limit in CONCURRENCY_LIMITS}
+
+
+def _inflight_metrics() -> List[str]:
+    metric = "pingme_admission_inflight"
+    lines = [f"# TYPE {metric} gauge"]
+    lines += [f'{metric}{{limit="{name}"}} {count}' for name, count in inflight.items()]
+    return lines
+
+
+registry.collectors.append(_inflight_metrics)
+
+
+class RateLimitBackend:
+    """Interface for a token-bucket store. Must be atomic per key."""
+
+    async def take(self, key: str, rate: Rate, now: float) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, seconds until a token is available)."""
+        raise NotImplementedError
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = MAX_CLIENTS):
+        # key → (tokens, last refill); least recently seen first, so the
+        # oldest clients are dropped when there are too many
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.max_keys = max_keys
+
+    async def take(self, key: str, rate: Rate, now: float) -> Tuple[bool, float]:
+        per_second = rate.per_minute / 60
+        tokens, last = self._buckets.pop(key, (float(rate.burst), now))
+        tokens = min(float(rate.burst), tokens + (now - last) * per_second)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / per_second
+
+
+def _too_many(retry_after: float, reason: str) -> Tuple[dict, dict]:
+    body = orjson.dumps({"detail": "Too Many Requests", "reason": reason})
+    start = {
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    }
+    return start, {"type": "http.response.body", "body": body}
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, backend: Optional[RateLimitBackend] = None, enabled: bool = ENABLED):
+        self.app = app
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.enabled = enabled
+
+    @staticmethod
+    def _client(scope) -> str:
+        if KEY_HEADER:
+            for name, value in scope["headers"]:
+                if name == KEY_HEADER:
+                    return "key:" + value.decode("latin-1")
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def _reject(self, send, retry_after: float, limit: str, reason: str):
+        rejected.inc(limit=limit, reason=reason)
+        start, body = _too_many(retry_after, reason)
+        await send(start)
+        await send(body)
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        path = scope["path"]
+        if method == "OPTIONS" or path.startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        kind = "write" if method in WRITE_METHODS else "read"
+        allowed, retry_after = await self.backend.take(
+            f"{kind}:{self._client(scope)}", RATES[kind], time.time(),
+        )
+        if not allowed:
+            await self._reject(send, retry_after, kind, "rate_limited")
+            return
+
+        limit = next(
+            (l for l in CONCURRENCY_LIMITS if l.method == method and path.startswith(l.prefix)), None,
+        )
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        if inflight[limit.name] >= limit.limit:
+            await self._reject(send, limit.retry_after, limit.name, "overloaded")
+            return
+        inflight[limit.name] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            inflight[limit.name] -= 1
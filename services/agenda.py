@@ -0,0 +1,210 @@
+"""
+Agenda items.
+
+Items are listed by `position`, a sortable number set when an item is created
+(its creation time in ms, so new items land at the bottom) and rewritten by
+`reorder`. Documents from before positions existed have none and sort first,
+in creation order, which is where they already were.
+
+The batch functions each apply their writes with one `bulk_write` and return
+the day's fresh list, so the caller can redraw without a second request.
+Every write bumps the day's revision (services.revisions), which the list
+route's ETag is built from.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from services import days, revisions, search
+from services.cache import summary_cache
+from services.models import AgendaBulkCreateIn, AgendaBulkToggleIn, AgendaItemIn, AgendaReorderIn
+
+# "- ", "* ", "• ", "1. ", "2) " and "[ ] " at the start of a pasted line
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)]|\[[ xX]?\])\s+")
+
+
+async def _today(db) -> str:
+    return (await days.today(db)).date
+
+
+def _position(now: datetime, offset: int = 0) -> int:
+    return int(now.timestamp() * 1000) + offset
+
+
+def _new_item(content: str, date: str, now: datetime, position: int,
+              carried_from: Optional[str] = None, source: str = "unknown") -> dict:
+    return {
+        "_id": ObjectId(),
+        "content": content,
+        "date": date,
+        "completed": False,
+        "completedAt": None,
+        "createdAt": now,
+        "position": position,
+        "carriedFrom": carried_from,
+        "source": source
+    }
+
+
+def split_lines(text: str) -> List[str]:
+    """Item contents from pasted multi-line text, bullets stripped."""
+    lines = (_BULLET.sub("", line).strip() for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+async def list_items(db, date: str = None) -> list:
+    cursor = db.agenda.find({"date": date or await _today(db)}).sort([("position", 1), ("createdAt", 1)])
+    return await cursor.to_list(length=100)
+
+
+async def create_item(db, data: AgendaItemIn) -> str:
+    """Insert an agenda item and return its id."""
+    date = data.date or await _today(db)
+    now = datetime.now(timezone.utc)
+    item = _new_item(data.content, date, now, _position(now), data.carriedFrom, data.source)
+    result = await db.agenda.insert_one(item)
+    await search.index_documents(db, "agenda", [item])
+    await summary_cache.invalidate("default", date)
+    await revisions.bump(db, "agenda", date)
+    return str(result.inserted_id)
+
+
+async def set_completed(db, item_id: str, completed: bool):
+    update = {
+        "completed": completed,
+        "completedAt": datetime.now(timezone.utc) if completed else None
+    }
+    # The item's date says which day's revision to bump
+    item = await db.agenda.find_one_and_update(
+        {"_id": ObjectId(item_id)}, {"$set": update}, projection={"date": 1},
+    )
+    if item:
+        await summary_cache.invalidate("default", item["date"])
+        await revisions.bump(db, "agenda", item["date"])
+
+
+async def delete_item(db, item_id: str):
+    item = await db.agenda.find_one_and_delete({"_id": ObjectId(item_id)}, projection={"date": 1})
+    await search.remove_documents(db, "agenda", [item_id])
+    if item:
+        await summary_cache.invalidate("default", item["date"])
+        await revisions.bump(db, "agenda", item["date"])
+
+
+# ── Batch operations ──────────────────────────────────────────────────────────
+
+async def _apply(db, operations: list, date: str) -> list:
+    if operations:
+        await db.agenda.bulk_write(operations, ordered=False)
+        await summary_cache.invalidate("default", date)
+        await revisions.bump(db, "agenda", date)
+    return await list_items(db, date)
+
+
+async def create_items(db, data: AgendaBulkCreateIn) -> tuple:
+    """Insert one item per line of `data.text`; returns (ids, fresh list)."""
+    date = data.date or await _today(db)
+    now = datetime.now(timezone.utc)
+    # Consecutive positions keep the pasted order
+    items = [
+        _new_item(content, date, now, _position(now, offset), source=data.source)
+        for offset, content in enumerate(split_lines(data.text))
+    ]
+    fresh = await _apply(db, [InsertOne(item) for item in items], date)
+    await search.index_documents(db, "agenda", items)
+    return [str(item["_id"]) for item in items], fresh
+
+
+async def set_completed_many(db, data: AgendaBulkToggleIn) -> list:
+    # Only the day's items are touched, since that is the one day whose
+    # revision and cached summary _apply refreshes; other ids are ignored
+    date = data.date or await _today(db)
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {"_id": ObjectId(change.id), "date": date},
+            {"$set": {"completed": change.completed, "completedAt": now if change.completed else None}},
+        )
+        for change in data.items
+    ]
+    return await _apply(db, operations, date)
+
+
+async def delete_items(db, ids: List[str], date: Optional[str] = None) -> list:
+    """Delete the listed items that are on `date` (default today); others are
+    left alone, as in set_completed_many."""
+    date = date or await _today(db)
+    object_ids = [ObjectId(item_id) for item_id in dict.fromkeys(ids)]
+    cursor = db.agenda.find({"_id": {"$in": object_ids}, "date": date}, {"_id": 1})
+    found = [doc["_id"] for doc in await cursor.to_list(length=len(object_ids))]
+    fresh = await _apply(db, [DeleteOne({"_id": item_id, "date": date}) for item_id in found], date)
+    await search.remove_documents(db, "agenda", [str(item_id) for item_id in found])
+    return fresh
+
+
+async def reorder(db, data: AgendaReorderIn) -> list:
+    """Give the listed items the slots they already occupy, in the new order.
+
+    Reusing their current positions leaves every item that wasn't listed
+    exactly where it was relative to them.
+    """
+    date = data.date or await _today(db)
+    ids = [ObjectId(item_id) for item_id in dict.fromkeys(data.ids)]
+    cursor = db.agenda.find({"_id": {"$in": ids}, "date": date}, {"position": 1, "createdAt": 1})
+    found = {doc["_id"]: doc for doc in await cursor.to_list(length=len(ids))}
+    slots = sorted(
+        doc.get("position") or _position(doc["createdAt"].replace(tzinfo=timezone.utc))
+        for doc in found.values()
+    )
+    ordered = [item_id for item_id in ids if item_id in found]
+    operations = [
+        UpdateOne({"_id": item_id}, {"$set": {"position": slot}})
+        for item_id, slot in zip(ordered, slots)
+    ]
+    return await _apply(db, operations, date)
+
+
+async def carry_and_list(db, today: Optional[str] = None) -> tuple:
+    """Copy yesterday's unfinished items to today and return (number carried,
+    today's full list).
+
+    One read covers both days, since yesterday's open items, what has already
+    been carried (so a second run doesn't duplicate) and today's list all come
+    from the same two dates. One bulk_write does the inserts, and the carried
+    items sort last (newest positions), so the list needs no second read.
+    """
+    today = today or await _today(db)
+    yesterday = days.shift(today, -1)
+
+    cursor = db.agenda.find({"date": {"$in": [yesterday, today]}}).sort([("position", 1), ("createdAt", 1)])
+    docs = await cursor.to_list(length=200)
+    today_items = [d for d in docs if d["date"] == today]
+    already_carried = {d["content"] for d in today_items if d.get("carriedFrom") == yesterday}
+
+    now = datetime.now(timezone.utc)
+    carried = []
+    for item in docs:
+        if item["date"] != yesterday or item["completed"] or item["content"] in already_carried:
+            continue
+        already_carried.add(item["content"])
+        carried.append(_new_item(
+            item["content"], today, now, _position(now, len(carried)),
+            carried_from=yesterday, source=item.get("source", "system"),
+        ))
+
+    if carried:
+        await db.agenda.bulk_write([InsertOne(item) for item in carried], ordered=False)
+        await search.index_documents(db, "agenda", carried)
+        await summary_cache.invalidate("default", today)
+        await revisions.bump(db, "agenda", today)
+    return len(carried), today_items + carried
+
+
+async def carryforward(db) -> int:
+    """Copy yesterday's unfinished items to today; returns how many were carried."""
+    carried, _ = await carry_and_list(db)
+    return carried
@@ -1,100 +1,127 @@
+import asyncio
 import os
-import google.generativeai as genai
+from typing import List, Optional, Sequence
+
 from dotenv import load_dotenv
+from services import prompts
+from services.log import get_logger
+from services.metrics import observe_call, prompt_tokens
 
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+logger = get_logger(__name__)
+
+# How long a caller waits for the model before using the local insight
+# (services.facts) instead
+TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "20"))
+
+_genai = None
+
+
+def available() -> bool:
+    """Whether Gemini is configured at all. Without a key every call would
+    fail, so callers go straight to the local insight."""
+    return bool(os.getenv("GEMINI_API_KEY"))
+
+
+def get_genai():
+    """
+    Import and configure the Gemini SDK on first use. It takes most of a
+    second to import, so we don't pay for it on cold starts that never
+    generate a summary.
+    """
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+        _genai = genai
+    return _genai
+
+
+# Tried in order until one answers
+MODELS = [
+    "gemini-2.0-flash-lite",
+    "gemini-2.0-flash",
+    "gemini-1.5-flash",
+    "gemini-1.5-pro"
+]
+
 
-async def generate_ai_summary(logs: list, agenda: list, notes: list, stats: dict) -> str:
+class GeminiModel:
+    """
+    Text generation with fallback across MODELS. Anything with the same
+    `generate` coroutine can stand in for it (a fake in tests, another
+    provider), since callers take the model as an argument.
+    """
+
+    def __init__(self, models: List[str] = MODELS):
+        self.models = models
+
+    async def generate(self, prompt: str) -> str:
+        """The first model's answer; "" if every model fails."""
+        last_error = None
+        genai = get_genai()
+        for model_name in self.models:
+            try:
+                model = genai.GenerativeModel(model_name)
+                async with observe_call("gemini"):
+                    response = await model.generate_content_async(prompt)
+                logger.debug("gemini model succeeded", extra={"model": model_name})
+                return response.text.strip()
+            except Exception as e:
+                logger.info("gemini model failed", extra={"model": model_name, "error": str(e)})
+                last_error = e
+                continue
+
+        logger.warning("all gemini models failed", extra={"error": str(last_error)})
+        return ""
+
+
+default_model = GeminiModel()
+
+
+async def complete(
+    prompt: prompts.Prompt, kind: str = "day", model=None, timeout: Optional[float] = TIMEOUT_SECONDS,
+) -> str:
+    """Send a built prompt to `model` (Gemini by default). Returns "" if
+    Gemini isn't configured or no answer comes within `timeout` seconds."""
+    if model is None and not available():
+        return ""
+    prompt_tokens.observe(prompt.tokens, kind=kind)
+    if prompt.trimmed:
+        logger.debug("prompt trimmed to budget", extra={"tokens": prompt.tokens, "trimmed": prompt.trimmed})
+    try:
+        return await asyncio.wait_for((model or default_model).generate(prompt.text), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("AI model timed out", extra={"kind": kind, "timeout": timeout})
+        return ""
+
+
+async def generate_insight(
+    digest: dict, period: Optional[str] = None, model=None, facts: Sequence[str] = (),
+) -> str:
+    """
+    A short plain-English insight for a digest (services.prompts): a day's,
+    or a merged week's / month's with `period` set. `facts` are locally
+    computed observations (services.facts) for the model to build on.
+    Returns "" if the model has nothing, so callers can fall back to the
+    local insight.
+    """
+    return await complete(prompts.build_prompt(digest, period, facts=facts), period or "day", model)
+
+
+async def generate_ai_summary(
+    logs: list,
+    agenda: list,
+    notes: list,
+    stats: dict,
+    model=None,
+    facts: Sequence[str] = (),
+    interval_minutes: int = 15,
+) -> str:
     """
     Generate a meaningful plain-English insight about yesterday's productivity.
     Returns a short HTML-safe string to embed in the email.
     """
-
-    models_to_try = [
-        "gemini-2.0-flash-lite",
-        "gemini-2.0-flash",
-        "gemini-1.5-flash",
-        "gemini-1.5-pro"
-    ]
-    last_error = None
-
-    # Build a clean readable version of the day for the prompt
-    category_breakdown = stats.get("categoryBreakdown", {})
-    tracked = stats.get("trackedCount", 0)
-    untracked_pct = stats.get("untrackedPercent", 0)
-    total = stats.get("totalPings", 0)
-
-    # Time per category (assuming 15 min intervals)
-    interval = 15
-    time_lines = []
-    for cat, count in sorted(category_breakdown.items(), key=lambda x: -x[1]):
-        minutes = count * interval
-        hours = minutes // 60
-        mins = minutes % 60
-        time_str = f"{hours}h {mins}m" if hours > 0 else f"{mins}m"
-        time_lines.append(f"- {cat.replace('_', ' ').title()}: {time_str}")
-
-    # Log responses (what they actually did)
-    activities = []
-    for log in logs:
-        if log.get("response"):
-            activities.append(log["response"])
-    activities_text = "\n".join(f"- {a}" for a in activities[:30])  # cap at 30
-
-    # Agenda summary
-    completed = [i["content"] for i in agenda if i.get("completed")]
-    pending = [i["content"] for i in agenda if not i.get("completed")]
-
-    # Notes
-    notes_text = "\n".join(f"- {n['content']}" for n in notes) if notes else "None"
-
-    prompt = f"""
-You are a personal productivity coach giving a warm, honest, and insightful recap of someone's previous day.
-
-Here is their data:
-
-TRACKED TIME BREAKDOWN:
-{chr(10).join(time_lines) if time_lines else "No tracked time"}
-
-UNTRACKED: {untracked_pct}% of the day ({total} total pings)
-
-WHAT THEY ACTUALLY DID (their own words):
-{activities_text if activities_text else "No responses logged"}
-
-AGENDA COMPLETED ({len(completed)}/{len(completed) + len(pending)}):
-Completed: {", ".join(completed) if completed else "None"}
-Incomplete: {", ".join(pending) if pending else "None"}
-
-NOTES THEY CAPTURED:
-{notes_text}
-
-Write a SHORT, warm, human insight (4-6 sentences max) covering:
-1. What kind of day it was overall (focused? scattered? balanced?)
-2. One specific observation about their work pattern based on what they did
-3. One honest nudge or encouragement based on incomplete tasks or untracked time
-4. One thing to carry into today
-
-Rules:
-- Do NOT use bold (**) or markdown
-- Do NOT use bullet points
-- Write in flowing sentences like a thoughtful friend, not a corporate report
-- Be specific — mention actual activities they logged, not generic advice
-- Keep it under 100 words
-"""
-
-    for model_name in models_to_try:
-        try:
-            print(f"DEBUG: Trying Gemini model: {model_name}", flush=True)
-            model = genai.GenerativeModel(model_name)
-            response = await model.generate_content_async(prompt)
-            print(f"DEBUG: Successfully used model: {model_name}", flush=True)
-            return response.text.strip()
-        except Exception as e:
-            print(f"DEBUG: Model {model_name} failed: {e}", flush=True)
-            last_error = e
-            continue
-
-    print(f"DEBUG: All Gemini models failed: {last_error}", flush=True)
-    return ""  # Return empty string so email still sends without AI section
\ No newline at end of file
+    digest = prompts.day_digest(logs, agenda, notes, stats, interval_minutes=interval_minutes)
+    return await generate_insight(digest, model=model, facts=facts)
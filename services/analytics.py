@@ -0,0 +1,186 @@
+"""
+Column-oriented analytics over the ping history.
+
+Logs are loaded once into parallel NumPy arrays — epoch seconds (int64),
+the same instants as local wall-clock seconds (int64) and category codes
+(int8) — and every query below is a handful of vectorized operations over
+those arrays instead of a Python loop per document.
+
+Local time uses each ping's own UTC offset, so a year of history in a zone
+with daylight saving lands in the right hours on both sides of a change.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+import pytz
+
+CATEGORIES = ("deep_work", "break", "meetings", "admin", "distracted", "untracked")
+CATEGORY_CODES = {cat: code for code, cat in enumerate(CATEGORIES)}
+UNTRACKED_CODE = CATEGORY_CODES["untracked"]
+
+SECONDS_PER_DAY = 86400
+
+
+def _to_epoch(ts) -> int:
+    """Mongo hands back naive UTC datetimes; treat them as such."""
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp())
+
+
+def _offsets(tz, instants: np.ndarray) -> np.ndarray:
+    return np.fromiter(
+        (datetime.fromtimestamp(int(t), tz).utcoffset().total_seconds() for t in instants),
+        dtype=np.int64,
+        count=instants.size,
+    )
+
+
+def local_seconds(ts: np.ndarray, tz_name: str = "UTC") -> np.ndarray:
+    """`ts` (epoch seconds) as seconds on the local wall clock in `tz_name`.
+
+    Looks the offset up once per distinct UTC day, at its start and end.
+    Only pings on a day where the two differ (a DST change) are looked up
+    per half hour, since offsets change on the hour or half hour.
+    """
+    if ts.size == 0:
+        return ts.copy()
+    tz = pytz.timezone(tz_name)
+    day_starts, inverse = np.unique(ts // SECONDS_PER_DAY * SECONDS_PER_DAY, return_inverse=True)
+    start = _offsets(tz, day_starts)
+    end = _offsets(tz, day_starts + SECONDS_PER_DAY - 1)
+    offsets = start[inverse]
+    changing = (start != end)[inverse]
+    if changing.any():
+        slots, slot_inverse = np.unique(ts[changing] // 1800 * 1800, return_inverse=True)
+        offsets[changing] = _offsets(tz, slots)[slot_inverse]
+    return ts + offsets
+
+
+def build_columns(logs: list, tz_name: str = "UTC") -> Dict[str, np.ndarray]:
+    """Turn a list of log documents into sorted column arrays."""
+    n = len(logs)
+    ts = np.fromiter((_to_epoch(l["timestamp"]) for l in logs), dtype=np.int64, count=n)
+    cat = np.fromiter(
+        (CATEGORY_CODES.get(l.get("category") or "untracked", UNTRACKED_CODE) for l in logs),
+        dtype=np.int8,
+        count=n,
+    )
+    order = np.argsort(ts, kind="stable")
+    ts = ts[order]
+    return {"ts": ts, "local": local_seconds(ts, tz_name), "cat": cat[order]}
+
+
+async def load_columns(db, days: int = 90, tz_name: str = "UTC") -> Dict[str, np.ndarray]:
+    """
+    Load the last `days` of pings from the live `logs` collection and the
+    `logs_archive` collection that `_delete_old_logs` moves history into.
+    """
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    query = {"timestamp": {"$gte": since}}
+    projection = {"_id": 0, "timestamp": 1, "category": 1}
+
+    archived = await db.logs_archive.find(query, projection).to_list(length=None)
+    live = await db.logs.find(query, projection).to_list(length=None)
+    return build_columns(archived + live, tz_name)
+
+
+def minutes_by_hour(
+    cols: Dict[str, np.ndarray],
+    category: str = "deep_work",
+    interval_minutes: int = 15,
+) -> list:
+    """Minutes spent in `category` for each local hour of the day (0–23)."""
+    mask = cols["cat"] == CATEGORY_CODES[category]
+    hours = (cols["local"][mask] // 3600) % 24
+    counts = np.bincount(hours, minlength=24)
+    return (counts * interval_minutes).tolist()
+
+
+def streaks(
+    cols: Dict[str, np.ndarray],
+    category: str = "deep_work",
+    tz_name: str = "UTC",
+) -> dict:
+    """Longest and current run of consecutive local days with `category` pings."""
+    mask = cols["cat"] == CATEGORY_CODES[category]
+    days = np.unique(cols["local"][mask] // SECONDS_PER_DAY)
+    if days.size == 0:
+        return {"longest": 0, "current": 0, "activeDays": 0}
+
+    # A new run starts wherever the gap to the previous active day isn't 1
+    breaks = np.flatnonzero(np.diff(days) != 1) + 1
+    bounds = np.concatenate(([0], breaks, [days.size]))
+    runs = np.diff(bounds)
+
+    now = np.array([int(datetime.now(timezone.utc).timestamp())], dtype=np.int64)
+    today = int(local_seconds(now, tz_name)[0]) // SECONDS_PER_DAY
+    current = int(runs[-1]) if today - days[-1] <= 1 else 0
+    return {"longest": int(runs.max()), "current": current, "activeDays": int(days.size)}
+
+
+def transition_matrix(cols: Dict[str, np.ndarray], max_gap_minutes: int = 30) -> dict:
+    """
+    Count category → category transitions between consecutive pings,
+    ignoring pairs separated by more than `max_gap_minutes` (sleep, pauses).
+    """
+    k = len(CATEGORIES)
+    matrix = np.zeros((k, k), dtype=np.int64)
+    if cols["ts"].size > 1:
+        ok = np.diff(cols["ts"]) <= max_gap_minutes * 60
+        src = cols["cat"][:-1][ok]
+        dst = cols["cat"][1:][ok]
+        # Flattened bincount is much faster than np.add.at for a small k×k grid
+        matrix = np.bincount(src.astype(np.int64) * k + dst, minlength=k * k).reshape(k, k)
+    return {
+        "categories": list(CATEGORIES),
+        "matrix": matrix.tolist(),
+    }
+
+
+def session_lengths(
+    cols: Dict[str, np.ndarray],
+    interval_minutes: int = 15,
+    max_gap_minutes: Optional[int] = None,
+) -> dict:
+    """
+    Per-category session statistics in minutes.
+
+    Sessions are cut exactly as services.sessions.build_sessions cuts each
+    local day (the daily summary stores those). A ping covers the time to the
+    next ping of the same day if that comes within `max_gap_minutes` (default
+    two intervals), otherwise one interval. Sessions break on a category
+    change, a longer gap or a new day.
+    """
+    ts, cat = cols["ts"], cols["cat"]
+    if ts.size == 0:
+        return {}
+    if max_gap_minutes is None:
+        max_gap_minutes = interval_minutes * 2
+
+    gap = np.diff(ts) / 60
+    follows = (np.diff(cols["local"] // SECONDS_PER_DAY) == 0) & (gap <= max_gap_minutes)
+    covered = np.full(ts.size, float(interval_minutes))
+    covered[:-1][follows] = gap[follows]
+
+    boundary = (np.diff(cat) != 0) | ~follows
+    starts = np.concatenate(([0], np.flatnonzero(boundary) + 1))
+    lengths = np.round(np.add.reduceat(covered, starts), 1)
+    session_cat = cat[starts]
+
+    result = {}
+    for code, name in enumerate(CATEGORIES):
+        sel = lengths[session_cat == code]
+        if sel.size == 0:
+            continue
+        result[name] = {
+            "count": int(sel.size),
+            "meanMinutes": round(float(sel.mean()), 1),
+            "medianMinutes": round(float(np.median(sel)), 1),
+            "longestMinutes": round(float(sel.max()), 1),
+        }
+    return result
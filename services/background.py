@@ -0,0 +1,47 @@
+"""
+Fire-and-forget tasks that must not be lost on shutdown.
+
+`spawn` schedules a coroutine (typically an outbound Telegram or email send)
+without making the request wait for it, and keeps a strong reference so the
+task isn't garbage-collected mid-flight. The app lifespan calls `drain` on
+shutdown, after the server has stopped taking requests and before the HTTP
+client is closed, so queued notifications still go out during a deploy.
+"""
+
+import asyncio
+from typing import Coroutine, Set
+
+from services.log import get_logger
+
+logger = get_logger(__name__)
+
+_tasks: Set[asyncio.Task] = set()
+
+
+def _done(task: asyncio.Task):
+    _tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("background task failed", exc_info=task.exception(), extra={"task": task.get_name()})
+
+
+def spawn(coro: Coroutine, name: str = None) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    _tasks.add(task)
+    task.add_done_callback(_done)
+    return task
+
+
+def pending() -> int:
+    return len(_tasks)
+
+
+async def drain(timeout: float = 10.0):
+    """Wait up to `timeout` seconds for outstanding tasks, then cancel the rest."""
+    if not _tasks:
+        return
+    logger.info("draining background tasks", extra={"pending": len(_tasks)})
+    done, still_running = await asyncio.wait(set(_tasks), timeout=timeout)
+    for task in still_running:
+        task.cancel()
+    if still_running:
+        logger.warning("cancelled background tasks on shutdown", extra={"cancelled": len(still_running)})
@@ -0,0 +1,140 @@
+"""
+Summary response cache.
+
+Entries are keyed by (user, date) and hold the already-serialized JSON body
+plus its ETag, so a hit costs no Mongo round trips and no re-encoding. The
+write paths (pings, notes, agenda, settings) call `invalidate` for the day
+they touched.
+
+The default backend is an in-process dict. Anything implementing the
+`CacheBackend` methods (e.g. a Redis wrapper) can be passed in instead so
+several workers share one cache. With the in-process backend and several
+workers, a write only invalidates its own worker's copy, so SUMMARY_CACHE=false
+(set by gunicorn.conf.py for multi-worker runs) turns caching off and every
+lookup builds fresh.
+"""
+
+import hashlib
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.metrics import registry
+
+
+class CacheBackend:
+    """Interface for a shared cache store. All methods are async."""
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: dict) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def delete_prefix(self, prefix: str) -> None:
+        raise NotImplementedError
+
+
+class InMemoryBackend(CacheBackend):
+    def __init__(self):
+        self._entries: Dict[str, dict] = {}
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, entry: dict) -> None:
+        self._entries[key] = entry
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header value covers `etag`."""
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class SummaryCache:
+    def __init__(self, backend: Optional[CacheBackend] = None, enabled: bool = True):
+        self.backend = backend or InMemoryBackend()
+        self.enabled = enabled
+        # Bumped on every invalidation so a miss that raced with a write
+        # doesn't store a result computed from pre-write data
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(user: str, date: str) -> str:
+        return f"summary:{user}:{date}"
+
+    async def get_or_build(
+        self,
+        user: str,
+        date: str,
+        build: Callable[[], Awaitable[Any]],
+        serialize: Callable[[Any], bytes],
+    ) -> dict:
+        """Return {data, body, etag}, building and storing it on a miss."""
+        key = self._key(user, date)
+        entry = await self.backend.get(key) if self.enabled else None
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        generation = self._generation
+        data = await build()
+        body = serialize(data)
+        entry = {"data": data, "body": body, "etag": make_etag(body)}
+        if self.enabled and generation == self._generation:
+            await self.backend.set(key, entry)
+        return entry
+
+    async def invalidate(self, user: str, date: Optional[str] = None):
+        """Drop one day's summary, or every cached day for `user`."""
+        self._generation += 1
+        self.invalidations += 1
+        if date:
+            await self.backend.delete(self._key(user, date))
+        else:
+            await self.backend.delete_prefix(f"summary:{user}:")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+summary_cache = SummaryCache(enabled=os.getenv("SUMMARY_CACHE", "true").lower() == "true")
+
+
+def _cache_metrics() -> List[str]:
+    stats = summary_cache.stats()
+    lines = []
+    for name in ("hits", "misses", "invalidations"):
+        metric = f"pingme_summary_cache_{name}_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {stats[name]}"]
+    return lines
+
+
+registry.collectors.append(_cache_metrics)
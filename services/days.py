@@ -0,0 +1,111 @@
+"""
+Local day windows.
+
+A "day" in PingMe is a calendar day in the user's timezone (settings.timezone),
+not UTC: for an Asia/Kolkata user the day starts at 18:30 UTC the evening
+before. Everything that says "today" (the summary, notes, agenda, morning
+kickoff, carry-forward, the nightly archive) resolves it here:
+
+    day = await days.today(db)     # DayWindow(date="2026-02-25", start, end, tz)
+
+`start`/`end` are the UTC bounds, [start, end), for range queries on
+timestamps. Logs and notes also get a `localDate` (YYYY-MM-DD) when they're
+written, so a day's records are an equality match on an index rather than a
+timestamp range. Agenda items already carry their local `date`.
+
+The user's timezone is cached for TIMEZONE_TTL_SECONDS. update_settings drops
+it in this process straight away; other workers pick a change up within the
+TTL. Changing the timezone doesn't rewrite the `localDate` of past records:
+they stay on the calendar day they were written in.
+"""
+
+import time
+from datetime import date as date_type, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, NamedTuple, Tuple
+
+import pytz
+from pymongo import UpdateOne
+
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+TIMEZONE_TTL_SECONDS = 60
+
+_timezones: Dict[str, Tuple[str, float]] = {}
+
+
+class DayWindow(NamedTuple):
+    date: str
+    start: datetime
+    end: datetime
+    tz: str
+
+
+@lru_cache(maxsize=512)
+def window(tz_name: str, local_date: str) -> DayWindow:
+    """UTC bounds of `local_date` in `tz_name`. DST days are 23 or 25 hours."""
+    tz = pytz.timezone(tz_name)
+    day = date_type.fromisoformat(local_date)
+    start = tz.localize(datetime.combine(day, datetime.min.time()))
+    end = tz.localize(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+    return DayWindow(local_date, start.astimezone(timezone.utc), end.astimezone(timezone.utc), tz_name)
+
+
+def local_date(tz_name: str, when: datetime) -> str:
+    """The user's calendar date at `when` (naive datetimes are UTC)."""
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.astimezone(pytz.timezone(tz_name)).strftime("%Y-%m-%d")
+
+
+def shift(local: str, days: int) -> str:
+    return (date_type.fromisoformat(local) + timedelta(days=days)).isoformat()
+
+
+async def user_timezone(db, user: str = "default") -> str:
+    cached = _timezones.get(user)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    settings = await db.settings.find_one({"userId": user}, {"timezone": 1}) or {}
+    tz_name = settings.get("timezone") or DEFAULT_TIMEZONE
+    _timezones[user] = (tz_name, time.monotonic() + TIMEZONE_TTL_SECONDS)
+    return tz_name
+
+
+def forget_timezone(user: str = "default"):
+    _timezones.pop(user, None)
+
+
+async def today(db, user: str = "default") -> DayWindow:
+    tz_name = await user_timezone(db, user)
+    return window(tz_name, local_date(tz_name, datetime.now(timezone.utc)))
+
+
+async def day(db, local: str, user: str = "default") -> DayWindow:
+    return window(await user_timezone(db, user), local)
+
+
+# Records written before localDate existed; `pingme.py backfill-local-dates` fills them in
+BACKFILL_COLLECTIONS = ("logs", "logs_archive", "notes")
+
+
+async def backfill_local_dates(db, batch_size: int = 2000) -> dict:
+    """Set `localDate` on logs and notes that lack it, from their timestamp in
+    the user's current timezone. Idempotent."""
+    tz_name = await user_timezone(db)
+    counts = {}
+    for name in BACKFILL_COLLECTIONS:
+        cursor = db[name].find({"localDate": {"$exists": False}}, {"timestamp": 1}).batch_size(batch_size)
+        operations, updated = [], 0
+        async for doc in cursor:
+            operations.append(UpdateOne(
+                {"_id": doc["_id"]}, {"$set": {"localDate": local_date(tz_name, doc["timestamp"])}},
+            ))
+            if len(operations) >= batch_size:
+                await db[name].bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await db[name].bulk_write(operations, ordered=False)
+            updated += len(operations)
+        counts[name] = updated
+    return counts
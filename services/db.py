@@ -1,5 +1,38 @@
+"""
+Managed Mongo client.
+
+`database` owns the one Motor client per process. The app lifespan opens it
+inside the running event loop (warming a few pooled connections so the first
+requests don't pay for the handshake) and closes it on shutdown; `get_db()`
+is the FastAPI dependency and the accessor everything else uses.
+
+Scripts and the bot use the same pool settings through `open_database()`:
+
+    async with open_database() as db:
+        await db.logs.count_documents({})
+
+Motor binds a client to the loop it first runs on, so a client left over from
+a loop that has since closed (asyncio.run in a script, a test client) is
+replaced rather than reused. A client handed in with `database.use_client()`
+(benchmarks swap in an in-memory one) belongs to the caller and is never
+replaced or closed here.
+
+Env: MONGODB_URI, MONGODB_DB, MONGO_MAX_POOL_SIZE (20), MONGO_MIN_POOL_SIZE
+(2), MONGO_MAX_IDLE_TIME_MS (300000), MONGO_CONNECT_TIMEOUT_MS (5000),
+MONGO_SERVER_SELECTION_TIMEOUT_MS (5000), MONGO_SOCKET_TIMEOUT_MS (30000),
+MONGO_WAIT_QUEUE_TIMEOUT_MS (5000).
+"""
+
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
+from services.metrics import MongoCommandMetrics
+from services.profiler import mongo_profiler
+from services.log import get_logger
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,10 +40,111 @@ load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI")
 MONGODB_DB = os.getenv("MONGODB_DB", "pingme")
 
-client = None
+# Command listeners attached to the client when it's created. Append to this
+# before the first get_db() call to plug in another listener.
+COMMAND_LISTENERS = [MongoCommandMetrics(), mongo_profiler]
+
+logger = get_logger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def pool_options() -> dict:
+    return {
+        "maxPoolSize": _env_int("MONGO_MAX_POOL_SIZE", 20),
+        "minPoolSize": _env_int("MONGO_MIN_POOL_SIZE", 2),
+        "maxIdleTimeMS": _env_int("MONGO_MAX_IDLE_TIME_MS", 300_000),
+        "connectTimeoutMS": _env_int("MONGO_CONNECT_TIMEOUT_MS", 5_000),
+        "serverSelectionTimeoutMS": _env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5_000),
+        "socketTimeoutMS": _env_int("MONGO_SOCKET_TIMEOUT_MS", 30_000),
+        "waitQueueTimeoutMS": _env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5_000),
+    }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class Database:
+    def __init__(self, uri: Optional[str] = None, name: Optional[str] = None):
+        self.uri = uri or MONGODB_URI
+        self.name = name or MONGODB_DB
+        self.client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._external = False
+
+    def use_client(self, client):
+        self.client = client
+        self._loop = None
+        self._external = True
+
+    def _create_client(self):
+        self.client = AsyncIOMotorClient(self.uri, event_listeners=COMMAND_LISTENERS, **pool_options())
+        self._loop = _running_loop()
+
+    def get(self):
+        if self._external:
+            return self.client[self.name]
+        if self.client is not None and self._loop is not None and self._loop.is_closed():
+            # The loop this client was bound to is gone; its sockets are dead
+            self.client = None
+        if self.client is None:
+            self._create_client()
+        elif self._loop is None:
+            # Created outside a loop; bind it to the first one it is used from
+            self._loop = _running_loop()
+        return self.client[self.name]
+
+    async def connect(self, warm: Optional[int] = None, timeout: float = 5.0):
+        """Create the client in this loop and open `warm` pooled connections.
+
+        Failure to reach the server is logged rather than raised so the app
+        still starts; /readyz reports 503 until the server comes back.
+        """
+        db = self.get()
+        warm = pool_options()["minPoolSize"] if warm is None else warm
+        try:
+            # Concurrent pings each check out their own connection
+            await asyncio.wait_for(
+                asyncio.gather(*(db.command("ping") for _ in range(max(1, warm)))),
+                timeout=timeout,
+            )
+        except Exception as e:
+            logger.warning("mongo warm-up failed", extra={"error": str(e)})
+        return db
+
+    async def ping(self, timeout: float = 2.0) -> float:
+        """Round-trip a ping with a deadline; returns latency in ms or raises."""
+        started = time.perf_counter()
+        await asyncio.wait_for(self.get().command("ping"), timeout=timeout)
+        return (time.perf_counter() - started) * 1000
+
+    async def close(self):
+        if self._external:
+            return
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self._loop = None
+
+
+database = Database()
+
 
 def get_db():
-    global client
-    if client is None:
-        client = AsyncIOMotorClient(MONGODB_URI)
-    return client[MONGODB_DB]
+    return database.get()
+
+
+@asynccontextmanager
+async def open_database(warm: int = 1):
+    """Connect the shared `database` for a script or the bot and close it after."""
+    db = await database.connect(warm=warm)
+    try:
+        yield db
+    finally:
+        await database.close()
@@ -0,0 +1,333 @@
+"""
+Read-only diagnostics and repair jobs behind the `pingme` admin CLI.
+
+Every check takes the database and returns a plain dict, so the CLI can print
+it or dump it as JSON. Independent queries inside a check run concurrently
+with asyncio.gather: on a real deployment each is a network round trip, and
+there is no reason to wait for the notes count before asking for the agenda
+count.
+
+Where send_summary has already stored a `daily_snapshots` document for a day,
+the day report reads it instead of counting raw records. A day's snapshot
+disappears into `weekly_snapshots` once the weekly rollup runs, so "missing
+snapshot" means the day has pings but is covered by neither.
+"""
+
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+
+from services import days, search
+from services.log import get_logger
+
+# Mirrors "Indexes to Create" in docs/DATA_MODELS.md
+EXPECTED_INDEXES: List[Tuple[str, List[Tuple[str, int]]]] = [
+    ("logs", [("timestamp", DESCENDING)]),
+    ("logs", [("localDate", ASCENDING), ("timestamp", ASCENDING)]),
+    ("logs", [("category", ASCENDING), ("timestamp", DESCENDING)]),
+    ("logs_archive", [("timestamp", DESCENDING)]),
+    ("logs_archive", [("localDate", ASCENDING)]),
+    ("agenda", [("date", ASCENDING), ("completed", ASCENDING)]),
+    ("agenda", [("date", ASCENDING), ("position", ASCENDING)]),
+    ("notes", [("timestamp", DESCENDING)]),
+    ("notes", [("localDate", ASCENDING), ("timestamp", ASCENDING)]),
+    ("settings", [("nextEligibleAt", ASCENDING)]),
+    ("search_index", [("terms", ASCENDING), ("timestamp", DESCENDING)]),
+    ("search_index", [("date", ASCENDING)]),
+    ("insights", [("userId", ASCENDING), ("period", ASCENDING), ("start", DESCENDING)]),
+]
+
+COLLECTIONS = (
+    "logs", "logs_archive", "notes", "agenda", "settings", "daily_snapshots",
+    "weekly_snapshots", "sessions", "search_index", "insights", "jobs", "revisions",
+    "heatmap",
+)
+
+# How many offending ids a check reports; the count is always exact
+SAMPLE_SIZE = 20
+
+logger = get_logger(__name__)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+# ── Day report ────────────────────────────────────────────────────────────────
+
+async def day_report(db, local: Optional[str] = None) -> dict:
+    """Counts for one local day (default yesterday), from its snapshot if
+    send_summary stored one, otherwise from the raw collections."""
+    started = time.perf_counter()
+    today = await days.today(db)
+    day = await days.day(db, local or days.shift(today.date, -1))
+
+    snapshot = await db.daily_snapshots.find_one({"date": day.date})
+    if snapshot:
+        stats = snapshot.get("stats", {})
+        counts = {
+            "logs": stats.get("totalPings", 0),
+            "trackedLogs": stats.get("trackedCount", 0),
+            "notes": snapshot.get("notesCount", 0),
+            "agenda": snapshot.get("agendaTotal", 0),
+            "agendaCompleted": snapshot.get("agendaCompleted", 0),
+            "sessions": snapshot.get("sessionCount", 0),
+        }
+        source = "snapshot"
+    else:
+        live, archived, tracked_live, tracked_archived, notes, agenda, completed = await asyncio.gather(
+            db.logs.count_documents({"localDate": day.date}),
+            db.logs_archive.count_documents({"localDate": day.date}),
+            db.logs.count_documents({"localDate": day.date, "skipped": False, "untracked": False}),
+            db.logs_archive.count_documents({"localDate": day.date, "skipped": False, "untracked": False}),
+            db.notes.count_documents({"localDate": day.date}),
+            db.agenda.count_documents({"date": day.date}),
+            db.agenda.count_documents({"date": day.date, "completed": True}),
+        )
+        counts = {
+            "logs": live + archived,
+            "archivedLogs": archived,
+            "trackedLogs": tracked_live + tracked_archived,
+            "notes": notes,
+            "agenda": agenda,
+            "agendaCompleted": completed,
+        }
+        source = "counts"
+
+    return {"date": day.date, "timezone": day.tz, "source": source, "counts": counts, "tookMs": _elapsed_ms(started)}
+
+
+# ── Integrity checks ──────────────────────────────────────────────────────────
+
+def _result(offenders: list) -> dict:
+    return {"ok": not offenders, "count": len(offenders), "samples": offenders[:SAMPLE_SIZE]}
+
+
+async def check_carryforwards(db, since: str) -> dict:
+    """Carried agenda items whose source item no longer exists on the day
+    they came from, and items carried more than once into the same day."""
+    carried = await db.agenda.find(
+        {"date": {"$gte": since}, "carriedFrom": {"$ne": None}}, {"date": 1, "content": 1, "carriedFrom": 1},
+    ).to_list(length=None)
+    source_days = sorted({item["carriedFrom"] for item in carried})
+    sources = await db.agenda.find({"date": {"$in": source_days}}, {"date": 1, "content": 1}).to_list(length=None)
+    present = {(item["date"], item["content"]) for item in sources}
+
+    orphans = [str(i["_id"]) for i in carried if (i["carriedFrom"], i["content"]) not in present]
+    copies = Counter((i["date"], i["carriedFrom"], i["content"]) for i in carried)
+    duplicates = [
+        {"date": d, "carriedFrom": f, "content": c, "copies": n} for (d, f, c), n in copies.items() if n > 1
+    ]
+    return {"orphans": _result(orphans), "duplicates": _result(duplicates)}
+
+
+def _covered_by_weeks(weeks: List[dict], date: str) -> bool:
+    return any(w["weekStart"] <= date <= w.get("weekEnd", w["weekStart"]) for w in weeks)
+
+
+async def check_snapshots(db, since: str, until: str) -> dict:
+    """Days in [since, until] with pings but no daily or weekly snapshot."""
+    window = {"localDate": {"$gte": since, "$lte": until}}
+    archived, live, snapshots, weeks = await asyncio.gather(
+        db.logs_archive.distinct("localDate", window),
+        db.logs.distinct("localDate", window),
+        db.daily_snapshots.distinct("date", {"date": {"$gte": since, "$lte": until}}),
+        db.weekly_snapshots.find(
+            {"weekEnd": {"$gte": since}}, {"weekStart": 1, "weekEnd": 1},
+        ).to_list(length=None),
+    )
+    have = set(snapshots)
+    missing = sorted(
+        d for d in set(archived) | set(live)
+        if d and d not in have and not _covered_by_weeks(weeks, d)
+    )
+    return _result(missing)
+
+
+async def _duplicate_timestamps(collection, since: str) -> list:
+    pipeline = [
+        {"$match": {"localDate": {"$gte": since}}},
+        {"$group": {"_id": "$timestamp", "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}},
+    ]
+    return [
+        {"collection": collection.name, "timestamp": doc["_id"], "copies": doc["count"]}
+        async for doc in collection.aggregate(pipeline)
+    ]
+
+
+async def check_duplicate_logs(db, since: str) -> dict:
+    """Logs with the same timestamp in one collection, and logs present in
+    both `logs` and `logs_archive` (an archive move that died before its
+    delete; the next send_summary finishes it)."""
+    live_dupes, archived_dupes, live_ids = await asyncio.gather(
+        _duplicate_timestamps(db.logs, since),
+        _duplicate_timestamps(db.logs_archive, since),
+        db.logs.distinct("_id"),
+    )
+    in_both = [str(i) for i in await db.logs_archive.distinct("_id", {"_id": {"$in": live_ids}})] if live_ids else []
+    return {"sameTimestamp": _result(live_dupes + archived_dupes), "liveAndArchived": _result(in_both)}
+
+
+async def check_local_dates(db) -> dict:
+    """Records from before localDate existed; `pingme backfill-local-dates` fixes them."""
+    counts = await asyncio.gather(*(
+        db[name].count_documents({"localDate": {"$exists": False}}) for name in days.BACKFILL_COLLECTIONS
+    ))
+    missing = [
+        {"collection": name, "count": count} for name, count in zip(days.BACKFILL_COLLECTIONS, counts) if count
+    ]
+    return _result(missing)
+
+
+async def check_jobs(db, since: str, until: str) -> dict:
+    """Job runs in the window that never finished; the next trigger for the
+    same day would resume them, but a past day has no next trigger."""
+    stuck = await db.jobs.find(
+        {"date": {"$gte": since, "$lte": until}, "status": {"$ne": "done"}},
+        {"status": 1, "stages": 1, "lastError": 1},
+    ).to_list(length=None)
+    return _result([
+        {"job": j["_id"], "status": j.get("status"), "done": list(j.get("stages") or {}), "error": j.get("lastError")}
+        for j in stuck
+    ])
+
+
+async def integrity(db, window_days: int = 30) -> dict:
+    started = time.perf_counter()
+    today = await days.today(db)
+    since = days.shift(today.date, -window_days)
+    yesterday = days.shift(today.date, -1)
+
+    carryforwards, snapshots, duplicates, local_dates, unfinished = await asyncio.gather(
+        check_carryforwards(db, since),
+        check_snapshots(db, since, yesterday),
+        check_duplicate_logs(db, since),
+        check_local_dates(db),
+        check_jobs(db, since, yesterday),
+    )
+    checks = {
+        "orphanCarryForwards": carryforwards["orphans"],
+        "duplicateCarryForwards": carryforwards["duplicates"],
+        "missingSnapshots": snapshots,
+        "duplicateLogs": duplicates["sameTimestamp"],
+        "logsLiveAndArchived": duplicates["liveAndArchived"],
+        "missingLocalDate": local_dates,
+        "unfinishedJobs": unfinished,
+    }
+    return {
+        "since": since,
+        "until": yesterday,
+        "ok": all(c["ok"] for c in checks.values()),
+        "checks": checks,
+        "tookMs": _elapsed_ms(started),
+    }
+
+
+# ── Indexes and sizes ─────────────────────────────────────────────────────────
+
+def _key(keys) -> Tuple[Tuple[str, int], ...]:
+    return tuple((field, int(direction)) for field, direction in keys)
+
+
+async def index_status(db, create: bool = False) -> dict:
+    """Expected indexes (docs/DATA_MODELS.md) that exist or are missing;
+    `create` builds the missing ones."""
+    started = time.perf_counter()
+    names = sorted({name for name, _ in EXPECTED_INDEXES})
+    infos = await asyncio.gather(*(db[name].index_information() for name in names))
+    existing: Dict[str, set] = {
+        name: {_key(spec["key"]) for spec in info.values()} for name, info in zip(names, infos)
+    }
+
+    missing = [(name, keys) for name, keys in EXPECTED_INDEXES if _key(keys) not in existing[name]]
+    if create and missing:
+        await asyncio.gather(*(db[name].create_index(keys) for name, keys in missing))
+
+    return {
+        "ok": not missing or create,
+        "present": len(EXPECTED_INDEXES) - len(missing),
+        "missing": [{"collection": name, "keys": dict(keys)} for name, keys in missing],
+        "created": len(missing) if create else 0,
+        "tookMs": _elapsed_ms(started),
+    }
+
+
+async def ensure_indexes(db) -> int:
+    """Build whichever expected indexes are missing; returns how many. The app
+    runs this at startup, so a fresh deployment gets the trigger's
+    nextEligibleAt index and the localDate indexes without anyone having to
+    run `pingme indexes --create`."""
+    created = (await index_status(db, create=True))["created"]
+    if created:
+        logger.info("created missing indexes", extra={"count": created})
+    return created
+
+
+async def _collection_size(db, name: str) -> dict:
+    try:
+        stats = await db.command({"collStats": name})
+    except (OperationFailure, NotImplementedError):
+        # mongomock and restricted users have no collStats
+        return {"count": await db[name].estimated_document_count()}
+    return {
+        "count": stats.get("count", 0),
+        "sizeBytes": stats.get("size", 0),
+        "storageBytes": stats.get("storageSize", 0),
+        "indexBytes": stats.get("totalIndexSize", 0),
+        "avgDocBytes": stats.get("avgObjSize", 0),
+    }
+
+
+async def collection_sizes(db) -> dict:
+    started = time.perf_counter()
+    existing = set(await db.list_collection_names())
+    names = [name for name in COLLECTIONS if name in existing]
+    sizes = await asyncio.gather(*(_collection_size(db, name) for name in names))
+    return {"collections": dict(zip(names, sizes)), "tookMs": _elapsed_ms(started)}
+
+
+# ── Repairs ───────────────────────────────────────────────────────────────────
+
+async def rebuild_snapshots(db, since: str, until: str, force: bool = False) -> dict:
+    """Store daily snapshots for days in [since, until] that have pings but
+    none (or, with `force`, replace them). Days already rolled into a weekly
+    snapshot are left alone so the next weekly rollup doesn't count them twice.
+    Rebuilt snapshots carry no AI summary text."""
+    from routers.summary import _save_daily_snapshot, get_summary
+
+    started = time.perf_counter()
+    window = {"localDate": {"$gte": since, "$lte": until}}
+    archived, live, weeks = await asyncio.gather(
+        db.logs_archive.distinct("localDate", window),
+        db.logs.distinct("localDate", window),
+        db.weekly_snapshots.find({"weekEnd": {"$gte": since}}, {"weekStart": 1, "weekEnd": 1}).to_list(length=None),
+    )
+    dates = sorted(d for d in set(archived) | set(live) if d and not _covered_by_weeks(weeks, d))
+    if force:
+        await db.daily_snapshots.delete_many({"date": {"$in": dates}})
+    else:
+        have = set(await db.daily_snapshots.distinct("date", {"date": {"$in": dates}}))
+        dates = [d for d in dates if d not in have]
+
+    for date in dates:
+        summary = await get_summary(db, await days.day(db, date), archived=True)
+        await _save_daily_snapshot(db, summary, "", rebuilt_at=datetime.now(timezone.utc))
+    return {"rebuilt": dates, "tookMs": _elapsed_ms(started)}
+
+
+async def rebuild_search(db) -> dict:
+    started = time.perf_counter()
+    counts = await search.rebuild(db)
+    return {**counts, "tookMs": _elapsed_ms(started)}
+
+
+async def backfill_local_dates(db) -> dict:
+    started = time.perf_counter()
+    counts = await days.backfill_local_dates(db)
+    return {**counts, "tookMs": _elapsed_ms(started)}
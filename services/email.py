@@ -1,25 +1,32 @@
 import os
-import httpx
 from dotenv import load_dotenv
+from services.http import get_http_client
+from services.metrics import observe_call
 
 load_dotenv()
 
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 SUMMARY_EMAIL = os.getenv("SUMMARY_EMAIL")
+RESEND_API_URL = os.getenv("RESEND_API_URL", "https://api.resend.com")
 
-async def send_email(subject: str, html: str):
-    url = "https://api.resend.com/emails"
+async def send_email(subject: str, html: str, idempotency_key: str = None):
+    url = f"{RESEND_API_URL}/emails"
     headers = {
         "Authorization": f"Bearer {RESEND_API_KEY}",
         "Content-Type": "application/json"
     }
+    if idempotency_key:
+        # Resend drops a repeat of the same key for 24h, so a retry after a
+        # crash between its accepting the email and us recording that can't
+        # deliver it twice
+        headers["Idempotency-Key"] = idempotency_key
     payload = {
         "from": "PingMe <onboarding@resend.dev>",  # Using default resend domain for now
         "to": [SUMMARY_EMAIL],
         "subject": subject,
         "html": html
     }
-    async with httpx.AsyncClient(timeout=15.0) as client:
-        response = await client.post(url, headers=headers, json=payload)
+    async with observe_call("resend"):
+        response = await get_http_client().post(url, headers=headers, json=payload, timeout=15.0)
         response.raise_for_status()
         return response.json()
@@ -102,8 +102,16 @@ def generate_pie_chart_svg(category_breakdown: dict, size: int = 200) -> str:
     return svg
 
 
-def generate_bar_chart_svg(category_breakdown: dict, interval_minutes: int = 15) -> str:
-    """Generate an inline SVG horizontal bar chart."""
+def generate_bar_chart_svg(
+    category_breakdown: dict,
+    interval_minutes: int = 15,
+    category_minutes: dict = None,
+) -> str:
+    """
+    Generate an inline SVG horizontal bar chart.
+    Bar labels use real session minutes when `category_minutes` is given,
+    otherwise ping count × `interval_minutes`.
+    """
 
     colors = {
         "deep_work": "#4ade80",
@@ -139,7 +147,10 @@ def generate_bar_chart_svg(category_breakdown: dict, interval_minutes: int = 15)
     for i, (cat, count) in enumerate(sorted(category_breakdown.items(), key=lambda x: -x[1])):
         y = i * (bar_height + gap) + 5
         bar_w = int((count / max_val) * bar_max_width) if max_val > 0 else 0
-        minutes = count * interval_minutes
+        if category_minutes is not None:
+            minutes = int(round(category_minutes.get(cat, 0)))
+        else:
+            minutes = count * interval_minutes
         hours = minutes // 60
         mins = minutes % 60
         time_str = "{}h {}m".format(hours, mins) if hours > 0 else "{}m".format(mins)
@@ -165,6 +176,91 @@ def generate_bar_chart_svg(category_breakdown: dict, interval_minutes: int = 15)
     )
 
 
+def generate_heatmap_svg(grid: list, dominant: list = None, category: str = None) -> str:
+    """
+    Generate an inline SVG weekday × hour heatmap.
+    `grid` is 7 rows (Monday first) of 24 ping counts. A cell's opacity
+    follows its count. Its colour is `category`'s, or the cell's entry in
+    `dominant` (its most-logged category) when showing every category.
+    """
+
+    colors = {
+        "deep_work": "#4ade80",
+        "break": "#60a5fa",
+        "admin": "#c084fc",
+        "meetings": "#fbbf24",
+        "distracted": "#f87171",
+        "untracked": "#6b7280",
+    }
+
+    labels = {
+        "deep_work": "Deep Work",
+        "break": "Break",
+        "admin": "Admin",
+        "meetings": "Meetings",
+        "distracted": "Distracted",
+        "untracked": "Untracked",
+    }
+
+    weekdays = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+    max_val = max((max(row) for row in grid), default=0)
+    if max_val == 0:
+        return "<p style='color:#6b7280;text-align:center;'>No data yet</p>"
+
+    cell = 18
+    gap = 3
+    label_width = 36
+    header_height = 16
+    chart_width = label_width + 24 * (cell + gap)
+    legend_y = header_height + 7 * (cell + gap) + 16
+    chart_height = legend_y + 10
+
+    parts = []
+    for hour in range(0, 24, 3):
+        parts.append(
+            '<text x="{}" y="11" fill="#6b7280" font-size="10" font-family="Courier New, monospace">{:02d}</text>'
+            .format(label_width + hour * (cell + gap), hour)
+        )
+
+    shown = set()
+    for day, row in enumerate(grid):
+        y = header_height + day * (cell + gap)
+        parts.append(
+            '<text x="0" y="{}" fill="#9ca3af" font-size="11" font-family="Courier New, monospace">{}</text>'
+            .format(y + cell - 5, weekdays[day])
+        )
+        for hour, count in enumerate(row):
+            x = label_width + hour * (cell + gap)
+            cat = category or (dominant[day][hour] if dominant else None) or "deep_work"
+            if count:
+                shown.add(cat)
+                fill, opacity = colors.get(cat, "#6b7280"), 0.2 + 0.8 * count / max_val
+            else:
+                fill, opacity = "#1f2937", 1
+            parts.append(
+                '<rect x="{}" y="{}" width="{}" height="{}" rx="3" fill="{}" opacity="{:.2f}">'
+                '<title>{} {:02d}:00 &#8212; {} pings</title></rect>'
+                .format(x, y, cell, cell, fill, opacity, weekdays[day], hour, count)
+            )
+
+    x = label_width
+    for cat in colors:
+        if cat not in shown:
+            continue
+        label = labels.get(cat, cat)
+        parts.append(
+            '<circle cx="{}" cy="{}" r="4" fill="{}"/>'
+            '<text x="{}" y="{}" fill="#6b7280" font-size="10" font-family="Courier New, monospace">{}</text>'
+            .format(x + 4, legend_y - 4, colors[cat], x + 12, legend_y, label)
+        )
+        x += 12 + len(label) * 7 + 14
+
+    return (
+        '<svg width="{}" height="{}" viewBox="0 0 {} {}" xmlns="http://www.w3.org/2000/svg">{}</svg>'
+        .format(chart_width, chart_height, chart_width, chart_height, "".join(parts))
+    )
+
 def generate_html_email(
     logs: list,
     agenda: list,
@@ -172,9 +268,11 @@ def generate_html_email(
     stats: dict,
     date_str: str,
     interval_minutes: int = 15,
-    ai_insight: str = ""
+    ai_insight: str = "",
+    insight_title: str = "&#129302; AI INSIGHT",
 ) -> str:
-    """Generate the full HTML email with charts and optional AI insight."""
+    """Generate the full HTML email with charts and optional AI insight.
+    `insight_title` labels the insight block (the local insight isn't AI)."""
 
     category_breakdown = stats.get("categoryBreakdown", {})
     tracked = stats.get("trackedCount", 0)
@@ -182,7 +280,9 @@ def generate_html_email(
     total = stats.get("totalPings", 0)
 
     pie_svg = generate_pie_chart_svg(category_breakdown)
-    bar_svg = generate_bar_chart_svg(category_breakdown, interval_minutes)
+    bar_svg = generate_bar_chart_svg(
+        category_breakdown, interval_minutes, stats.get("minutesPerCategory")
+    )
 
     # --- Agenda ---
     completed_items = [i for i in agenda if i.get("completed")]
@@ -215,7 +315,9 @@ def generate_html_email(
     if notes:
         for note in notes:
             ts = note.get("timestamp", "")
-            if isinstance(ts, str) and "T" in ts:
+            if isinstance(ts, datetime):
+                ts = ts.strftime("%H:%M")
+            elif isinstance(ts, str) and "T" in ts:
                 try:
                     ts = datetime.fromisoformat(ts.replace("Z", "+00:00")).strftime("%H:%M")
                 except Exception:
@@ -240,7 +342,9 @@ def generate_html_email(
     }
     for log in recent_logs:
         ts = log.get("timestamp", "")
-        if isinstance(ts, str) and "T" in ts:
+        if isinstance(ts, datetime):
+            ts = ts.strftime("%H:%M")
+        elif isinstance(ts, str) and "T" in ts:
             try:
                 ts = datetime.fromisoformat(ts.replace("Z", "+00:00")).strftime("%H:%M")
             except Exception:
@@ -274,12 +378,12 @@ def generate_html_email(
             "border-left:1px solid #1f2937;border-right:1px solid #1f2937;"
             "border-top:1px solid #1a1a2e;'>"
             "<div style='font-size:11px;color:#4ade80;letter-spacing:2px;"
-            "margin-bottom:12px;'>&#129302; AI INSIGHT</div>"
+            "margin-bottom:12px;'>{}</div>"
             "<div style='font-size:14px;color:#d1fae5;font-family:Georgia,serif;"
             "line-height:1.8;font-style:italic;border-left:3px solid #4ade80;"
             "padding-left:16px;'>{}</div>"
             "</td></tr>"
-        ).format(ai_insight)
+        ).format(insight_title, ai_insight)
 
     # --- Tomorrow priorities block ---
     priorities_block = ""
@@ -0,0 +1,237 @@
+"""
+Local insight engine: concrete observations about a day or a period, computed
+from the summary and stored snapshots without any model.
+
+It answers in milliseconds and always gives the same output for the same
+data. It serves two purposes:
+
+- It is the insight itself whenever the AI is off (no GEMINI_API_KEY), slow
+  (AI_TIMEOUT_SECONDS) or fails. `render` turns the facts into a few plain
+  sentences for the email.
+- Its facts are fed to the model as pre-computed observations
+  (services.prompts), so the model only has to interpret them. The prompt
+  around them gets a smaller token budget.
+
+A day's facts need three small reads, run concurrently:
+
+- the daily snapshots of the previous two weeks;
+- the latest weekly snapshot, for days already rolled up;
+- past agenda items sharing a name with today's open items.
+
+Facts that the data can't support (no deep work today, no history to compare
+with) are left out rather than guessed.
+"""
+
+import asyncio
+import html
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+import pytz
+
+from services import days, prompts
+
+HISTORY_DAYS = 14
+# A comparison needs at least this many earlier days to be worth stating
+MIN_BASELINE_DAYS = 2
+
+
+class Fact(NamedTuple):
+    kind: str
+    text: str
+
+
+def _duration(minutes: float) -> str:
+    minutes = int(round(minutes))
+    hours, mins = divmod(minutes, 60)
+    return f"{hours}h {mins}m" if hours else f"{mins}m"
+
+
+def _local(ts, tz) -> datetime:
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)).astimezone(tz)
+
+
+def _deep_minutes(minutes_per_category: dict) -> float:
+    return minutes_per_category.get("deep_work", 0)
+
+
+# ── History ───────────────────────────────────────────────────────────────────
+
+class History(NamedTuple):
+    # date → deep work minutes, for every earlier day we know about
+    deep_work: Dict[str, float]
+    # date → (agenda done, agenda total), where known
+    agenda: Dict[str, tuple]
+    # open item content → days in a row it was on the agenda before today
+    carried_days: Dict[str, int]
+
+
+async def load_history(db, summary: dict) -> History:
+    today = summary["date"]
+    since = days.shift(today, -HISTORY_DAYS)
+    open_items = [i["content"] for i in summary["agenda"] if not i.get("completed")]
+
+    daily, weekly, past_items = await asyncio.gather(
+        db.daily_snapshots.find(
+            {"date": {"$gte": since, "$lt": today}},
+            {"date": 1, "stats.minutesPerCategory": 1, "hoursPerCategory": 1, "agendaCompleted": 1, "agendaTotal": 1},
+        ).to_list(length=HISTORY_DAYS),
+        db.weekly_snapshots.find({"weekEnd": {"$gte": since, "$lt": today}}).sort("weekEnd", -1).to_list(length=2),
+        db.agenda.find(
+            {"date": {"$gte": since, "$lt": today}, "content": {"$in": open_items}}, {"date": 1, "content": 1},
+        ).to_list(length=None) if open_items else asyncio.sleep(0, []),
+    )
+
+    deep_work, agenda = {}, {}
+    for week in weekly:
+        # Rolled-up weeks only keep per-day deep work
+        for part in prompts.weekly_snapshot_digest(week)["parts"]:
+            deep_work.setdefault(part["start"], part["deepWorkMinutes"])
+    for snap in daily:
+        minutes = (snap.get("stats") or {}).get("minutesPerCategory") or {
+            cat: hours * 60 for cat, hours in (snap.get("hoursPerCategory") or {}).items()
+        }
+        deep_work[snap["date"]] = _deep_minutes(minutes)
+        if snap.get("agendaTotal"):
+            agenda[snap["date"]] = (snap.get("agendaCompleted", 0), snap["agendaTotal"])
+
+    on_dates: Dict[str, set] = {}
+    for item in past_items:
+        on_dates.setdefault(item["content"], set()).add(item["date"])
+    carried_days = {}
+    for content in open_items:
+        count, day = 0, days.shift(today, -1)
+        while day in on_dates.get(content, ()):
+            count += 1
+            day = days.shift(day, -1)
+        carried_days[content] = count
+    return History(deep_work, agenda, carried_days)
+
+
+# ── Day ───────────────────────────────────────────────────────────────────────
+
+def day_facts(summary: dict, history: History) -> List[Fact]:
+    """Observations about `summary` (see routers.summary.get_summary)."""
+    today = summary["date"]
+    tz = pytz.timezone(summary["timezone"])
+    facts: List[Fact] = []
+
+    # Longest focus session, and the run of days with deep work
+    focus = [s for s in summary["sessions"] if s.category == "deep_work"]
+    deep_today = _deep_minutes(summary["stats"].get("minutesPerCategory") or {})
+    if focus:
+        best = max(focus, key=lambda s: s.minutes)
+        facts.append(Fact("focus_session", (
+            f"Your longest focus stretch was {_duration(best.minutes)}, "
+            f"from {_local(best.start, tz):%H:%M} to {_local(best.end, tz):%H:%M}."
+        )))
+    if deep_today:
+        streak, day = 1, days.shift(today, -1)
+        while history.deep_work.get(day):
+            streak += 1
+            day = days.shift(day, -1)
+        if streak > 1:
+            facts.append(Fact("focus_streak", f"That makes {streak} days in a row with deep work."))
+
+    # Deep work against the previous week
+    week = [days.shift(today, -n) for n in range(1, 8)]
+    baseline = [history.deep_work[d] for d in week if d in history.deep_work]
+    if len(baseline) >= MIN_BASELINE_DAYS:
+        average = sum(baseline) / len(baseline)
+        delta = deep_today - average
+        if abs(delta) < 15:
+            trend = f"about your average over the last {len(baseline)} days"
+        else:
+            trend = f"{_duration(abs(delta))} {'more' if delta > 0 else 'less'} than your {len(baseline)}-day average"
+        facts.append(Fact("deep_work_trend", f"You logged {_duration(deep_today)} of deep work, {trend}."))
+
+    # Most distracted hour
+    hours = Counter(
+        _local(log["timestamp"], tz).hour for log in summary["logs"] if log.get("category") == "distracted"
+    )
+    if hours:
+        hour, count = max(hours.items(), key=lambda x: (x[1], -x[0]))
+        if count >= 2:
+            facts.append(Fact("distracted_hour", (
+                f"Distraction peaked between {hour:02d}:00 and {(hour + 1) % 24:02d}:00 ({count} pings)."
+            )))
+
+    # Agenda completion against the previous week
+    agenda = summary["agenda"]
+    if agenda:
+        done = sum(1 for i in agenda if i.get("completed"))
+        rate = round(done / len(agenda) * 100)
+        text = f"You finished {done} of {len(agenda)} agenda items ({rate}%)"
+        past = [history.agenda[d] for d in week if d in history.agenda]
+        if len(past) >= MIN_BASELINE_DAYS:
+            past_rate = round(sum(d for d, _ in past) / sum(t for _, t in past) * 100)
+            if rate > past_rate:
+                text += f", up from {past_rate}% over the previous {len(past)} days"
+            elif rate < past_rate:
+                text += f", down from {past_rate}% over the previous {len(past)} days"
+            else:
+                text += ", level with the previous days"
+        facts.append(Fact("agenda_trend", text + "."))
+
+    # Carry-forward backlog
+    open_items = [i["content"] for i in agenda if not i.get("completed")]
+    if open_items:
+        carried = {c: n for c, n in history.carried_days.items() if n}
+        text = f"{len(open_items)} item{'s' if len(open_items) != 1 else ''} will carry into tomorrow"
+        if carried:
+            oldest = max(carried, key=carried.get)
+            text += (
+                f"; \"{oldest}\" has been on the list {carried[oldest] + 1} days running"
+                if carried[oldest] >= 2 else f", {len(carried)} of them already carried over once"
+            )
+        facts.append(Fact("backlog", text + "."))
+
+    untracked = summary["stats"].get("untrackedPercent", 0)
+    if untracked >= 30:
+        facts.append(Fact("untracked", f"{untracked}% of pings went unanswered."))
+    return facts
+
+
+async def for_day(db, summary: dict) -> List[Fact]:
+    return day_facts(summary, await load_history(db, summary))
+
+
+# ── Period ────────────────────────────────────────────────────────────────────
+
+def period_facts(digest: dict) -> List[Fact]:
+    """Observations about a merged digest (services.prompts.merge_digests)."""
+    facts: List[Fact] = []
+    parts = digest["parts"]
+    deep = _deep_minutes(digest["minutesPerCategory"])
+    if deep:
+        facts.append(Fact("deep_work_total", (
+            f"{_duration(deep)} of deep work over {digest['days']} tracked days, "
+            f"{_duration(deep / max(digest['days'], 1))} a day on average."
+        )))
+    if len(parts) >= 2:
+        best = max(parts, key=lambda p: p["deepWorkMinutes"])
+        worst = max(parts, key=lambda p: p["untrackedPercent"])
+        label = lambda p: p["start"] if p["start"] == p["end"] else f"{p['start']} to {p['end']}"
+        if best["deepWorkMinutes"]:
+            facts.append(Fact("best_part", f"The most focused stretch was {label(best)} ({_duration(best['deepWorkMinutes'])})."))
+        if worst["untrackedPercent"] >= 30:
+            facts.append(Fact("least_tracked", f"{label(worst)} had the most unanswered pings ({worst['untrackedPercent']}%)."))
+    if digest["activities"]:
+        text, count = digest["activities"][0]
+        facts.append(Fact("top_activity", f"The most logged activity was \"{text}\" ({count} times)."))
+    if digest["agendaTotal"]:
+        rate = round(digest["agendaDone"] / digest["agendaTotal"] * 100)
+        facts.append(Fact("agenda_rate", (
+            f"{digest['agendaDone']} of {digest['agendaTotal']} agenda items were finished ({rate}%)."
+        )))
+    return facts
+
+
+def render(facts: List[Fact], empty: Optional[str] = "Not enough data yet for observations.") -> str:
+    """The facts as plain sentences, HTML-escaped for the email."""
+    if not facts:
+        return empty or ""
+    return html.escape(" ".join(fact.text for fact in facts), quote=False)
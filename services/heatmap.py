@@ -0,0 +1,136 @@
+"""
+Day-of-week × hour-of-day heatmap of pings, kept as a materialized view.
+
+One document per user in the `heatmap` collection holds a count per
+(local weekday, local hour, category):
+
+    {_id: "default", cells: {"0-09": {deep_work: 41, break: 3}, ...},
+     total: 1650, updatedAt, rebuiltAt}
+
+Cell keys are "<weekday>-<hour>", with Monday = 0 like `quietWindows`, taken
+in the user's timezone at the time of the ping. `record` adds each answer as
+it's logged with one `$inc` (upsert). Reading the heatmap is one `_id` lookup
+of a document with at most 7 × 24 cells, however long the history.
+
+`rebuild` (`python pingme.py heatmap-rebuild`) recomputes the document from
+`logs_archive` and `logs`, streaming them. Days whose raw logs are gone but
+whose sessions were stored with the daily snapshot are filled in from those
+sessions, with each session's pings spread evenly over its span. A rebuild
+uses the current timezone for all history, and replaces the document in one
+write. A ping answered while it is reading can be counted twice or not at
+all, which is one ping out of the whole history.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import pytz
+
+from services import days
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def _as_utc(ts) -> datetime:
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+def cell_key(when, tz_name: str) -> str:
+    local = _as_utc(when).astimezone(pytz.timezone(tz_name))
+    return f"{local.weekday()}-{local.hour:02d}"
+
+
+async def record(db, log: dict, tz_name: str, user: str = "default"):
+    """Count one logged ping."""
+    key = cell_key(log["timestamp"], tz_name)
+    await db.heatmap.update_one(
+        {"_id": user},
+        {
+            "$inc": {f"cells.{key}.{log.get('category') or 'untracked'}": 1, "total": 1},
+            "$set": {"updatedAt": datetime.now(timezone.utc)},
+        },
+        upsert=True,
+    )
+
+
+async def load(db, user: str = "default") -> dict:
+    return await db.heatmap.find_one({"_id": user}) or {"_id": user, "cells": {}, "total": 0}
+
+
+def grid(doc: dict, category: Optional[str] = None) -> List[List[int]]:
+    """7 × 24 counts (weekday rows, hour columns): pings in `category`, or all."""
+    cells = doc.get("cells") or {}
+    rows = []
+    for weekday in range(7):
+        row = []
+        for hour in range(24):
+            counts = cells.get(f"{weekday}-{hour:02d}") or {}
+            row.append(counts.get(category, 0) if category else sum(counts.values()))
+        rows.append(row)
+    return rows
+
+
+def dominant(doc: dict) -> List[List[Optional[str]]]:
+    """The most-logged category of each cell (None where there are no pings)."""
+    cells = doc.get("cells") or {}
+    return [
+        [
+            max(counts, key=counts.get) if (counts := cells.get(f"{weekday}-{hour:02d}")) else None
+            for hour in range(24)
+        ]
+        for weekday in range(7)
+    ]
+
+
+async def rebuild(db, user: str = "default") -> dict:
+    """Recompute the heatmap from the stored history; returns what it counted."""
+    tz_name = await days.user_timezone(db, user)
+    cells: Dict[str, Counter] = defaultdict(Counter)
+    covered, seen = set(), set()
+    pings = 0
+
+    # An archive run that died between its insert and delete leaves a log in
+    # both collections; count it once
+    for collection in (db.logs_archive, db.logs):
+        cursor = collection.find({}, {"timestamp": 1, "category": 1, "localDate": 1}).batch_size(2000)
+        async for log in cursor:
+            if log["_id"] in seen:
+                continue
+            seen.add(log["_id"])
+            cells[cell_key(log["timestamp"], tz_name)][log.get("category") or "untracked"] += 1
+            covered.add(log.get("localDate") or days.local_date(tz_name, log["timestamp"]))
+            pings += 1
+
+    from_sessions = set()
+    async for session in db.sessions.find({}, {"_id": 0, "date": 1, "category": 1, "start": 1, "end": 1, "pings": 1}):
+        if session["date"] in covered:
+            continue
+        from_sessions.add(session["date"])
+        start, end = _as_utc(session["start"]), _as_utc(session["end"])
+        count = session.get("pings") or 1
+        step = (end - start) / count
+        for i in range(count):
+            cells[cell_key(start + step * i, tz_name)][session.get("category") or "untracked"] += 1
+        pings += count
+
+    now = datetime.now(timezone.utc)
+    await db.heatmap.replace_one(
+        {"_id": user},
+        {
+            "cells": {key: dict(counts) for key, counts in cells.items()},
+            "total": pings,
+            "timezone": tz_name,
+            "updatedAt": now,
+            "rebuiltAt": now,
+        },
+        upsert=True,
+    )
+    return {
+        "pings": pings,
+        "daysFromLogs": len(covered),
+        "daysFromSessions": len(from_sessions),
+        "timezone": tz_name,
+    }
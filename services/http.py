@@ -0,0 +1,30 @@
+"""
+Shared outbound HTTP client.
+
+Telegram and Resend calls reuse one pooled `httpx.AsyncClient` instead of
+opening a fresh connection (and TLS handshake) per message. The app lifespan
+opens it at startup and closes it on shutdown.
+"""
+
+from typing import Optional
+
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
@@ -0,0 +1,156 @@
+"""
+AI insights for past weeks and months, generated in batches.
+
+Each period's prompt is built hierarchically from stored digests
+(services.prompts):
+
+- weekly snapshots count toward the period that holds their last day, since
+  their days are gone after the rollup;
+- daily snapshots are used for the days no weekly snapshot covers.
+
+A batch reads the snapshots and existing insights for all of its periods in
+three queries. It then builds every prompt, led by the period's locally
+computed observations (services.facts), and calls the model for at most
+`concurrency` periods at a time. Results go to the `insights` collection, one
+document per (user, period, start). Periods that already have one are
+skipped unless `force`, so a batch that was cut short can simply be run
+again.
+
+The model is an argument: anything with `async generate(prompt) -> str`.
+Pass a fake to exercise a batch offline, or use `dry_run` to build the
+prompts and report their sizes without calling any model.
+
+Snapshots are not keyed by user yet (there is one user), so `user` only
+names who the stored insights belong to.
+
+Env: INSIGHT_CONCURRENCY (4).
+"""
+
+import asyncio
+import os
+from datetime import date as date_type, datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+
+from services import ai, facts, prompts
+from services.log import get_logger
+
+logger = get_logger(__name__)
+
+CONCURRENCY = int(os.getenv("INSIGHT_CONCURRENCY", "4"))
+PERIOD_KINDS = ("week", "month")
+
+
+class Period(NamedTuple):
+    kind: str
+    start: str
+    end: str
+
+
+def recent_periods(kind: str, today: str, count: int) -> List[Period]:
+    """The last `count` complete weeks (Monday to Sunday) or calendar months
+    before `today`, oldest first."""
+    current = date_type.fromisoformat(today)
+    periods = []
+    if kind == "week":
+        monday = current - timedelta(days=current.weekday())
+        for _ in range(count):
+            monday -= timedelta(days=7)
+            periods.append(Period(kind, monday.isoformat(), (monday + timedelta(days=6)).isoformat()))
+    elif kind == "month":
+        first = current.replace(day=1)
+        for _ in range(count):
+            last = first - timedelta(days=1)
+            first = last.replace(day=1)
+            periods.append(Period(kind, first.isoformat(), last.isoformat()))
+    else:
+        raise ValueError(f"unknown period kind: {kind}")
+    return periods[::-1]
+
+
+def period_digest(period: Period, daily: List[dict], weekly: List[dict]) -> Optional[dict]:
+    """The merged digest for `period` from snapshot documents; None if none
+    fall in it."""
+    weeks = [w for w in weekly if period.start <= w["weekEnd"] <= period.end]
+    covered = [(w["weekStart"], w["weekEnd"]) for w in weeks]
+    day_docs = [
+        d for d in daily
+        if period.start <= d["date"] <= period.end
+        and not any(start <= d["date"] <= end for start, end in covered)
+    ]
+    digests = [prompts.weekly_snapshot_digest(w) for w in weeks]
+    digests += [prompts.snapshot_digest(d) for d in day_docs]
+    if not digests:
+        return None
+    return prompts.merge_digests(sorted(digests, key=lambda d: d["start"]))
+
+
+async def generate(
+    db,
+    periods: List[Period],
+    model=None,
+    concurrency: int = CONCURRENCY,
+    force: bool = False,
+    dry_run: bool = False,
+    user: str = "default",
+) -> dict:
+    """Generate and store an insight per period; returns a status per period."""
+    if not periods:
+        return {"ok": True, "periods": []}
+    start = min(p.start for p in periods)
+    end = max(p.end for p in periods)
+    daily, weekly, existing = await asyncio.gather(
+        # The stored email HTML is the bulk of a snapshot and isn't needed
+        db.daily_snapshots.find({"date": {"$gte": start, "$lte": end}}, {"summaryText": 0}).to_list(length=None),
+        db.weekly_snapshots.find({"weekEnd": {"$gte": start, "$lte": end}}).to_list(length=None),
+        db.insights.find(
+            {"userId": user, "period": {"$in": list({p.kind for p in periods})}, "start": {"$gte": start, "$lte": end}},
+            {"period": 1, "start": 1},
+        ).to_list(length=None),
+    )
+    done = {(doc["period"], doc["start"]) for doc in existing}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(period: Period) -> dict:
+        result = period._asdict()
+        if not force and (period.kind, period.start) in done:
+            return {**result, "status": "exists"}
+        digest = period_digest(period, daily, weekly)
+        if digest is None:
+            return {**result, "status": "no_data"}
+        prompt = prompts.build_prompt(digest, period.kind, facts=[f.text for f in facts.period_facts(digest)])
+        result.update(promptTokens=prompt.tokens, trimmed=prompt.trimmed)
+        if dry_run:
+            return {**result, "status": "dry_run"}
+        async with semaphore:
+            text = await ai.complete(prompt, period.kind, model)
+        if not text:
+            return {**result, "status": "failed"}
+        await db.insights.update_one(
+            {"userId": user, "period": period.kind, "start": period.start},
+            {"$set": {
+                "end": period.end,
+                "generatedAt": datetime.now(timezone.utc),
+                "insight": text,
+                "promptTokens": prompt.tokens,
+                "stats": {
+                    "daysTracked": digest["days"],
+                    "totalPings": digest["totalPings"],
+                    "minutesPerCategory": digest["minutesPerCategory"],
+                    "topActivity": digest["activities"][0][0] if digest["activities"] else None,
+                },
+            }},
+            upsert=True,
+        )
+        return {**result, "status": "generated"}
+
+    outcomes = await asyncio.gather(*(run(p) for p in periods), return_exceptions=True)
+    results = []
+    for period, outcome in zip(periods, outcomes):
+        if isinstance(outcome, Exception):
+            logger.warning("insight failed", extra={"period": period.kind, "start": period.start, "error": str(outcome)})
+            outcome = {**period._asdict(), "status": "error", "error": str(outcome)}
+        results.append(outcome)
+    return {
+        "ok": not any(r["status"] in ("failed", "error") for r in results),
+        "periods": results,
+    }
@@ -0,0 +1,152 @@
+"""
+Job ledger for multi-stage jobs whose side effects must not repeat.
+
+Each run of a job (e.g. the daily summary for one user and date) has one
+document in the `jobs` collection:
+
+    {_id: "summary:default:2026-02-25", kind, user, date, runId, status,
+     stages: {ai: {doneAt, html, ...}, email: {doneAt}, ...},
+     lease: {owner, until}, attempts, startedAt, finishedAt, lastError}
+
+A run starts by taking the lease. One find_one_and_update (upsert) succeeds
+only if no one holds an unexpired lease and the job isn't done. If someone
+else holds it, the upsert collides on _id and `acquire` returns None. Before
+each next stage starts, the previous stage's completion is recorded, along
+with anything a rerun needs: the generated email HTML, so Gemini isn't asked
+twice. Recording renews the lease. If the process dies, the lease expires
+after LEASE_SECONDS. The next attempt takes the lease over and skips every
+stage already recorded.
+
+Within one process, `coalesce` makes concurrent callers share a single run
+instead of queueing on the lease; callers in other processes `wait` on the
+ledger.
+"""
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from services.log import get_logger
+
+logger = get_logger(__name__)
+
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+class LeaseLost(Exception):
+    """Another run took the job over after this one's lease expired."""
+
+
+def job_id(kind: str, user: str, date: str) -> str:
+    return f"{kind}:{user}:{date}"
+
+
+def _lease(owner: str, now: datetime) -> dict:
+    return {"owner": owner, "until": now + timedelta(seconds=LEASE_SECONDS)}
+
+
+class Job:
+    def __init__(self, db, doc: dict, owner: str):
+        self.db = db
+        self.doc = doc
+        self.owner = owner
+        # Stages already recorded when this attempt started
+        self.resumed: List[str] = list(doc.get("stages") or {})
+
+    @property
+    def id(self) -> str:
+        return self.doc["_id"]
+
+    @property
+    def run_id(self) -> str:
+        return self.doc["runId"]
+
+    def done(self, stage: str) -> bool:
+        return stage in (self.doc.get("stages") or {})
+
+    def result(self, stage: str) -> dict:
+        return (self.doc.get("stages") or {}).get(stage) or {}
+
+    async def _update(self, fields: dict):
+        result = await self.db.jobs.update_one({"_id": self.id, "lease.owner": self.owner}, {"$set": fields})
+        if result.matched_count == 0:
+            raise LeaseLost(self.id)
+
+    async def complete(self, stage: str, **result):
+        """Record `stage` as done (with `result`) and renew the lease."""
+        now = datetime.now(timezone.utc)
+        entry = {"doneAt": now, **result}
+        await self._update({f"stages.{stage}": entry, "lease": _lease(self.owner, now)})
+        self.doc.setdefault("stages", {})[stage] = entry
+
+    async def finish(self):
+        await self._update({"status": "done", "finishedAt": datetime.now(timezone.utc), "lease": None})
+
+    async def fail(self, error: str):
+        """Release the lease so the next trigger retries from the failed stage."""
+        try:
+            await self._update({"status": "failed", "lastError": error, "lease": None})
+        except LeaseLost:
+            pass
+
+
+async def acquire(db, kind: str, user: str, date: str, reset: bool = False) -> Optional[Job]:
+    """Take the lease on a job, creating it if needed. None if another run
+    holds it or (unless `reset`) it has already finished. `reset` starts a
+    new run with no stages done."""
+    key = job_id(kind, user, date)
+    now = datetime.now(timezone.utc)
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    query = {"_id": key, "$or": [{"lease": None}, {"lease.until": {"$lte": now}}]}
+    if not reset:
+        query["status"] = {"$ne": "done"}
+    fields = {"lease": _lease(owner, now), "status": "running", "startedAt": now}
+    on_insert = {"kind": kind, "user": user, "date": date}
+    new_run = {"runId": uuid.uuid4().hex, "stages": {}}
+    # A reset forgets the stages of the previous run
+    (fields if reset else on_insert).update(new_run)
+    update = {"$set": fields, "$setOnInsert": on_insert, "$inc": {"attempts": 1}}
+
+    try:
+        doc = await db.jobs.find_one_and_update(query, update, upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError:
+        return None
+    if doc.get("stages"):
+        logger.info("resuming job", extra={"job": key, "done": list(doc.get("stages") or {})})
+    return Job(db, doc, owner)
+
+
+async def get(db, key: str) -> Optional[dict]:
+    return await db.jobs.find_one({"_id": key})
+
+
+async def wait(db, key: str, timeout: float, interval: float = 1.0) -> Optional[dict]:
+    """Poll until no one holds the job's lease (or `timeout` passes); returns
+    the job as last seen."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        doc = await get(db, key)
+        if not doc or not doc.get("lease") or asyncio.get_running_loop().time() >= deadline:
+            return doc
+        await asyncio.sleep(interval)
+
+
+async def coalesce(key: str, run: Callable[[], Awaitable[dict]]) -> dict:
+    """Run `run()` once per key at a time in this process: callers that
+    arrive while it's running get the same result. The run is shielded, so a
+    caller going away (a dropped HTTP request) doesn't abandon it midway."""
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(run())
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(future)
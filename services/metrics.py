@@ -0,0 +1,196 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+A deliberately small registry — counters and histograms with labels — so
+PingMe doesn't need prometheus_client. `MetricsMiddleware` times every HTTP
+request by route template, `observe_call` wraps outbound Telegram / Resend /
+Gemini calls, and `MongoCommandMetrics` is a pymongo command listener that
+counts and times every command sent to Mongo. GET /metrics renders it all.
+"""
+
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join('{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs)
+    return "{" + body + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        # label key → [bucket counts..., +Inf count, sum]
+        self.values: Dict[LabelKey, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        row = self.values.get(key)
+        if row is None:
+            row = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+        row[-2] += 1
+        row[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in self.values.items():
+            for bound, count in zip(self.buckets, row):
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', repr(bound))])} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {row[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {row[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {row[-2]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+        # Callables returning extra exposition lines (e.g. cache stats)
+        self.collectors: List[Callable[[], List[str]]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        metric = Counter(name, help_text)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "pingme_http_requests_total", "HTTP requests by route, method and status."
+)
+http_latency = registry.histogram(
+    "pingme_http_request_duration_seconds", "HTTP request latency by route and method."
+)
+mongo_commands = registry.counter(
+    "pingme_mongo_commands_total", "Mongo commands by command name and outcome."
+)
+mongo_latency = registry.histogram(
+    "pingme_mongo_command_duration_seconds", "Mongo command latency by command name."
+)
+outbound_calls = registry.counter(
+    "pingme_outbound_calls_total", "Calls to external services by service and outcome."
+)
+outbound_latency = registry.histogram(
+    "pingme_outbound_call_duration_seconds",
+    "Latency of calls to external services.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+trigger_step_latency = registry.histogram(
+    "pingme_trigger_step_duration_seconds",
+    "Time spent in each step of a ping trigger (eligibility, claim, agenda, ...).",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+prompt_tokens = registry.histogram(
+    "pingme_ai_prompt_tokens",
+    "Estimated tokens per AI insight prompt, by kind (day, week, month).",
+    buckets=(250, 500, 750, 1000, 1500, 2000, 4000, 8000),
+)
+
+
+@asynccontextmanager
+async def observe_call(service: str):
+    """Time an outbound call: `async with observe_call("telegram"): ...`"""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        outbound_calls.inc(service=service, outcome=outcome)
+        outbound_latency.observe(time.perf_counter() - start, service=service)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route on the scope; use its
+            # template so /api/agenda/{item_id} is one series, not one per id
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests.inc(route=path, method=method, status=status["code"])
+            http_latency.observe(time.perf_counter() - start, route=path, method=method)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Counts and times every command the driver sends."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_commands.inc(command=event.command_name, outcome="ok")
+        mongo_latency.observe(event.duration_micros / 1e6, command=event.command_name)
+
+    def failed(self, event):
+        mongo_commands.inc(command=event.command_name, outcome="error")
+        mongo_latency.observe(event.duration_micros / 1e6, command=event.command_name)
@@ -0,0 +1,164 @@
+"""
+Typed shapes for the data that moves through PingMe.
+
+Request bodies are pydantic models so FastAPI validates them at the boundary
+and documents them in /docs. Internal records built in bulk (sessions, daily
+snapshots in the weekly rollup) are slotted dataclasses: no per-instance
+__dict__, so a year of them stays small, and orjson serializes them natively.
+"""
+
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Annotated, Dict, List, Optional
+
+import pytz
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+HHMM = r"^([01]\d|2[0-3]):[0-5]\d$"
+YYYY_MM_DD = r"^\d{4}-\d{2}-\d{2}$"
+ObjectIdStr = Annotated[str, Field(pattern=r"^[0-9a-fA-F]{24}$")]
+
+
+# ── Request bodies ────────────────────────────────────────────────────────────
+
+class PingResponseIn(BaseModel):
+    response: Optional[str] = None
+    skipped: bool = False
+    untracked: bool = False
+    source: str = "unknown"
+
+
+class NoteIn(BaseModel):
+    content: str = Field(min_length=1)
+    source: str = "unknown"
+
+
+class AgendaItemIn(BaseModel):
+    content: str = Field(min_length=1)
+    date: Optional[str] = Field(default=None, pattern=YYYY_MM_DD)
+    carriedFrom: Optional[str] = Field(default=None, pattern=YYYY_MM_DD)
+    source: str = "unknown"
+
+
+class AgendaToggleIn(BaseModel):
+    completed: bool = False
+
+
+# Batch bodies: each request is applied with a single bulk_write and answered
+# with the day's fresh list, so a client can redraw without refetching.
+
+class AgendaBulkCreateIn(BaseModel):
+    """One item per non-empty line of `text`; list bullets are stripped."""
+
+    text: str = Field(min_length=1)
+    date: Optional[str] = Field(default=None, pattern=YYYY_MM_DD)
+    source: str = "unknown"
+
+
+class AgendaChange(BaseModel):
+    id: ObjectIdStr
+    completed: bool
+
+
+class AgendaBulkToggleIn(BaseModel):
+    """Items not on `date` (default today) are ignored."""
+
+    items: List[AgendaChange] = Field(min_length=1, max_length=100)
+    date: Optional[str] = Field(default=None, pattern=YYYY_MM_DD)
+
+
+class AgendaBulkDeleteIn(BaseModel):
+    """Items not on `date` (default today) are ignored."""
+
+    ids: List[ObjectIdStr] = Field(min_length=1, max_length=100)
+    date: Optional[str] = Field(default=None, pattern=YYYY_MM_DD)
+
+
+class AgendaReorderIn(BaseModel):
+    """Ids in their new order; items of the day not listed keep their place."""
+
+    ids: List[ObjectIdStr] = Field(min_length=1, max_length=100)
+    date: Optional[str] = Field(default=None, pattern=YYYY_MM_DD)
+
+
+class QuietWindow(BaseModel):
+    """Recurring no-ping window, e.g. weekday meetings 14:00–15:00."""
+
+    days: List[int] = Field(min_length=1)  # 0 = Monday … 6 = Sunday
+    start: str = Field(pattern=HHMM)
+    end: str = Field(pattern=HHMM)
+    label: Optional[str] = None
+
+    @field_validator("days")
+    @classmethod
+    def _weekdays(cls, value):
+        if any(d < 0 or d > 6 for d in value):
+            raise ValueError("days must be 0 (Monday) to 6 (Sunday)")
+        return sorted(set(value))
+
+
+class SettingsUpdate(BaseModel):
+    """Partial settings update. Unknown keys are rejected."""
+
+    model_config = ConfigDict(extra="forbid")
+
+    sleepStart: Optional[str] = Field(default=None, pattern=HHMM)
+    sleepEnd: Optional[str] = Field(default=None, pattern=HHMM)
+    timezone: Optional[str] = None
+    intervalMinutes: Optional[int] = Field(default=None, ge=1, le=240)
+    summaryTime: Optional[str] = Field(default=None, pattern=HHMM)
+    email: Optional[str] = None
+    telegramChatId: Optional[str] = None
+    isPaused: Optional[bool] = None
+    pauseUntil: Optional[datetime] = None
+    # Converted to pauseUntil on the server, never stored
+    pauseDurationMinutes: Optional[int] = Field(default=None, ge=1)
+    quietWindows: Optional[List[QuietWindow]] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def _known_timezone(cls, value):
+        if value is not None and value not in pytz.all_timezones_set:
+            raise ValueError(f"Unknown timezone: {value}")
+        return value
+
+
+# ── Internal records ──────────────────────────────────────────────────────────
+
+@dataclass(slots=True)
+class Session:
+    category: str
+    start: datetime
+    end: datetime
+    minutes: float = 0.0
+    pings: int = 1
+    gapBeforeMinutes: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class DailySnapshot:
+    date: str
+    totalPings: int = 0
+    trackedCount: int = 0
+    untrackedCount: int = 0
+    untrackedPercent: int = 0
+    categoryBreakdown: Dict[str, int] = field(default_factory=dict)
+    hoursPerCategory: Dict[str, float] = field(default_factory=dict)
+    topActivities: List[str] = field(default_factory=list)
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "DailySnapshot":
+        stats = doc.get("stats", {})
+        return cls(
+            date=doc["date"],
+            totalPings=stats.get("totalPings", 0),
+            trackedCount=stats.get("trackedCount", 0),
+            untrackedCount=stats.get("untrackedCount", 0),
+            untrackedPercent=stats.get("untrackedPercent", 0),
+            categoryBreakdown=stats.get("categoryBreakdown", {}),
+            hoursPerCategory=doc.get("hoursPerCategory", {}),
+            topActivities=doc.get("topActivities", []),
+        )
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from services import days, revisions, search
+from services.cache import summary_cache
+from services.models import NoteIn
+
+
+async def list_today(db, date: str = None) -> list:
+    date = date or (await days.today(db)).date
+    cursor = db.notes.find({"localDate": date}).sort("timestamp", -1)
+    return await cursor.to_list(length=100)
+
+
+async def create_note(db, data: NoteIn) -> str:
+    """Insert a note and return its id."""
+    now = datetime.now(timezone.utc)
+    note = {
+        "content": data.content,
+        "source": data.source,
+        "timestamp": now,
+        "localDate": days.local_date(await days.user_timezone(db), now)
+    }
+    result = await db.notes.insert_one(note)
+    await search.index_documents(db, "note", [note])
+    await summary_cache.invalidate("default", note["localDate"])
+    await revisions.bump(db, "notes", note["localDate"])
+    return str(result.inserted_id)
@@ -0,0 +1,162 @@
+import time
+from datetime import datetime, timezone, timedelta
+
+from pymongo import ReturnDocument
+
+from services import agenda, days, heatmap, revisions, schedule, search
+from services.background import spawn
+from services.cache import summary_cache
+from services.categorize import categorize
+from services.metrics import trigger_step_latency
+from services.models import PingResponseIn
+from services.telegram import send_message as send_telegram
+
+
+class _Steps:
+    """Wall time of each trigger step, in ms for the response and in seconds
+    for pingme_trigger_step_duration_seconds."""
+
+    def __init__(self):
+        self.timings = {}
+        self._mark = time.perf_counter()
+
+    def done(self, step: str):
+        now = time.perf_counter()
+        elapsed, self._mark = now - self._mark, now
+        self.timings[step] = round(elapsed * 1000, 3)
+        trigger_step_latency.observe(elapsed, step=step)
+
+
+def kickoff_message(items: list) -> str:
+    agenda_text = "\n".join([f"- {'✅' if i['completed'] else '☐'} {i['content']}" for i in items])
+    return f"<b>Good morning! ☀️</b>\n\n<b>📋 Today's Agenda</b>\n{agenda_text}\n\nHave a great day!"
+
+
+async def trigger(db) -> dict:
+    """Decide whether a ping is due and, if so, mark it pending and send it.
+
+    A firing tick is one settings read, one settings find_one_and_update, and
+    on the first ping of the day one agenda read plus one agenda bulk_write.
+    The Telegram send is queued as a background task, so the cron caller gets
+    its answer without waiting on Telegram.
+    """
+    steps = _Steps()
+    now_utc = datetime.now(timezone.utc)
+    # Sleep, pauses, quiet windows and the post-response cooldown are all
+    # folded into nextEligibleAt (see services.schedule), so a blocked tick
+    # is this one indexed lookup coming back empty. A missing value means the
+    # schedule was never computed, which counts as eligible.
+    settings = await db.settings.find_one({"userId": "default", "nextEligibleAt": {"$not": {"$gt": now_utc}}})
+    steps.done("eligibility")
+    if not settings:
+        return {"fired": False, "reason": "not_eligible"}
+
+    through = settings.get("scheduleThrough")
+    if settings.get("blockedIntervals") is None or not through or schedule.as_utc(through) < now_utc + timedelta(days=1):
+        fields = await schedule.refresh_schedule(db, settings, now_utc)
+        steps.done("schedule")
+        if schedule.as_utc(fields["nextEligibleAt"]) > now_utc:
+            return {"fired": False, "reason": "not_eligible"}
+        intervals = fields["blockedIntervals"]
+    else:
+        intervals = settings["blockedIntervals"]
+
+    # We just crossed into a blocked interval: skip until it ends
+    eligible_at, reason = schedule.next_eligible(intervals, now_utc)
+    if reason:
+        await db.settings.update_one({"userId": "default"}, {"$set": {"nextEligibleAt": eligible_at}})
+        return {"fired": False, "reason": reason}
+
+    today_str = days.local_date(settings.get("timezone") or days.DEFAULT_TIMEZONE, now_utc)
+    update = {"$set": {"pendingPing": True, "pendingPingAt": now_utc, "lastMorningMessage": today_str}}
+    if settings.get("isPaused"):
+        # A timed pause has run out; clear the flag so clients show pings as
+        # on. This is the one trigger write clients can see, so it revises.
+        update["$set"].update(isPaused=False, pauseUntil=None)
+        update = revisions.revise(update)
+    # Marking the ping pending and claiming today's kickoff is one atomic
+    # update: the document as it was says whether the kickoff is still due,
+    # and two overlapping ticks can't both send it
+    before = await db.settings.find_one_and_update(
+        {"userId": "default"}, update,
+        projection={"lastMorningMessage": 1}, return_document=ReturnDocument.BEFORE,
+    )
+    steps.done("claim")
+    kickoff = (before or {}).get("lastMorningMessage") != today_str
+
+    if kickoff:
+        # Carry yesterday's open items and read today's list in one pass
+        try:
+            _, items = await agenda.carry_and_list(db, today_str)
+        except Exception:
+            # Hand the claim back so the next tick retries the kickoff; only
+            # if it's still ours, in case a later tick has claimed it since
+            await db.settings.update_one(
+                {"userId": "default", "lastMorningMessage": today_str},
+                {"$set": {"lastMorningMessage": (before or {}).get("lastMorningMessage")}},
+            )
+            raise
+        steps.done("agenda")
+        spawn(send_telegram(kickoff_message(items)), name="morning-kickoff")
+    else:
+        spawn(send_telegram("Hey! What are you doing? 👀"), name="ping")
+    steps.done("send_queued")
+
+    return {"fired": True, "kickoff": kickoff, "timings": steps.timings}
+
+
+async def status(db) -> dict:
+    settings = await db.settings.find_one({"userId": "default"})
+    if not settings:
+        return {"pending": False, "askedAt": None}
+    return {
+        "pending": settings.get("pendingPing", False),
+        "askedAt": settings.get("pendingPingAt")
+    }
+
+
+async def respond(db, data: PingResponseIn) -> dict:
+    """Log an answer to the pending ping and return the stored log entry."""
+    response_text = data.response
+    skipped = data.skipped
+    untracked = data.untracked
+
+    category = "untracked"
+    if not skipped and not untracked and response_text:
+        category = categorize(response_text)
+
+    now = datetime.now(timezone.utc)
+    tz_name = await days.user_timezone(db)
+    log_entry = {
+        "timestamp": now,
+        "localDate": days.local_date(tz_name, now),
+        "response": response_text,
+        "source": data.source,
+        "skipped": skipped,
+        "untracked": untracked,
+        "category": category,
+        "categorySource": "keyword" if response_text else "system"
+    }
+
+    await db.logs.insert_one(log_entry)
+    await search.index_documents(db, "log", [log_entry])
+    await heatmap.record(db, log_entry, tz_name)
+    await summary_cache.invalidate("default", log_entry["localDate"])
+
+    responded_at = datetime.now(timezone.utc)
+    settings = await db.settings.find_one_and_update({"userId": "default"}, {
+        "$set": {
+            "pendingPing": False,
+            "lastRespondedAt": responded_at
+        }
+    }, return_document=ReturnDocument.AFTER)
+    if settings:
+        # Hold the next ping off for roughly one interval, unless something
+        # later (an indefinite pause) already holds it
+        eligible_at, _ = schedule.next_eligible(
+            settings.get("blockedIntervals") or [], schedule.response_cooldown(settings, responded_at)
+        )
+        current = settings.get("nextEligibleAt")
+        if current is None or schedule.as_utc(current) < eligible_at:
+            await db.settings.update_one({"userId": "default"}, {"$set": {"nextEligibleAt": eligible_at}})
+    return log_entry
@@ -0,0 +1,226 @@
+"""
+Mongo command profiler.
+
+`MongoProfiler` is a pymongo command listener that aggregates timings and
+document counts per (collection, operation), keeps a ring buffer of slow
+commands, and — inside a `profile_block` (every HTTP request gets one via
+`ProfilerMiddleware`) — counts commands by query shape so loops issuing the
+same query per item (N+1) are flagged with the route that did it.
+
+Motor runs driver calls on a thread pool and copies the caller's context, so
+listener callbacks see the request's tally through a ContextVar; shared
+aggregates are guarded by a lock.
+
+Env: MONGO_SLOW_MS (default 100), MONGO_NPLUSONE_THRESHOLD (default 5).
+"""
+
+import os
+import threading
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+from services.metrics import registry
+
+SLOW_MS = float(os.getenv("MONGO_SLOW_MS", "100"))
+NPLUSONE_THRESHOLD = int(os.getenv("MONGO_NPLUSONE_THRESHOLD", "5"))
+
+# Commands whose first value is the target collection
+_COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count",
+    "findAndModify", "distinct", "createIndexes",
+}
+
+_current_block: ContextVar[Optional[dict]] = ContextVar("mongo_profile_block", default=None)
+
+
+def query_shape(value):
+    """Replace literal values with '?' so queries differing only in values match."""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [query_shape(v) for v in value[:1]]
+    return "?"
+
+
+def _describe(command_name: str, command: dict) -> Tuple[str, object]:
+    """(collection, filter shape) for a command document."""
+    if command_name in _COLLECTION_COMMANDS:
+        collection = command.get(command_name)
+    elif command_name == "getMore":
+        collection = command.get("collection")
+    else:
+        collection = None
+
+    if command_name == "find":
+        shape = query_shape(command.get("filter", {}))
+    elif command_name == "update":
+        shape = query_shape((command.get("updates") or [{}])[0].get("q", {}))
+    elif command_name == "delete":
+        shape = query_shape((command.get("deletes") or [{}])[0].get("q", {}))
+    elif command_name == "count":
+        shape = query_shape(command.get("query", {}))
+    elif command_name == "findAndModify":
+        shape = query_shape(command.get("query", {}))
+    elif command_name == "aggregate":
+        shape = query_shape(command.get("pipeline", []))
+    else:
+        shape = None
+    return collection or "-", shape
+
+
+def _doc_count(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    return int(reply.get("n", 0) or 0)
+
+
+class MongoProfiler(monitoring.CommandListener):
+    def __init__(self, slow_ms: float = SLOW_MS, nplusone_threshold: int = NPLUSONE_THRESHOLD):
+        self.slow_ms = slow_ms
+        self.nplusone_threshold = nplusone_threshold
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, int], tuple] = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.ops: Dict[Tuple[str, str], dict] = {}
+            self.slow: deque = deque(maxlen=50)
+            self.nplusone: Dict[tuple, dict] = {}
+
+    # ── listener callbacks (run on Motor's executor threads) ──────────────────
+
+    def started(self, event):
+        collection, shape = _describe(event.command_name, event.command)
+        self._pending[(event.connection_id, event.request_id)] = (collection, shape, _current_block.get())
+
+    def succeeded(self, event):
+        self._record(event, _doc_count(event.command_name, event.reply), failed=False)
+
+    def failed(self, event):
+        self._record(event, 0, failed=True)
+
+    def _record(self, event, docs: int, failed: bool):
+        info = self._pending.pop((event.connection_id, event.request_id), None)
+        if info is None:
+            return
+        collection, shape, block = info
+        op = event.command_name
+        ms = event.duration_micros / 1000
+
+        with self._lock:
+            stats = self.ops.setdefault((collection, op), {
+                "count": 0, "errors": 0, "totalMs": 0.0, "maxMs": 0.0, "docs": 0,
+            })
+            stats["count"] += 1
+            stats["errors"] += int(failed)
+            stats["totalMs"] += ms
+            stats["maxMs"] = max(stats["maxMs"], ms)
+            stats["docs"] += docs
+
+            if ms >= self.slow_ms:
+                self.slow.append({
+                    "collection": collection,
+                    "op": op,
+                    "ms": round(ms, 2),
+                    "shape": shape,
+                    "block": block["label"] if block else None,
+                    "at": datetime.now(timezone.utc).isoformat(),
+                })
+
+            if block is not None and op != "getMore":
+                key = (collection, op, repr(shape))
+                block["tally"][key] = block["tally"].get(key, 0) + 1
+
+    # ── per-block N+1 detection ───────────────────────────────────────────────
+
+    def finish_block(self, block: dict, label: Optional[str] = None):
+        label = label or block["label"]
+        with self._lock:
+            for (collection, op, shape), count in block["tally"].items():
+                if count < self.nplusone_threshold:
+                    continue
+                entry = self.nplusone.setdefault((label, collection, op, shape), {
+                    "block": label, "collection": collection, "op": op,
+                    "shape": shape, "occurrences": 0, "maxRepeats": 0,
+                })
+                entry["occurrences"] += 1
+                entry["maxRepeats"] = max(entry["maxRepeats"], count)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ops = [
+                {
+                    "collection": collection,
+                    "op": op,
+                    **stats,
+                    "totalMs": round(stats["totalMs"], 2),
+                    "maxMs": round(stats["maxMs"], 2),
+                    "avgMs": round(stats["totalMs"] / stats["count"], 2),
+                }
+                for (collection, op), stats in self.ops.items()
+            ]
+            return {
+                "slowThresholdMs": self.slow_ms,
+                "operations": sorted(ops, key=lambda o: -o["totalMs"]),
+                "slowQueries": list(self.slow),
+                "nPlusOne": list(self.nplusone.values()),
+            }
+
+    def render_metrics(self) -> List[str]:
+        snap = self.snapshot()
+        lines = []
+        for name, field in (("op_total", "count"), ("op_ms_total", "totalMs"), ("op_docs_total", "docs")):
+            lines.append(f"# TYPE pingme_mongo_{name} counter")
+            for o in snap["operations"]:
+                labels = f'{{collection="{o["collection"]}",op="{o["op"]}"}}'
+                lines.append(f"pingme_mongo_{name}{labels} {o[field]}")
+        lines.append("# TYPE pingme_mongo_nplusone_total counter")
+        for n in snap["nPlusOne"]:
+            labels = f'{{block="{n["block"]}",collection="{n["collection"]}",op="{n["op"]}"}}'
+            lines.append(f"pingme_mongo_nplusone_total{labels} {n['occurrences']}")
+        return lines
+
+
+mongo_profiler = MongoProfiler()
+registry.collectors.append(mongo_profiler.render_metrics)
+
+
+@asynccontextmanager
+async def profile_block(label: str):
+    """Group the Mongo commands issued inside for N+1 detection."""
+    block = {"label": label, "tally": {}}
+    token = _current_block.set(block)
+    try:
+        yield block
+    finally:
+        _current_block.reset(token)
+        mongo_profiler.finish_block(block)
+
+
+class ProfilerMiddleware:
+    """Opens a profile_block per HTTP request, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        block = {"label": scope.get("path", ""), "tally": {}}
+        token = _current_block.set(block)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_block.reset(token)
+            route = scope.get("route")
+            label = f'{scope.get("method", "")} {getattr(route, "path", None) or scope.get("path", "")}'
+            mongo_profiler.finish_block(block, label)
@@ -0,0 +1,350 @@
+"""
+Prompt building for AI insights: digests, deduplication and a token budget.
+
+The model never sees raw history. A day is boiled down to a *digest* that
+holds:
+
+- minutes per category and ping counts;
+- what was logged, with repeated answers merged and counted ("coding the
+  api (×6)");
+- the agenda's state and the notes, capped.
+
+The digest is stored on the day's snapshot (`daily_snapshots.digest`), so it
+is built once. `merge_digests` folds digests into a digest for a longer
+period, with one line per part. The weekly rollup stores the merged week on
+`weekly_snapshots.digest`, and months are merged from weeks. A prompt for
+any period is therefore built from a handful of small documents, whatever
+the length of the period.
+
+`build_prompt` renders a digest as sections in priority order and trims
+whole lines from the least important sections until the prompt fits
+TOKEN_BUDGET:
+
+1. notes;
+2. agenda detail;
+3. per-part lines;
+4. rarer activities.
+
+Time breakdown and instructions are never trimmed. Observations computed
+locally (services.facts) can be passed in as well. They lead the data and are
+never trimmed either, and since they already say what the raw lines would
+show, such a prompt gets the smaller FACTS_TOKEN_BUDGET. Tokens are estimated
+at four characters each, which is close for English and keeps counting
+offline.
+
+Env: AI_PROMPT_TOKEN_BUDGET (1200), AI_PROMPT_TOKEN_BUDGET_WITH_FACTS (800).
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "1200"))
+FACTS_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET_WITH_FACTS", "800"))
+
+# Caps on what a digest keeps: more than any prompt uses, small enough to
+# store on every snapshot
+MAX_ACTIVITIES = 25
+MAX_AGENDA = 20
+MAX_NOTES = 10
+MAX_NOTE_CHARS = 200
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_SPACE = re.compile(r"\s+")
+
+DAY_PREAMBLE = """You are a personal productivity coach giving a warm, honest, and insightful recap of someone's previous day.
+
+Here is their data:"""
+
+DAY_INSTRUCTIONS = """Write a SHORT, warm, human insight (4-6 sentences max) covering:
+1. What kind of day it was overall (focused? scattered? balanced?)
+2. One specific observation about their work pattern based on what they did
+3. One honest nudge or encouragement based on incomplete tasks or untracked time
+4. One thing to carry into today
+
+Rules:
+- Do NOT use bold (**) or markdown
+- Do NOT use bullet points
+- Write in flowing sentences like a thoughtful friend, not a corporate report
+- Be specific — mention actual activities they logged, not generic advice
+- Keep it under 100 words"""
+
+PERIOD_PREAMBLE = """You are a personal productivity coach looking back over someone's {period} ({start} to {end}, {days} days tracked).
+
+Here is their data:"""
+
+PERIOD_INSTRUCTIONS = """Write a SHORT, honest insight (3-5 sentences) covering:
+1. The overall shape of the period: where the focused time went and how it changed from part to part
+2. One pattern worth keeping and one worth changing, naming the actual activities
+3. One concrete suggestion for the next {period}
+
+Rules:
+- Do NOT use bold (**), markdown or bullet points
+- Write in flowing sentences like a thoughtful friend
+- Keep it under 90 words"""
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def activity_key(text: str) -> str:
+    """What makes two answers "the same": case, punctuation and spacing aside."""
+    return _SPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+def merge_activities(groups: Iterable[Iterable[Sequence]], limit: int = MAX_ACTIVITIES) -> List[list]:
+    """Merge (text, count) lists into one, most frequent first. Answers with
+    the same `activity_key` are counted together, under the first phrasing
+    seen."""
+    counts: Counter = Counter()
+    phrasing: Dict[str, str] = {}
+    for group in groups:
+        for text, count in group:
+            key = activity_key(text)
+            if not key:
+                continue
+            counts[key] += count
+            phrasing.setdefault(key, text.strip())
+    # most_common keeps first-seen order among ties
+    return [[phrasing[key], count] for key, count in counts.most_common(limit)]
+
+
+# ── Digests ───────────────────────────────────────────────────────────────────
+
+def day_digest(
+    logs: list,
+    agenda: list,
+    notes: list,
+    stats: dict,
+    date: Optional[str] = None,
+    interval_minutes: int = 15,
+) -> dict:
+    """The day's digest. `interval_minutes` (the user's ping interval) turns
+    ping counts into minutes when `stats` has no session minutes."""
+    answers = [
+        (log["response"], 1) for log in logs
+        if log.get("response") and not log.get("skipped") and not log.get("untracked")
+    ]
+    minutes = stats.get("minutesPerCategory") or {
+        cat: count * interval_minutes for cat, count in (stats.get("categoryBreakdown") or {}).items()
+    }
+    return {
+        "start": date,
+        "end": date,
+        "days": 1,
+        "totalPings": stats.get("totalPings", 0),
+        "untrackedPings": stats.get("untrackedCount", 0),
+        "minutesPerCategory": {cat: round(m) for cat, m in minutes.items()},
+        "activities": merge_activities([answers]),
+        "agendaDone": sum(1 for i in agenda if i.get("completed")),
+        "agendaTotal": len(agenda),
+        "doneAgenda": [i["content"] for i in agenda if i.get("completed")][:MAX_AGENDA],
+        "openAgenda": [i["content"] for i in agenda if not i.get("completed")][:MAX_AGENDA],
+        "notes": [n["content"][:MAX_NOTE_CHARS] for n in notes][:MAX_NOTES],
+        "parts": [],
+    }
+
+
+def snapshot_digest(doc: dict) -> dict:
+    """A daily snapshot's stored digest, or one rebuilt from its stats for
+    snapshots saved before digests were."""
+    if doc.get("digest"):
+        return doc["digest"]
+    stats = doc.get("stats", {})
+    minutes = stats.get("minutesPerCategory") or {
+        cat: hours * 60 for cat, hours in (doc.get("hoursPerCategory") or {}).items()
+    }
+    return {
+        "start": doc["date"],
+        "end": doc["date"],
+        "days": 1,
+        "totalPings": stats.get("totalPings", 0),
+        "untrackedPings": stats.get("untrackedCount", 0),
+        "minutesPerCategory": {cat: round(m) for cat, m in minutes.items()},
+        "activities": [[text, 1] for text in doc.get("topActivities") or []],
+        "agendaDone": doc.get("agendaCompleted", 0),
+        "agendaTotal": doc.get("agendaTotal", 0),
+        "doneAgenda": [],
+        "openAgenda": [],
+        "notes": [],
+        "parts": [],
+    }
+
+
+def weekly_snapshot_digest(doc: dict) -> dict:
+    """A weekly snapshot's stored digest, or one rebuilt from its stats."""
+    if doc.get("digest"):
+        return doc["digest"]
+    stats = doc.get("stats", {})
+    total = stats.get("totalPings", 0)
+    return {
+        "start": doc["weekStart"],
+        "end": doc["weekEnd"],
+        "days": stats.get("daysIncluded", 7),
+        "totalPings": total,
+        "untrackedPings": total - stats.get("totalTrackedPings", total),
+        "minutesPerCategory": {
+            cat: round(hours * 60) for cat, hours in (stats.get("totalHoursPerCategory") or {}).items()
+        },
+        "activities": [[text, 1] for text in stats.get("topActivities") or []],
+        "agendaDone": 0,
+        "agendaTotal": 0,
+        "doneAgenda": [],
+        "openAgenda": [],
+        "notes": [],
+        "parts": [
+            {
+                "start": day["date"], "end": day["date"], "days": 1,
+                "deepWorkMinutes": round(day.get("deepWorkHours", 0) * 60),
+                "untrackedPercent": day.get("untrackedPercent", 0), "top": None,
+            }
+            for day in stats.get("dailyBreakdown") or []
+        ],
+    }
+
+
+def _untracked_percent(digest: dict) -> int:
+    total = digest["totalPings"]
+    return round(digest["untrackedPings"] / total * 100) if total else 0
+
+
+def _part(digest: dict) -> dict:
+    activities = digest["activities"]
+    return {
+        "start": digest["start"],
+        "end": digest["end"],
+        "days": digest["days"],
+        "deepWorkMinutes": digest["minutesPerCategory"].get("deep_work", 0),
+        "untrackedPercent": _untracked_percent(digest),
+        "top": activities[0][0] if activities else None,
+    }
+
+
+def merge_digests(digests: List[dict]) -> dict:
+    """One digest for the span of `digests` (oldest first), with a part per
+    digest. The parts' own parts are dropped: a month lists its weeks, not
+    its days."""
+    minutes: Counter = Counter()
+    for digest in digests:
+        minutes.update(digest["minutesPerCategory"])
+    return {
+        "start": digests[0]["start"],
+        "end": digests[-1]["end"],
+        "days": sum(d["days"] for d in digests),
+        "totalPings": sum(d["totalPings"] for d in digests),
+        "untrackedPings": sum(d["untrackedPings"] for d in digests),
+        "minutesPerCategory": dict(minutes),
+        "activities": merge_activities(d["activities"] for d in digests),
+        "agendaDone": sum(d["agendaDone"] for d in digests),
+        "agendaTotal": sum(d["agendaTotal"] for d in digests),
+        "doneAgenda": [],
+        # Where things stand at the end of the period
+        "openAgenda": digests[-1]["openAgenda"],
+        "notes": [note for d in digests for note in d["notes"]][-MAX_NOTES:],
+        "parts": [_part(d) for d in digests],
+    }
+
+
+# ── Rendering ─────────────────────────────────────────────────────────────────
+
+class Section(NamedTuple):
+    title: str
+    lines: List[str]
+    # Lines never trimmed, and the order sections are trimmed in (lowest first)
+    keep: int
+    priority: int
+
+
+class Prompt(NamedTuple):
+    text: str
+    tokens: int
+    # Lines dropped per section to fit the budget
+    trimmed: Dict[str, int]
+
+
+def _duration(minutes: float) -> str:
+    minutes = int(round(minutes))
+    hours, mins = divmod(minutes, 60)
+    return f"{hours}h {mins}m" if hours else f"{mins}m"
+
+
+def _sections(digest: dict, facts: Sequence[str] = ()) -> List[Section]:
+    time_lines = [
+        f"- {cat.replace('_', ' ').title()}: {_duration(minutes)}"
+        for cat, minutes in sorted(digest["minutesPerCategory"].items(), key=lambda x: -x[1])
+    ] or ["No tracked time"]
+    time_lines.append(f"Untracked: {_untracked_percent(digest)}% ({digest['totalPings']} total pings)")
+
+    sections = []
+    if facts:
+        sections.append(Section(
+            "KEY OBSERVATIONS (computed from their data; build on these rather than restating them)",
+            [f"- {fact}" for fact in facts], len(facts), 10,
+        ))
+    sections.append(Section("TRACKED TIME BREAKDOWN", time_lines, len(time_lines), 9))
+    if digest["parts"]:
+        sections.append(Section("PART BY PART", [
+            f"- {p['start']}{'' if p['end'] == p['start'] else ' to ' + p['end']}: "
+            f"deep work {_duration(p['deepWorkMinutes'])}, untracked {p['untrackedPercent']}%"
+            + (f", mostly \"{p['top']}\"" if p["top"] else "")
+            for p in digest["parts"]
+        ], 0, 2))
+    sections.append(Section(
+        "WHAT THEY ACTUALLY DID (their own words; ×N = logged N times)",
+        [f"- {text}" + (f" (×{count})" if count > 1 else "") for text, count in digest["activities"]]
+        or ["No responses logged"],
+        3, 3,
+    ))
+    agenda = [f"- done: {item}" for item in digest["doneAgenda"]]
+    agenda += [f"- open: {item}" for item in digest["openAgenda"]]
+    sections.append(Section(
+        f"AGENDA ({digest['agendaDone']}/{digest['agendaTotal']} completed)", agenda, 0, 1,
+    ))
+    if digest["notes"]:
+        sections.append(Section("NOTES THEY CAPTURED", [f"- {n}" for n in digest["notes"]], 0, 0))
+    return sections
+
+
+def _render(header: str, sections: List[Section], instructions: str) -> str:
+    body = "\n\n".join(f"{s.title}:\n" + "\n".join(s.lines) for s in sections)
+    return f"{header}\n\n{body}\n\n{instructions}\n"
+
+
+def fit(sections: List[Section], budget: int, fixed_chars: int) -> Dict[str, int]:
+    """Drop trailing lines (in place) from the lowest-priority sections until
+    the prompt fits `budget` tokens; returns lines dropped per section."""
+    budget_chars = budget * 4
+    # Each section's title and separators, plus room for "(N more)"
+    used = fixed_chars + sum(len(s.title) + 16 + sum(len(l) + 1 for l in s.lines) for s in sections)
+    dropped: Dict[str, int] = {}
+    for section in sorted(sections, key=lambda s: s.priority):
+        while used > budget_chars and len(section.lines) > section.keep:
+            used -= len(section.lines.pop()) + 1
+            dropped[section.title] = dropped.get(section.title, 0) + 1
+        if dropped.get(section.title):
+            section.lines.append(f"(+{dropped[section.title]} more not shown)")
+    return dropped
+
+
+def build_prompt(
+    digest: dict,
+    period: Optional[str] = None,
+    budget: Optional[int] = None,
+    facts: Sequence[str] = (),
+) -> Prompt:
+    """The insight prompt for a day digest, or for a merged one (`period` is
+    "week", "month", ...), led by `facts` (plain sentences) if given."""
+    if budget is None:
+        budget = FACTS_TOKEN_BUDGET if facts else TOKEN_BUDGET
+    if period:
+        header = PERIOD_PREAMBLE.format(period=period, start=digest["start"], end=digest["end"], days=digest["days"])
+        instructions = PERIOD_INSTRUCTIONS.format(period=period)
+    else:
+        header, instructions = DAY_PREAMBLE, DAY_INSTRUCTIONS
+    sections = _sections(digest, facts)
+    trimmed = fit(sections, budget, len(header) + len(instructions) + 6)
+    text = _render(header, sections, instructions)
+    return Prompt(text, estimate_tokens(text), trimmed)
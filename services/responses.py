@@ -0,0 +1,30 @@
+"""
+JSON responses for raw Mongo documents.
+
+Routers return documents straight from Motor — ObjectIds, datetimes and all —
+and `MongoJSONResponse` turns them into bytes with a single orjson pass,
+instead of stringifying ids in a loop and then letting FastAPI's
+`jsonable_encoder` walk the whole structure again.
+"""
+
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize Mongo documents to JSON bytes (datetimes as ISO 8601)."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class MongoJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
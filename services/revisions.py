@@ -0,0 +1,93 @@
+"""
+Revision counters for conditional GETs of the agenda, notes and settings.
+
+Every write bumps a counter for what it changed, and the list routes answer
+with an ETag built from it. A client that revalidates with If-None-Match gets
+a 304 after one small read of the counter, and the items or settings document
+itself is never fetched.
+
+- Agenda and notes are per day. The counters live in the `revisions`
+  collection, as {_id: "agenda:default:2026-02-25", rev, modifiedAt}. They are
+  bumped *after* the write, and the routes read the counter *before* the list.
+  So a list is never older than the ETag it is sent with. In a race, a client
+  only ends up with a newer list under an older ETag and refetches next time.
+- Settings carry their own `revision` / `revisedAt` fields. Every update to
+  what GET /api/settings returns `$inc`s them in the same operation
+  (`revise`), with no extra round trip. The scheduler's own bookkeeping
+  (services.settings.SCHEDULER_FIELDS) is not returned and not revised.
+  Otherwise every ping and response would change the ETag.
+
+The ETag includes the modification time as well as the counter. If the
+`revisions` collection is ever dropped and a counter starts again from 1, it
+can't reproduce an ETag a client still holds. Last-Modified is sent for
+information only. Its one-second resolution can't tell two writes in the same
+second apart, so If-Modified-Since is not honoured. Writes made outside these
+services (scripts, the Mongo shell) don't bump anything, and clients see them
+once a service write for that day does.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import NamedTuple, Optional
+
+from services.cache import etag_matches
+
+
+class Revision(NamedTuple):
+    key: str
+    rev: int
+    modified_at: Optional[datetime]
+
+    @property
+    def etag(self) -> str:
+        stamp = int(self.modified_at.replace(tzinfo=timezone.utc).timestamp() * 1000) if self.modified_at else 0
+        return f'"{self.key.replace(":", "-")}-{self.rev}.{stamp}"'
+
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.modified_at:
+            headers["Last-Modified"] = format_datetime(self.modified_at.replace(tzinfo=timezone.utc), usegmt=True)
+        return headers
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        return etag_matches(if_none_match, self.etag)
+
+
+def _key(scope: str, date: str, user: str) -> str:
+    return f"{scope}:{user}:{date}"
+
+
+async def bump(db, scope: str, date: str, user: str = "default"):
+    """Record a write to `scope` ("agenda" or "notes") for one day."""
+    await db.revisions.update_one(
+        {"_id": _key(scope, date, user)},
+        {"$inc": {"rev": 1}, "$set": {"modifiedAt": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def current(db, scope: str, date: str, user: str = "default") -> Revision:
+    key = _key(scope, date, user)
+    doc = await db.revisions.find_one({"_id": key}) or {}
+    return Revision(key, doc.get("rev", 0), doc.get("modifiedAt"))
+
+
+# ── Settings ──────────────────────────────────────────────────────────────────
+
+def revise(update: dict) -> dict:
+    """`update` (a settings update document) that also bumps the revision."""
+    return {
+        **update,
+        "$set": {**update.get("$set", {}), "revisedAt": datetime.now(timezone.utc)},
+        "$inc": {**update.get("$inc", {}), "revision": 1},
+    }
+
+
+def of_settings(settings: dict) -> Revision:
+    return Revision(f"settings:{settings['userId']}", settings.get("revision", 0), settings.get("revisedAt"))
+
+
+async def settings_revision(db, user: str = "default") -> Optional[Revision]:
+    """The settings revision, or None before the document exists."""
+    doc = await db.settings.find_one({"userId": user}, {"userId": 1, "revision": 1, "revisedAt": 1})
+    return of_settings(doc) if doc else None
@@ -0,0 +1,119 @@
+"""
+Ping eligibility schedule.
+
+The rules that stop a ping — the nightly sleep window, recurring quiet
+windows (e.g. weekday meetings 14:00–15:00), and a pause — are expanded into
+concrete UTC intervals for the next HORIZON_DAYS whenever settings change, and
+stored on the settings document as `blockedIntervals`, sorted by start.
+`nextEligibleAt` is the earliest time a ping may fire; an indefinite pause
+pushes it to NEVER.
+
+The cron trigger then matches on `nextEligibleAt <= now` alone (indexed), so
+a tick during sleep or a pause is one index lookup that returns nothing. Only
+an eligible tick looks at the intervals, and if it has just crossed into one
+it moves `nextEligibleAt` to that interval's end.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import pytz
+
+HORIZON_DAYS = 8
+# Stand-in for "until resumed": compares later than any real time, so the
+# trigger's range query and $max updates need no special case
+NEVER = datetime(9999, 12, 31, tzinfo=timezone.utc)
+
+
+def as_utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _local_span(tz, day, start: str, end: str, end_slack: timedelta = timedelta(0)):
+    """UTC [start, end) for HH:MM times on local `day`; wraps past midnight."""
+    start_local = tz.localize(datetime.combine(day, datetime.strptime(start, "%H:%M").time()))
+    end_local = tz.localize(datetime.combine(day, datetime.strptime(end, "%H:%M").time()))
+    if end_local <= start_local:
+        end_local = tz.localize(datetime.combine(day + timedelta(days=1), end_local.time()))
+    return start_local.astimezone(timezone.utc), (end_local + end_slack).astimezone(timezone.utc)
+
+
+def build_blocked_intervals(settings: dict, now: datetime, horizon_days: int = HORIZON_DAYS) -> List[dict]:
+    tz = pytz.timezone(settings.get("timezone", "Asia/Kolkata"))
+    now = as_utc(now)
+    horizon_end = now + timedelta(days=horizon_days)
+    today = now.astimezone(tz).date()
+    intervals = []
+
+    # Start a day early so a window that began yesterday and wraps past
+    # midnight still covers the early hours of today
+    for offset in range(-1, horizon_days + 1):
+        day = today + timedelta(days=offset)
+        # The old per-tick check compared HH:MM strings inclusively, so the
+        # sleep window runs through the whole of its end minute
+        start, end = _local_span(
+            tz, day, settings.get("sleepStart", "02:00"), settings.get("sleepEnd", "10:00"),
+            end_slack=timedelta(minutes=1),
+        )
+        intervals.append({"start": start, "end": end, "reason": "sleep_window"})
+
+        for window in settings.get("quietWindows") or []:
+            if day.weekday() not in window["days"]:
+                continue
+            start, end = _local_span(tz, day, window["start"], window["end"])
+            intervals.append({"start": start, "end": end, "reason": window.get("label") or "quiet_window"})
+
+    if settings.get("isPaused"):
+        pause_until = settings.get("pauseUntil")
+        intervals.append({"start": now, "end": as_utc(pause_until) if pause_until else NEVER, "reason": "paused"})
+
+    intervals = [i for i in intervals if i["end"] > now and i["start"] < horizon_end]
+    intervals.sort(key=lambda i: i["start"])
+    return intervals
+
+
+def next_eligible(intervals: List[dict], t: datetime) -> Tuple[datetime, Optional[str]]:
+    """First moment at or after `t` outside every interval, and the reason
+    `t` itself was blocked (None if it wasn't)."""
+    t = as_utc(t)
+    reason = None
+    # Sorted by start, so one pass suffices: once t is pushed to an
+    # interval's end, only later-starting intervals can still contain it
+    for interval in intervals:
+        if as_utc(interval["start"]) <= t < as_utc(interval["end"]):
+            reason = reason or interval["reason"]
+            t = as_utc(interval["end"])
+    return t, reason
+
+
+def compute_schedule(settings: dict, now: datetime, not_before: Optional[datetime] = None) -> dict:
+    """Fields to $set on the settings document."""
+    now = as_utc(now)
+    intervals = build_blocked_intervals(settings, now)
+    eligible_at, _ = next_eligible(intervals, max(now, as_utc(not_before)) if not_before else now)
+    return {
+        "blockedIntervals": intervals,
+        "scheduleThrough": now + timedelta(days=HORIZON_DAYS),
+        "nextEligibleAt": eligible_at,
+    }
+
+
+def response_cooldown(settings: dict, responded_at: datetime) -> datetime:
+    """No ping until shortly before the next interval after a response."""
+    return as_utc(responded_at) + timedelta(minutes=settings.get("intervalMinutes", 15) - 2)
+
+
+async def refresh_schedule(db, settings: Optional[dict] = None, now: Optional[datetime] = None) -> dict:
+    """Recompute and store the schedule; keeps an active response cooldown."""
+    if settings is None:
+        settings = await db.settings.find_one({"userId": "default"})
+    if not settings:
+        return {}
+    now = now or datetime.now(timezone.utc)
+    last_responded = settings.get("lastRespondedAt")
+    fields = compute_schedule(
+        settings, now, not_before=response_cooldown(settings, last_responded) if last_responded else None,
+    )
+    # Scheduler fields only (services.settings.SCHEDULER_FIELDS): no revision
+    await db.settings.update_one({"userId": "default"}, {"$set": fields})
+    return fields
@@ -0,0 +1,230 @@
+"""
+Search over notes, ping answers and agenda items, all days.
+
+Each searchable record has one entry in the `search_index` collection,
+written alongside the record itself (notes.create_note, ping.respond, the
+agenda create/delete paths):
+
+    {_id: "note:<id>", kind, refId, date, timestamp, text, terms: [...]}
+
+`terms` is the record's distinct lowercased words, minus stopwords, under a
+multikey index. Every query word matches as a prefix ("meet" finds
+"meetings") with an anchored regex, which Mongo answers as a range scan on
+that index. All words (and any kind/date filters) must match, and every
+match is ranked here, however old:
+
+- BM25-style term-frequency saturation and length normalisation per word;
+- an exact word counts more than a prefix match;
+- a bonus when the whole query appears verbatim;
+- a gentle recency boost that halves every 30 days.
+
+Only the text and result fields are read, and the top `limit` are kept on a
+heap, so ranking costs a few microseconds per match.
+
+Ping answers stay searchable after send_summary archives them, since the
+index entry outlives the move.
+
+Rebuild everything from the source collections with
+`python pingme.py search-rebuild`.
+"""
+
+import heapq
+import re
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from pymongo import ASCENDING, DESCENDING, DeleteOne, ReplaceOne
+
+from services.log import get_logger
+
+logger = get_logger(__name__)
+
+KINDS = ("note", "log", "agenda")
+RECENCY_HALF_LIFE_DAYS = 30
+PREFIX_WEIGHT = 0.6
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_WORD = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i if in into is it its me my "
+    "of on or so that the then this to was we were will with".split()
+)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return [w for w in _WORD.findall((text or "").lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def _utc(dt: datetime) -> datetime:
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def make_entry(kind: str, doc: dict) -> Optional[dict]:
+    """Index entry for a note, log or agenda document; None if it has no text."""
+    text = doc.get("response") if kind == "log" else doc.get("content")
+    terms = sorted(set(tokenize(text)))
+    if not terms:
+        return None
+    timestamp = doc.get("timestamp") or doc.get("createdAt")
+    entry = {
+        "_id": f"{kind}:{doc['_id']}",
+        "kind": kind,
+        "refId": doc["_id"],
+        "date": doc.get("date") or doc.get("localDate") or timestamp.strftime("%Y-%m-%d"),
+        "timestamp": timestamp,
+        "text": text,
+        "terms": terms,
+    }
+    if doc.get("category"):
+        entry["category"] = doc["category"]
+    return entry
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+async def index_documents(db, kind: str, docs: Iterable[dict]):
+    """Add or refresh entries for `docs`. A failure is logged, not raised:
+    the record itself is already stored and a rebuild will pick it up."""
+    now = datetime.now(timezone.utc)
+    operations = []
+    for doc in docs:
+        entry = make_entry(kind, doc)
+        if entry:
+            operations.append(ReplaceOne({"_id": entry["_id"]}, {**entry, "indexedAt": now}, upsert=True))
+    if not operations:
+        return
+    try:
+        await db.search_index.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning("search indexing failed", extra={"kind": kind, "error": str(e)})
+
+
+async def remove_documents(db, kind: str, ids: Iterable):
+    operations = [DeleteOne({"_id": f"{kind}:{ref_id}"}) for ref_id in ids]
+    if not operations:
+        return
+    try:
+        await db.search_index.bulk_write(operations, ordered=False)
+    except Exception as e:
+        logger.warning("search index removal failed", extra={"kind": kind, "error": str(e)})
+
+
+async def ensure_indexes(db):
+    await db.search_index.create_index([("terms", ASCENDING), ("timestamp", DESCENDING)])
+    await db.search_index.create_index([("date", ASCENDING)])
+
+
+# Where each kind lives; logs are split between today's collection and the archive
+SOURCES = [("note", "notes"), ("log", "logs"), ("log", "logs_archive"), ("agenda", "agenda")]
+
+
+async def rebuild(db, batch_size: int = 2000) -> dict:
+    """Re-index every source collection and drop entries whose record is gone."""
+    started = datetime.now(timezone.utc)
+    await ensure_indexes(db)
+    counts = {}
+    for kind, collection in SOURCES:
+        projection = {
+            "response": 1, "content": 1, "timestamp": 1, "createdAt": 1, "date": 1, "localDate": 1, "category": 1,
+        }
+        cursor = db[collection].find({}, projection).batch_size(batch_size)
+        batch, indexed = [], 0
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                indexed += await _index_batch(db, kind, batch, started)
+                batch = []
+        indexed += await _index_batch(db, kind, batch, started)
+        counts[collection] = indexed
+    # Every entry whose record still exists now has indexedAt >= started,
+    # as do entries written by requests while this ran
+    removed = await db.search_index.delete_many({"indexedAt": {"$not": {"$gte": started}}})
+    counts["removed"] = removed.deleted_count
+    return counts
+
+
+async def _index_batch(db, kind: str, docs: list, indexed_at: datetime) -> int:
+    entries = [e for e in (make_entry(kind, doc) for doc in docs) if e]
+    if entries:
+        await db.search_index.bulk_write(
+            [ReplaceOne({"_id": e["_id"]}, {**e, "indexedAt": indexed_at}, upsert=True) for e in entries],
+            ordered=False,
+        )
+    return len(entries)
+
+
+# ── Queries ───────────────────────────────────────────────────────────────────
+
+def _score(
+    entry: dict, tokens: List[str], words: List[str], phrase: str, avg_length: float, now: datetime,
+) -> tuple:
+    counts = Counter(tokens)
+    norm = K1 * (1 - B + B * len(tokens) / avg_length)
+    score = 0.0
+    matched = set()
+    for word in words:
+        tf = counts.get(word, 0)
+        weight = 1.0
+        if tf:
+            matched.add(word)
+        else:
+            prefixed = [t for t in counts if t.startswith(word)]
+            matched.update(prefixed)
+            tf = sum(counts[t] for t in prefixed)
+            weight = PREFIX_WEIGHT
+        score += weight * tf * (K1 + 1) / (tf + norm)
+    if len(words) > 1 and phrase in " ".join(_WORD.findall(entry["text"].lower())):
+        score += 1.0
+    age_days = max(0.0, (now - _utc(entry["timestamp"])).total_seconds() / 86400)
+    score *= 1 + 0.25 * 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+    return score, sorted(matched)
+
+
+async def search(
+    db,
+    q: str,
+    kinds: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 20,
+) -> dict:
+    """Ranked matches for `q`; `since`/`until` are inclusive YYYY-MM-DD dates."""
+    started = time.perf_counter()
+    words = list(dict.fromkeys(tokenize(q)))
+    if not words:
+        return {"query": q, "candidates": 0, "results": [], "tookMs": 0.0}
+
+    query = {"$and": [{"terms": {"$regex": f"^{re.escape(word)}"}} for word in words]}
+    if kinds:
+        query["kind"] = {"$in": kinds}
+    if since or until:
+        query["date"] = {k: v for k, v in (("$gte", since), ("$lte", until)) if v}
+
+    projection = {"terms": 0, "indexedAt": 0}
+    candidates = await db.search_index.find(query, projection).batch_size(2000).to_list(length=None)
+
+    results = []
+    if candidates:
+        now = datetime.now(timezone.utc)
+        phrase = " ".join(_WORD.findall(q.lower()))
+        tokens = [tokenize(c["text"]) for c in candidates]
+        avg_length = sum(len(t) for t in tokens) / len(candidates) or 1.0
+        scored = (
+            (*_score(entry, entry_tokens, words, phrase, avg_length, now), i)
+            for i, (entry, entry_tokens) in enumerate(zip(candidates, tokens))
+        )
+        for score, matched, i in heapq.nlargest(limit, scored, key=lambda s: s[0]):
+            entry = candidates[i]
+            entry.pop("_id", None)
+            results.append({**entry, "score": round(score, 4), "matched": matched})
+
+    return {
+        "query": q,
+        "candidates": len(candidates),
+        "results": results,
+        "tookMs": round((time.perf_counter() - started) * 1000, 2),
+    }
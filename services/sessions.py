@@ -0,0 +1,95 @@
+"""
+Focus-session building from the ping stream.
+
+Each ping answers "what were you doing?", so it accounts for the time until
+the next ping — as long as that next ping arrives within `max_gap_minutes`.
+Longer silences (sleep, pauses, the laptop being shut) are gaps: the ping
+before them is credited with one normal interval and the rest is dropped.
+
+Consecutive pings with the same category and no gap between them are merged
+into a single session. Everything is one pass over time-sorted logs.
+"""
+
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, Iterator, Optional
+
+from services.models import Session
+
+
+def _as_datetime(ts) -> datetime:
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts
+
+
+def build_sessions(
+    logs: Iterable[dict],
+    interval_minutes: int = 15,
+    max_gap_minutes: Optional[int] = None,
+) -> Iterator[Session]:
+    """Yield sessions from logs sorted by timestamp (oldest first)."""
+    if max_gap_minutes is None:
+        max_gap_minutes = interval_minutes * 2
+    interval = timedelta(minutes=interval_minutes)
+    max_gap = timedelta(minutes=max_gap_minutes)
+
+    current = None
+    prev_ts = None
+    prev_end = None
+
+    for log in logs:
+        ts = _as_datetime(log["timestamp"])
+        category = log.get("category") or "untracked"
+
+        if prev_ts is not None:
+            gap = ts - prev_ts
+            covered = gap if gap <= max_gap else interval
+            current.end = prev_ts + covered
+            current.minutes += covered.total_seconds() / 60
+
+            if category == current.category and gap <= max_gap:
+                current.pings += 1
+                prev_ts = ts
+                continue
+
+            prev_end = current.end
+            yield _finish(current)
+
+        gap_before = (ts - prev_end).total_seconds() / 60 if prev_end else None
+        current = Session(
+            category=category,
+            start=ts,
+            end=ts,
+            gapBeforeMinutes=round(gap_before, 1) if gap_before is not None else None,
+        )
+        prev_ts = ts
+
+    if current is not None:
+        # Nothing after the last ping yet — credit it with one interval
+        current.end = prev_ts + interval
+        current.minutes += interval_minutes
+        yield _finish(current)
+
+
+def _finish(session: Session) -> Session:
+    session.minutes = round(session.minutes, 1)
+    return session
+
+
+def minutes_per_category(sessions: Iterable[Session], include_untracked: bool = False) -> Dict[str, float]:
+    """Total session minutes per category."""
+    totals: Dict[str, float] = {}
+    for s in sessions:
+        if s.category == "untracked" and not include_untracked:
+            continue
+        totals[s.category] = round(totals.get(s.category, 0) + s.minutes, 1)
+    return totals
+
+
+async def save_sessions(db, date_str: str, sessions: list):
+    """Replace the stored sessions for `date_str` (safe to re-run)."""
+    await db.sessions.delete_many({"date": date_str})
+    if sessions:
+        await db.sessions.insert_many([{**s.to_dict(), "date": date_str} for s in sessions])
@@ -0,0 +1,84 @@
+"""
+User settings, shared by the HTTP routes and the bot.
+
+Like the other domain modules (services.ping, services.agenda,
+services.notes) these functions take the database handle and plain values or
+request models, and return plain documents — no FastAPI types — so they can be
+called from a route, from the bot in embedded mode, or from a script.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+from services import days, revisions
+from services.cache import summary_cache
+from services.models import SettingsUpdate
+from services.schedule import refresh_schedule
+
+DEFAULT_SETTINGS = {
+    "userId": "default",
+    "sleepStart": "02:00",
+    "sleepEnd": "10:00",
+    "timezone": "Asia/Kolkata",
+    "intervalMinutes": 15,
+    "summaryTime": "21:00",
+    "email": "",
+    "telegramChatId": "",
+    "isPaused": False,
+    "pauseUntil": None,
+    "quietWindows": [],
+    "nextEligibleAt": None,
+    "pendingPing": False,
+    "pendingPingAt": None,
+    "lastRespondedAt": None,
+    "lastMorningMessage": None,
+}
+
+# Bookkeeping the ping trigger and services.schedule write on their own. They
+# change every few minutes without the user changing anything, so they are
+# left out of GET /api/settings and their writes don't bump the settings
+# revision; a client's cached settings stay valid between real updates.
+SCHEDULER_FIELDS = (
+    "nextEligibleAt", "blockedIntervals", "scheduleThrough",
+    "pendingPing", "pendingPingAt", "lastRespondedAt", "lastMorningMessage",
+)
+
+
+async def load_settings(db) -> dict:
+    """Fetch the settings document, creating it from defaults on first use."""
+    settings = await db.settings.find_one({"userId": "default"})
+    if not settings:
+        await db.settings.insert_one(DEFAULT_SETTINGS.copy())
+        settings = await db.settings.find_one({"userId": "default"})
+    return settings
+
+
+def public_settings(settings: dict) -> dict:
+    """`settings` without SCHEDULER_FIELDS, as GET /api/settings returns it."""
+    return {key: value for key, value in settings.items() if key not in SCHEDULER_FIELDS}
+
+
+async def update_settings(db, data: SettingsUpdate):
+    # Only the fields the caller actually sent
+    updates = data.model_dump(exclude_unset=True, exclude={"pauseDurationMinutes"})
+    now = datetime.now(timezone.utc)
+    if data.pauseDurationMinutes:
+        updates["isPaused"] = True
+        updates["pauseUntil"] = now + timedelta(minutes=data.pauseDurationMinutes)
+    elif "isPaused" in updates and "pauseUntil" not in updates:
+        # A bare pause is indefinite and a resume clears any end time
+        updates["pauseUntil"] = None
+
+    settings = await db.settings.find_one_and_update(
+        {"userId": "default"},
+        revisions.revise({"$set": {**updates, "updatedAt": datetime.utcnow()}}),
+        return_document=ReturnDocument.AFTER,
+    )
+    if "timezone" in updates:
+        # Day windows are resolved in the user's timezone
+        days.forget_timezone("default")
+    # Sleep times, timezone, quiet windows and pauses all move nextEligibleAt
+    await refresh_schedule(db, settings, now)
+    # intervalMinutes feeds session durations in the summary
+    await summary_cache.invalidate("default")
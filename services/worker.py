@@ -0,0 +1,24 @@
+"""
+Gunicorn worker class for production serving (see gunicorn.conf.py).
+
+Pins uvicorn to uvloop and httptools rather than "auto", so a missing
+dependency fails loudly instead of quietly falling back to asyncio/h11, and
+caps how long in-flight requests get on shutdown so the app lifespan still has
+time to drain background sends before gunicorn's graceful_timeout kills the
+worker.
+"""
+
+import os
+
+from uvicorn_worker import UvicornWorker
+
+# Seconds for in-flight requests; gunicorn's graceful_timeout must be larger
+REQUEST_DRAIN_SECONDS = int(os.getenv("REQUEST_DRAIN_SECONDS", "15"))
+
+
+class PingMeWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "timeout_graceful_shutdown": REQUEST_DRAIN_SECONDS,
+    }